@@ -10,16 +10,21 @@ import os
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from src.gui import create_gui
 from src.utils import handle_error
 
 
 def main() -> None:
     """
     主程序入口
+    带参数运行时执行命令行操作，否则启动GUI
     """
+    if len(sys.argv) > 1:
+        from src.cli import run_cli
+        sys.exit(run_cli(sys.argv[1:]))
+    
     try:
-        # 启动GUI应用
+        # 启动GUI应用，命令行模式不需要导入GUI依赖，便于在无界面的节点上运行
+        from src.gui import create_gui
         create_gui()
     except KeyboardInterrupt:
         print("\n程序已中断")
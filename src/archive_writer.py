@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+归档写出模块
+在独立的写出线程中将图片字节直接流式写入ZIP或TAR归档(文件或标准输出)，
+成员名和元数据固定，相同输入生成相同的归档
+"""
+
+import io
+import os
+import sys
+import csv
+import gzip
+import queue
+import tarfile
+import zipfile
+import threading
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+
+# 支持的归档格式及对应的扩展名
+ARCHIVE_FORMATS = {
+    'zip': ('.zip',),
+    'tar': ('.tar',),
+    'tgz': ('.tar.gz', '.tgz')
+}
+
+# 归档末尾的索引文件名
+INDEX_NAME = 'index.csv'
+
+# ZIP格式能表示的最早时间，用作所有成员的固定时间
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+
+def detect_archive_format(path: str) -> Optional[str]:
+    """
+    根据扩展名判断归档格式
+
+    Args:
+        path: 输出路径
+
+    Returns:
+        Optional[str]: 归档格式，不是归档路径时返回None
+    """
+    lower = path.lower()
+    for archive_format, extensions in ARCHIVE_FORMATS.items():
+        if lower.endswith(extensions):
+            return archive_format
+    return None
+
+
+class ArchiveWriter:
+    """
+    流式归档写出类
+    工作线程调用add将成员放入有界队列，写出线程按加入顺序写入归档，
+    关闭时在归档末尾写入索引文件
+    """
+
+    def __init__(self, target: Union[str, BinaryIO], archive_format: Optional[str] = None,
+                 queue_size: int = 256):
+        """
+        打开归档并启动写出线程
+
+        Args:
+            target: 归档文件路径、'-'(标准输出)或可写的二进制文件对象
+            archive_format: 归档格式，支持'zip'、'tar'、'tgz'，默认根据扩展名判断
+            queue_size: 等待写出的成员数上限，队列满时add会阻塞
+
+        Raises:
+            ValueError: 当无法确定归档格式时
+        """
+        if archive_format is None and isinstance(target, str):
+            archive_format = detect_archive_format(target)
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"无效的归档格式: {archive_format}，支持{list(ARCHIVE_FORMATS)}")
+
+        self.archive_format = archive_format
+        self.index: List[Tuple[str, str, int, str]] = []
+        self._names = set()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self._closed = False
+
+        # 打开输出流，标准输出和调用方传入的文件对象不由本类关闭
+        if target == '-':
+            self._output, self._owns_output = sys.stdout.buffer, False
+        elif isinstance(target, str):
+            directory = os.path.dirname(target)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._output, self._owns_output = open(target, 'wb'), True
+        else:
+            self._output, self._owns_output = target, False
+
+        self._gzip = None
+        if archive_format == 'zip':
+            self._archive = zipfile.ZipFile(self._output, 'w', zipfile.ZIP_STORED)
+        else:
+            stream = self._output
+            if archive_format == 'tgz':
+                # 固定gzip头中的时间，tarfile自带的gzip流会写入当前时间
+                stream = self._gzip = gzip.GzipFile(filename='', mode='wb', fileobj=self._output, mtime=0)
+            self._archive = tarfile.open(fileobj=stream, mode='w|', format=tarfile.PAX_FORMAT)
+
+        self._thread = threading.Thread(target=self._write_loop, name="archive-writer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'ArchiveWriter':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def add(self, key: str, name: str, data: bytes, sha256: str) -> str:
+        """
+        将成员加入写出队列
+
+        Args:
+            key: 任务key，写入索引
+            name: 成员名，与已有成员重名时追加序号
+            data: 成员内容
+            sha256: 成员内容的SHA-256校验值
+
+        Returns:
+            str: 实际使用的成员名
+
+        Raises:
+            RuntimeError: 当写出线程已出错时
+        """
+        self._raise_error()
+        name = self._unique_name(name)
+        self.index.append((key, name, len(data), sha256))
+        self._queue.put((name, data))
+        return name
+
+    def close(self) -> int:
+        """
+        等待队列写完，写入索引文件并结束归档
+
+        Returns:
+            int: 归档中的图片成员数
+
+        Raises:
+            RuntimeError: 当写出线程出错时
+        """
+        if self._closed:
+            return len(self.index)
+        self._closed = True
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(['key', 'name', 'size', 'sha256'])
+        writer.writerows(self.index)
+        self._queue.put((INDEX_NAME, buffer.getvalue().encode('utf-8')))
+        self._queue.put(None)
+        self._thread.join()
+
+        try:
+            self._archive.close()
+            if self._gzip is not None:
+                self._gzip.close()
+            self._output.flush()
+        finally:
+            if self._owns_output:
+                self._output.close()
+
+        self._raise_error()
+        return len(self.index)
+
+    def _unique_name(self, name: str) -> str:
+        """
+        生成不重复的成员名，按加入顺序编号，结果可重现
+
+        Args:
+            name: 期望的成员名
+
+        Returns:
+            str: 不重复的成员名
+        """
+        if name in self._names or name == INDEX_NAME:
+            stem, extension = os.path.splitext(name)
+            number = 2
+            while f"{stem}-{number}{extension}" in self._names:
+                number += 1
+            name = f"{stem}-{number}{extension}"
+        self._names.add(name)
+        return name
+
+    def _write_loop(self) -> None:
+        """写出线程：依次写入队列中的成员，出错后丢弃剩余成员"""
+        while True:
+            member = self._queue.get()
+            if member is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                self._write_member(*member)
+            except Exception as e:
+                self._error = e
+
+    def _write_member(self, name: str, data: bytes) -> None:
+        """
+        以固定的时间和权限写入一个成员
+
+        Args:
+            name: 成员名
+            data: 成员内容
+        """
+        if self.archive_format == 'zip':
+            info = zipfile.ZipInfo(name, date_time=ZIP_EPOCH)
+            info.external_attr = 0o644 << 16
+            self._archive.writestr(info, data, compress_type=zipfile.ZIP_STORED)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = 0
+            info.mode = 0o644
+            self._archive.addfile(info, io.BytesIO(data))
+
+    def _raise_error(self) -> None:
+        """写出线程出错时在调用方线程中抛出"""
+        if self._error is not None:
+            raise RuntimeError(f"写入归档失败: {self._error}") from self._error
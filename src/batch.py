@@ -0,0 +1,755 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量生成和解码模块
+支持从CSV任务文件批量生成QR码，并可抽样进行生成后解码校验；支持并行解码图片目录
+"""
+
+import os
+import csv
+import time
+import zlib
+import threading
+from io import BytesIO
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Optional, Union
+from PIL import Image
+
+from .qrcode_generator import QRCodeGenerator
+from . import styled_renderer
+from .archive_writer import ArchiveWriter
+from .manifest import JobManifest, file_checksum, remove_partial_file, write_file_atomic
+from .sharding import relative_key
+from .utils import logger
+
+
+# 有损格式，保存后的图像与内存中的图像不同
+LOSSY_FORMATS = ('JPG', 'JPEG')
+
+# 批量解码时识别的图片扩展名
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff')
+
+
+def load_jobs_csv(file_path: str) -> Iterator[Dict[str, str]]:
+    """
+    从CSV任务文件读取批量生成任务
+
+    CSV文件需包含content列，可选key和content_type列。
+    未提供key时使用行号作为key。
+
+    Args:
+        file_path: CSV文件路径
+
+    Returns:
+        Iterator[Dict[str, str]]: 任务迭代器，每个任务包含key、content和content_type
+
+    Raises:
+        ValueError: 当CSV文件缺少content列时
+    """
+    with open(file_path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or 'content' not in reader.fieldnames:
+            raise ValueError(f"任务文件缺少content列: {file_path}")
+
+        for row_number, row in enumerate(reader, 1):
+            yield {
+                'key': row.get('key') or str(row_number),
+                'content': row['content'],
+                'content_type': row.get('content_type') or 'text'
+            }
+
+
+def normalize_item(item: Union[str, Dict[str, Any]], index: int) -> Dict[str, Any]:
+    """
+    将任务统一为包含key、content和content_type的字典
+
+    Args:
+        item: 任务内容字符串或任务字典
+        index: 任务序号，用于生成默认key
+
+    Returns:
+        Dict[str, Any]: 规范化后的任务
+    """
+    if isinstance(item, str):
+        item = {'content': item}
+    return {
+        'key': str(item.get('key') or index),
+        'content': item['content'],
+        'content_type': item.get('content_type') or 'text'
+    }
+
+
+def safe_file_name(key: str) -> str:
+    """
+    将任务key转换为可用作文件名的字符串
+
+    Args:
+        key: 任务key
+
+    Returns:
+        str: 文件名(不含扩展名)
+    """
+    name = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in key).strip('.')
+    return name or '_'
+
+
+def should_verify(key: str, verify_rate: float) -> bool:
+    """
+    根据key的稳定哈希决定是否抽样校验，相同key在多次运行中结果一致
+
+    Args:
+        key: 任务key
+        verify_rate: 抽样比例(0-1)
+
+    Returns:
+        bool: 是否校验
+    """
+    if verify_rate <= 0:
+        return False
+    if verify_rate >= 1:
+        return True
+    return zlib.crc32(key.encode('utf-8')) / 0x100000000 < verify_rate
+
+
+def find_image_files(directory: str, recursive: bool = True) -> List[str]:
+    """
+    查找目录中的图片文件
+
+    Args:
+        directory: 图片目录
+        recursive: 是否包含子目录
+
+    Returns:
+        List[str]: 按路径排序的图片文件路径列表
+
+    Raises:
+        ValueError: 当目录不存在时
+    """
+    if not os.path.isdir(directory):
+        raise ValueError(f"目录不存在: {directory}")
+
+    paths = []
+    for root, dirs, names in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in names
+                     if name.lower().endswith(IMAGE_EXTENSIONS))
+        if not recursive:
+            break
+    return sorted(paths)
+
+
+def decode_status(result: Dict[str, Any]) -> str:
+    """
+    获取批量解码结果的状态
+
+    Args:
+        result: 批量解码结果
+
+    Returns:
+        str: 'ok'表示已识别，'empty'表示未找到QR码，'error'表示解码出错
+    """
+    if result['error']:
+        return 'error'
+    return 'ok' if result['results'] else 'empty'
+
+
+def write_decode_csv(results: Iterable[Dict[str, Any]], file_path: str) -> int:
+    """
+    将批量解码结果导出为CSV文件
+
+    每个图片一行，多个QR码的内容以换行分隔。
+
+    Args:
+        results: 批量解码结果序列
+        file_path: CSV文件路径
+
+    Returns:
+        int: 写入的行数
+    """
+    count = 0
+    with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(['path', 'status', 'count', 'data', 'elapsed_ms', 'error'])
+        for result in results:
+            writer.writerow([
+                result['path'],
+                decode_status(result),
+                len(result['results']),
+                '\n'.join(r['data'] for r in result['results']),
+                f"{result['elapsed'] * 1000:.1f}",
+                result['error'] or ''
+            ])
+            count += 1
+    return count
+
+
+# 工作进程中复用的生成器和各后端的解码器
+_worker_generator = None
+_worker_backend_decoders = {}
+
+
+def _get_worker_decoder(backend: str):
+    """
+    获取工作进程中复用的解码器，首次使用某个后端时创建
+
+    Args:
+        backend: 解码后端名称
+
+    Returns:
+        QRCodeDecoder: 使用该后端的解码器
+
+    Raises:
+        ImportError: 当解码后端的依赖未安装时
+    """
+    decoder = _worker_backend_decoders.get(backend)
+    if decoder is None:
+        from .qrcode_decoder import QRCodeDecoder
+        decoder = _worker_backend_decoders[backend] = QRCodeDecoder(backend=backend)
+    return decoder
+
+
+def _verify_image(img: Image.Image, box_size: int, border: int) -> List[str]:
+    """
+    解码生成的图像用于校验
+
+    先按已知网格采样，只依赖NumPy；网格采样没有解出内容(如有损压缩后的图像)时回退到pyzbar。
+
+    Args:
+        img: 待校验的图像
+        box_size: 生成时每个格子的像素大小
+        border: 生成时的边框格子数
+
+    Returns:
+        List[str]: 解码出的内容列表
+
+    Raises:
+        ImportError: 当需要回退但pyzbar未安装时
+    """
+    decoded = [r['data'] for r in _get_worker_decoder('grid').decode_generated(img, box_size, border)]
+    if decoded:
+        return decoded
+    return [r['data'] for r in _get_worker_decoder('pyzbar').decode_from_image(img)]
+
+
+def _render_item(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    渲染单个任务并编码为图片字节，按需进行解码校验
+
+    在工作进程中执行，只返回编码后的字节和校验结果。校验出错不影响渲染结果，
+    错误记录在verify_error字段中。
+
+    Args:
+        task: 任务，包含key、content、content_type、options等字段
+
+    Returns:
+        Dict[str, Any]: 渲染结果，包含key、data、sha256、verified、verify_error等字段
+    """
+    global _worker_generator
+
+    if _worker_generator is None:
+        _worker_generator = QRCodeGenerator()
+    generator = _worker_generator
+
+    result = {'key': task['key'], 'data': None, 'verified': None, 'verify_error': None, 'error': None}
+    try:
+        img = generator.generate_qr_code(task['content'], task['content_type'], **task['options'])
+
+        buffer = BytesIO()
+        generator.save_qr_code(img, buffer, image_format=task['image_format'],
+                               quality=task['quality'])
+        result['data'] = buffer.getvalue()
+        result['sha256'] = file_checksum(result['data'])
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+
+    if not task['verify']:
+        return result
+
+    try:
+        # 有损格式校验实际保存的字节，可选模拟指定JPEG质量
+        if task['verify_quality'] is not None:
+            jpeg_buffer = BytesIO()
+            img.convert('RGB').save(jpeg_buffer, format='JPEG', quality=task['verify_quality'])
+            verify_img = Image.open(BytesIO(jpeg_buffer.getvalue()))
+        elif task['image_format'].upper() in LOSSY_FORMATS:
+            verify_img = Image.open(BytesIO(result['data']))
+        else:
+            verify_img = img
+
+        expected = generator._format_content(task['content'], task['content_type'])
+        decoded = _verify_image(verify_img, task['options']['box_size'], task['options']['border'])
+    except Exception as e:
+        result['verify_error'] = str(e)
+        return result
+
+    result['verified'] = expected in decoded
+    if not result['verified']:
+        result['expected'] = expected
+        result['decoded'] = decoded
+    return result
+
+
+def _decode_item(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    解码单个图片文件
+
+    在工作进程中执行，每个进程按后端复用解码器。
+
+    Args:
+        task: 任务，包含path和backend字段
+
+    Returns:
+        Dict[str, Any]: 解码结果，包含path、size、mtime_ns、results、error和elapsed字段
+    """
+    decoder = _get_worker_decoder(task['backend'])
+
+    result = {'path': task['path'], 'size': None, 'mtime_ns': None,
+              'results': [], 'error': None, 'elapsed': 0.0}
+    start = time.perf_counter()
+    try:
+        # 记录解码时的文件状态，供任务清单判断文件是否变化
+        stat = os.stat(task['path'])
+        result['size'], result['mtime_ns'] = stat.st_size, stat.st_mtime_ns
+        result['results'] = decoder.decode_from_file(task['path'])
+    except Exception as e:
+        result['error'] = str(e)
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def _run_tasks(func: Callable[[Dict[str, Any]], Dict[str, Any]], tasks: Iterable[Dict[str, Any]],
+               workers: int, cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+    """
+    执行任务，按提交顺序返回结果，并限制同时在处理的任务数
+
+    Args:
+        func: 模块级任务函数
+        tasks: 任务序列
+        workers: 工作进程数，0表示在当前进程中执行
+        cancel_event: 取消事件，设置后不再提交新任务并丢弃尚未开始的任务
+
+    Returns:
+        Iterator[Dict[str, Any]]: 结果迭代器
+    """
+    if not workers:
+        for task in tasks:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            yield func(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        try:
+            for task in tasks:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                pending.append(executor.submit(func, task))
+                if len(pending) >= workers * 4:
+                    yield pending.popleft().result()
+
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                yield pending.popleft().result()
+        finally:
+            # 提前结束时取消尚未开始的任务
+            for future in pending:
+                future.cancel()
+
+
+def _output_complete(manifest: JobManifest, key: str, file_path: str) -> bool:
+    """
+    判断清单中记录的输出文件是否仍然完好
+
+    只比较路径和文件大小，不重新计算校验值。
+
+    Args:
+        manifest: 任务清单
+        key: 任务key
+        file_path: 本次运行的输出路径
+
+    Returns:
+        bool: 是否可以跳过该项
+    """
+    record = manifest.get(key)
+    if record is None:
+        return False
+    try:
+        complete = record['path'] == file_path and os.path.getsize(file_path) == record['size']
+    except (OSError, KeyError):
+        complete = False
+    if not complete:
+        manifest.discard(key)
+    return complete
+
+
+def _input_unchanged(record: Dict[str, Any], path: str) -> bool:
+    """
+    判断清单中记录的输入文件是否未变化
+
+    Args:
+        record: 清单记录
+        path: 输入文件路径
+
+    Returns:
+        bool: 大小和修改时间是否与记录一致
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return (stat.st_size, stat.st_mtime_ns) == (record.get('size'), record.get('mtime_ns'))
+
+
+def _validate_style(style: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    在启动工作进程前检查样式选项
+
+    Args:
+        style: 样式选项
+
+    Returns:
+        Dict[str, Any]: 去掉空值后的样式选项
+
+    Raises:
+        ValueError: 当样式选项无效时
+    """
+    style = {name: value for name, value in style.items() if value is not None}
+    unknown = set(style) - {'fill_color', 'back_color', 'module_shape', 'logo', 'logo_ratio'}
+    if unknown:
+        raise ValueError(f"无效的样式选项: {sorted(unknown)}")
+    for name in ('fill_color', 'back_color'):
+        if name in style:
+            styled_renderer.parse_color(style[name])
+    if style.get('module_shape', 'square') not in styled_renderer.MODULE_SHAPES:
+        raise ValueError(f"无效的模块形状: {style['module_shape']}，支持{styled_renderer.MODULE_SHAPES}")
+    if style.get('logo') and not os.path.isfile(style['logo']):
+        raise ValueError(f"logo文件不存在: {style['logo']}")
+    return style
+
+
+class BatchGenerator:
+    """
+    批量QR码生成器类
+    在多个工作进程中渲染和编码，在主进程中写出文件
+    """
+
+    def __init__(self, workers: Optional[int] = None, size: int = 10,
+                 error_correction: str = 'M', box_size: int = 10, border: int = 4,
+                 image_format: str = 'PNG', quality: int = 90,
+                 style: Optional[Dict[str, Any]] = None):
+        """
+        初始化批量生成器
+
+        Args:
+            workers: 工作进程数，默认使用CPU核心数，0表示在当前进程中生成
+            size: QR码版本(1-40)
+            error_correction: 纠错级别，支持'L', 'M', 'Q', 'H'
+            box_size: 每个格子的像素大小
+            border: 边框格子数
+            image_format: 输出图像格式
+            quality: 图像质量(0-100)，仅对JPG等有损格式有效
+            style: 样式选项(fill_color、back_color、module_shape、logo、logo_ratio)，
+                传递给QRCodeGenerator.generate_qr_code；缩放后的logo和模块贴图在每个工作进程中缓存
+        """
+        image_format = image_format.upper()
+        if image_format not in QRCodeGenerator.SUPPORTED_FORMATS:
+            raise ValueError(f"不支持的图像格式: {image_format}，支持{QRCodeGenerator.SUPPORTED_FORMATS}")
+
+        self.workers = os.cpu_count() if workers is None else workers
+        self.options = {
+            'size': size,
+            'error_correction': error_correction,
+            'box_size': box_size,
+            'border': border
+        }
+        if style:
+            self.options.update(_validate_style(style))
+        self.image_format = image_format
+        self.quality = quality
+
+    def generate(self, items: Iterable[Union[str, Dict[str, Any]]], output_dir: str,
+                 verify_rate: float = 0.0,
+                 verify_quality: Optional[int] = None,
+                 manifest: Optional[JobManifest] = None) -> Dict[str, Any]:
+        """
+        批量生成QR码并保存到输出目录
+
+        文件先写入临时文件再替换。只删除本次任务项上次中断残留的临时文件，
+        多个分片可以同时写入同一个输出目录。
+
+        Args:
+            items: 任务序列，元素为内容字符串或包含key、content、content_type的字典
+            output_dir: 输出目录
+            verify_rate: 生成后解码校验的抽样比例(0-1)
+            verify_quality: 校验前模拟保存为该质量的JPEG，None表示校验实际输出
+            manifest: 任务清单，已记录且输出文件完好的项会被跳过，新完成的项追加到清单
+
+        Returns:
+            Dict[str, Any]: 生成报告，包含数量统计、校验不一致项(mismatches)、
+                校验出错项(verify_errors)和生成失败项(errors)
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        extension = self.image_format.lower()
+        partial_removed = 0
+
+        def is_complete(item):
+            nonlocal partial_removed
+            file_path = os.path.join(output_dir, f"{safe_file_name(item['key'])}.{extension}")
+            # 顺带删除该项残留的临时文件，其他分片的项不在本次任务中，不会被触及
+            if remove_partial_file(file_path):
+                partial_removed += 1
+            return manifest is not None and _output_complete(manifest, item['key'], file_path)
+
+        def write(result):
+            file_path = os.path.join(output_dir, f"{safe_file_name(result['key'])}.{extension}")
+            write_file_atomic(file_path, result['data'])
+            if manifest is not None:
+                manifest.record(result['key'], path=file_path, sha256=result['sha256'],
+                                size=len(result['data']))
+            return file_path
+
+        report = self._generate(items, write, verify_rate, verify_quality, is_complete)
+        if partial_removed:
+            logger.warning(f"删除 {partial_removed} 个未写完的文件: {output_dir}")
+        report['partial_removed'] = partial_removed
+        return report
+
+    def generate_archive(self, items: Iterable[Union[str, Dict[str, Any]]], archive: ArchiveWriter,
+                         verify_rate: float = 0.0,
+                         verify_quality: Optional[int] = None) -> Dict[str, Any]:
+        """
+        批量生成QR码并直接写入归档，不在磁盘上创建单独的图片文件
+
+        成员名为 key.扩展名，按任务顺序写入，归档末尾附带index.csv索引。
+
+        Args:
+            items: 任务序列，元素为内容字符串或包含key、content、content_type的字典
+            archive: 归档写出器，由调用方负责关闭
+            verify_rate: 生成后解码校验的抽样比例(0-1)
+            verify_quality: 校验前模拟保存为该质量的JPEG，None表示校验实际输出
+
+        Returns:
+            Dict[str, Any]: 生成报告，不一致项的path字段为成员名
+        """
+        extension = self.image_format.lower()
+
+        def write(result):
+            return archive.add(result['key'], f"{safe_file_name(result['key'])}.{extension}",
+                               result['data'], result['sha256'])
+
+        return self._generate(items, write, verify_rate, verify_quality)
+
+    def _generate(self, items: Iterable[Union[str, Dict[str, Any]]],
+                  write: Callable[[Dict[str, Any]], str], verify_rate: float,
+                  verify_quality: Optional[int],
+                  is_complete: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+        """
+        执行批量生成并汇总报告
+
+        Args:
+            items: 任务序列
+            write: 写出一个渲染结果并返回其路径或成员名
+            verify_rate: 校验抽样比例
+            verify_quality: 模拟的JPEG质量
+            is_complete: 判断任务是否已完成，已完成的任务被跳过
+
+        Returns:
+            Dict[str, Any]: 生成报告
+        """
+        if not 0 <= verify_rate <= 1:
+            raise ValueError(f"无效的校验比例: {verify_rate}，支持0-1")
+
+        report = {
+            'total': 0,
+            'generated': 0,
+            'skipped': 0,
+            'verified': 0,
+            'mismatches': [],
+            'verify_errors': [],
+            'errors': [],
+            'elapsed': 0.0
+        }
+        start = time.perf_counter()
+
+        def pending_tasks():
+            for index, item in enumerate(items, 1):
+                item = normalize_item(item, index)
+                if is_complete is not None and is_complete(item):
+                    report['total'] += 1
+                    report['skipped'] += 1
+                    continue
+                yield self._make_task(item, verify_rate, verify_quality)
+
+        for result in self._run(pending_tasks()):
+            report['total'] += 1
+            if result['error']:
+                logger.error(f"生成QR码失败 {result['key']}: {result['error']}")
+                report['errors'].append({'key': result['key'], 'error': result['error']})
+                continue
+
+            # 先写出图像，校验结果只影响报告
+            path = write(result)
+            report['generated'] += 1
+
+            if result['verify_error']:
+                logger.error(f"校验QR码出错 {result['key']}: {result['verify_error']}")
+                report['verify_errors'].append({'key': result['key'], 'path': path,
+                                                'error': result['verify_error']})
+            elif result['verified'] is not None:
+                report['verified'] += 1
+                if not result['verified']:
+                    report['mismatches'].append({
+                        'key': result['key'],
+                        'path': path,
+                        'expected': result['expected'],
+                        'decoded': result['decoded']
+                    })
+
+        report['elapsed'] = time.perf_counter() - start
+        return report
+
+    def _make_task(self, item: Dict[str, Any], verify_rate: float,
+                   verify_quality: Optional[int]) -> Dict[str, Any]:
+        """
+        根据规范化的任务构造工作进程的渲染任务
+
+        Args:
+            item: 规范化后的任务
+            verify_rate: 校验抽样比例
+            verify_quality: 模拟的JPEG质量
+
+        Returns:
+            Dict[str, Any]: 渲染任务
+        """
+        return {
+            'key': item['key'],
+            'content': item['content'],
+            'content_type': item['content_type'],
+            'options': self.options,
+            'image_format': self.image_format,
+            'quality': self.quality,
+            'verify': should_verify(item['key'], verify_rate),
+            'verify_quality': verify_quality
+        }
+
+    def _run(self, tasks: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        执行渲染任务，按提交顺序返回结果
+
+        Args:
+            tasks: 渲染任务序列
+
+        Returns:
+            Iterator[Dict[str, Any]]: 渲染结果迭代器
+        """
+        return _run_tasks(_render_item, tasks, self.workers)
+
+
+class BatchDecoder:
+    """
+    批量QR码解码器类
+    在多个工作进程中解码图片文件，按输入顺序返回结果
+    """
+
+    def __init__(self, workers: Optional[int] = None, backend: str = 'pyzbar'):
+        """
+        初始化批量解码器
+
+        Args:
+            workers: 工作进程数，默认使用CPU核心数，0表示在当前进程中解码
+            backend: 解码后端名称
+        """
+        self.workers = os.cpu_count() if workers is None else workers
+        self.backend = backend
+
+    def iter_decode(self, paths: Iterable[str],
+                    cancel_event: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """
+        逐个返回解码结果
+
+        Args:
+            paths: 图片文件路径序列
+            cancel_event: 取消事件，设置后停止解码
+
+        Returns:
+            Iterator[Dict[str, Any]]: 解码结果迭代器，每项包含path、results、error和elapsed字段
+
+        Raises:
+            ValueError: 当解码后端名称无效时
+            ImportError: 当解码后端依赖未安装时
+        """
+        # 在启动工作进程前检查后端是否可用
+        from .decoder_backends import create_backend
+        create_backend(self.backend)
+
+        tasks = ({'path': path, 'backend': self.backend} for path in paths)
+        return _run_tasks(_decode_item, tasks, self.workers, cancel_event)
+
+    def decode(self, paths: Iterable[str],
+               manifest: Optional[JobManifest] = None,
+               root: Optional[str] = None) -> Dict[str, Any]:
+        """
+        批量解码图片文件
+
+        Args:
+            paths: 图片文件路径序列
+            manifest: 任务清单，已记录且文件未变化的图片直接使用记录中的结果，新解码的结果追加到清单
+            root: 输入根目录，提供时清单以相对该目录的路径(以/分隔)为key，
+                输入目录挂载在不同路径的节点可以合并各自的清单
+
+        Returns:
+            Dict[str, Any]: 解码报告，包含数量统计和按输入顺序排列的每个文件的解码结果
+        """
+        report = {
+            'total': 0,
+            'decoded': 0,
+            'empty': 0,
+            'errors': 0,
+            'skipped': 0,
+            'elapsed': 0.0,
+            'results': []
+        }
+        start = time.perf_counter()
+        positions = {}
+
+        def count(result):
+            report['total'] += 1
+            status = decode_status(result)
+            if status == 'ok':
+                report['decoded'] += 1
+            elif status == 'empty':
+                report['empty'] += 1
+            else:
+                report['errors'] += 1
+            report['results'].append(result)
+
+        def manifest_key(path):
+            return relative_key(path, root) if root is not None else path
+
+        def pending_paths():
+            for index, path in enumerate(paths):
+                positions[path] = index
+                record = manifest.get(manifest_key(path)) if manifest is not None else None
+                if record is not None and _input_unchanged(record, path):
+                    report['skipped'] += 1
+                    # 记录中的路径可能来自其他挂载点或写法，改为本次输入的路径
+                    count(dict(record['result'], path=path))
+                    continue
+                yield path
+
+        for result in self.iter_decode(pending_paths()):
+            if result['error']:
+                logger.error(f"解码失败 {result['path']}: {result['error']}")
+            elif manifest is not None:
+                manifest.record(manifest_key(result['path']), size=result['size'], mtime_ns=result['mtime_ns'],
+                                result=result)
+            count(result)
+
+        # 跳过的结果先于解码结果计入，按输入顺序重新排列
+        if report['skipped']:
+            report['results'].sort(key=lambda result: positions[result['path']])
+        report['elapsed'] = time.perf_counter() - start
+        return report
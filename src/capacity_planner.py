@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+容量规划模块
+预先计算版本1-40的数据位数表和(纠错级别, 编码模式)的字符容量表，按与qrcode相同的规则
+将内容分段后累加各段位数，无需试编码即可得到最小版本、剩余容量和输出像素尺寸
+"""
+
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence, Union
+
+from qrcode import base, constants, util
+
+
+# 纠错级别名称与常量
+ERROR_CORRECTION = {
+    'L': constants.ERROR_CORRECT_L,
+    'M': constants.ERROR_CORRECT_M,
+    'Q': constants.ERROR_CORRECT_Q,
+    'H': constants.ERROR_CORRECT_H
+}
+
+# 编码模式名称
+MODE_NAMES = {
+    util.MODE_NUMBER: 'numeric',
+    util.MODE_ALPHA_NUM: 'alphanumeric',
+    util.MODE_8BIT_BYTE: 'byte'
+}
+
+# 支持的版本范围
+MIN_VERSION = 1
+MAX_VERSION = 40
+
+# 模式指示符位数
+MODE_INDICATOR_BITS = 4
+
+# 分段的最小长度，与QRCode.add_data的默认optimize参数一致
+OPTIMIZE_MINIMUM = 20
+
+# 字符计数指示符位数相同的版本区间(首版本, 末版本)
+LENGTH_BITS_RANGES = ((1, 9), (10, 26), (27, 40))
+
+
+def _data_bits(version: int, error_correction: int) -> int:
+    """
+    计算指定版本和纠错级别的数据码字位数
+
+    Args:
+        version: QR码版本
+        error_correction: 纠错级别常量
+
+    Returns:
+        int: 数据位数
+    """
+    return sum(block.data_count * 8 for block in base.rs_blocks(version, error_correction))
+
+
+def _characters_in_bits(mode: int, bits: int) -> int:
+    """
+    计算指定位数最多可容纳的字符数
+
+    Args:
+        mode: 编码模式常量
+        bits: 可用于数据的位数
+
+    Returns:
+        int: 字符数(字节模式下为字节数)
+    """
+    if bits <= 0:
+        return 0
+    if mode == util.MODE_NUMBER:
+        # 每3位数字10位，余下2位数字7位、1位数字4位
+        count = bits // 10 * 3
+        remainder = bits % 10
+        return count + (2 if remainder >= 7 else 1 if remainder >= 4 else 0)
+    if mode == util.MODE_ALPHA_NUM:
+        # 每2个字符11位，余下1个字符6位
+        return bits // 11 * 2 + (1 if bits % 11 >= 6 else 0)
+    return bits // 8
+
+
+def _segment_data_bits(mode: int, length: int) -> int:
+    """
+    计算一个分段的数据位数(不含模式指示符和字符计数指示符)
+
+    Args:
+        mode: 编码模式常量
+        length: 字符数(字节模式下为字节数)
+
+    Returns:
+        int: 数据位数
+    """
+    if mode == util.MODE_NUMBER:
+        return length // 3 * 10 + (0, 4, 7)[length % 3]
+    if mode == util.MODE_ALPHA_NUM:
+        return length // 2 * 11 + length % 2 * 6
+    return length * 8
+
+
+def _build_capacity_table() -> Dict[int, Dict[int, List[int]]]:
+    """
+    生成容量表
+
+    Returns:
+        Dict[int, Dict[int, List[int]]]: 纠错级别常量 -> 编码模式常量 -> 版本1-40的字符容量
+    """
+    table = {}
+    for error_correction in ERROR_CORRECTION.values():
+        table[error_correction] = {}
+        for mode in MODE_NAMES:
+            capacities = []
+            for version in range(MIN_VERSION, MAX_VERSION + 1):
+                count_bits = util.length_in_bits(mode, version)
+                bits = _data_bits(version, error_correction) - MODE_INDICATOR_BITS - count_bits
+                # 字符数同时受字符计数指示符位数限制
+                capacities.append(min(_characters_in_bits(mode, bits), (1 << count_bits) - 1))
+            table[error_correction][mode] = capacities
+    return table
+
+
+# 容量表在导入时生成一次，之后的查询只需二分查找
+CAPACITY_TABLE = _build_capacity_table()
+
+# 纠错级别常量 -> 版本1-40的数据位数
+DATA_BITS_TABLE = {
+    error_correction: [_data_bits(version, error_correction)
+                       for version in range(MIN_VERSION, MAX_VERSION + 1)]
+    for error_correction in ERROR_CORRECTION.values()
+}
+
+
+def _resolve_error_correction(error_correction: Union[str, int]) -> int:
+    """
+    将纠错级别名称转换为常量
+
+    Args:
+        error_correction: 纠错级别名称('L', 'M', 'Q', 'H')或常量
+
+    Returns:
+        int: 纠错级别常量
+
+    Raises:
+        ValueError: 当纠错级别无效时
+    """
+    if error_correction in ERROR_CORRECTION:
+        return ERROR_CORRECTION[error_correction]
+    if error_correction in ERROR_CORRECTION.values():
+        return error_correction
+    raise ValueError(f"无效的纠错级别: {error_correction}，支持{list(ERROR_CORRECTION)}")
+
+
+def detect_mode(data: Union[str, bytes]) -> int:
+    """
+    判断内容整体编码时使用的模式，与qrcode.util.QRData的选择一致
+
+    Args:
+        data: 内容，字符串按UTF-8编码
+
+    Returns:
+        int: 编码模式常量
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return util.optimal_mode(data)
+
+
+def split_segments(data: Union[str, bytes]) -> List[util.QRData]:
+    """
+    按QRCode.add_data的默认规则将内容分段，连续的数字或字母数字字符较多时单独成段
+
+    Args:
+        data: 内容，字符串按UTF-8编码
+
+    Returns:
+        List[util.QRData]: 分段列表，可逐段传给QRCode.add_data
+    """
+    return list(util.optimal_data_chunks(data, minimum=OPTIMIZE_MINIMUM))
+
+
+def symbol_size(version: int, box_size: int = 10, border: int = 4) -> int:
+    """
+    计算QR码图像边长
+
+    Args:
+        version: QR码版本
+        box_size: 每个格子的像素大小
+        border: 边框格子数
+
+    Returns:
+        int: 图像边长(像素)
+    """
+    return (version * 4 + 17 + border * 2) * box_size
+
+
+def minimal_version(data: Union[str, bytes], error_correction: Union[str, int] = 'M',
+                    min_version: int = MIN_VERSION) -> int:
+    """
+    计算内容所需的最小版本
+
+    Args:
+        data: 内容
+        error_correction: 纠错级别名称或常量
+        min_version: 版本下限
+
+    Returns:
+        int: 最小版本，超出版本40容量时返回41
+    """
+    return plan(data, error_correction, min_version)['version'] or MAX_VERSION + 1
+
+
+def plan(data: Union[str, bytes, Sequence[util.QRData]], error_correction: Union[str, int] = 'M',
+         min_version: int = MIN_VERSION, box_size: int = 10, border: int = 4) -> Dict[str, Any]:
+    """
+    按分段累加位数并查表规划内容所需的版本和容量，不进行试编码
+
+    内容按split_segments分段，与以默认参数add_data添加数据时的编码结果一致；
+    已分段的内容直接使用，生成时应将同一组分段传给add_data。
+
+    Args:
+        data: 内容(字符串按UTF-8编码)或split_segments的分段列表
+        error_correction: 纠错级别名称('L', 'M', 'Q', 'H')或常量
+        min_version: 版本下限(1-40)，内容较短时仍使用该版本
+        box_size: 每个格子的像素大小
+        border: 边框格子数
+
+    Returns:
+        Dict[str, Any]: 包含fits(是否能放入版本40以内)、version(选定版本，放不下时为None)、
+            mode(编码模式名称，多个模式分段时为'mixed')、segments(各分段的(模式名称, 长度))、
+            length(字节数)、bits(所需位数)、capacity_bits(选定版本的数据位数)、
+            capacity和remaining(末尾分段继续追加时的容量和剩余字符数，字节模式下为字节数)、
+            modules(每边模块数)和pixel_size(图像边长)；
+            放不下时按版本40计算容量，remaining为负数，modules和pixel_size为None
+
+    Raises:
+        ValueError: 当纠错级别或版本下限无效时
+    """
+    level = _resolve_error_correction(error_correction)
+    if not MIN_VERSION <= min_version <= MAX_VERSION:
+        raise ValueError(f"无效的尺寸: {min_version}，支持{MIN_VERSION}-{MAX_VERSION}")
+
+    segments = split_segments(data) if isinstance(data, (str, bytes)) else list(data)
+    data_bits = [_segment_data_bits(segment.mode, len(segment)) for segment in segments]
+    data_bits_table = DATA_BITS_TABLE[level]
+
+    # 字符计数指示符的位数只在三个版本区间之间变化，每个区间求和一次并二分查找
+    version = None
+    for first, last in LENGTH_BITS_RANGES:
+        if last < min_version:
+            continue
+        bits = sum(MODE_INDICATOR_BITS + util.length_in_bits(segment.mode, first) + segment_bits
+                   for segment, segment_bits in zip(segments, data_bits))
+        index = bisect_left(data_bits_table, bits, lo=max(first, min_version) - 1, hi=last)
+        if index < last:
+            version = index + 1
+            break
+
+    planned_version = version or MAX_VERSION
+    capacity_bits = data_bits_table[planned_version - 1]
+    length = sum(len(segment) for segment in segments)
+    # 剩余容量按末尾分段继续追加计算：其余分段的位数固定，末尾分段最多容纳的字符数由剩余位数决定
+    tail_mode = segments[-1].mode if segments else util.MODE_8BIT_BYTE
+    tail_length = len(segments[-1]) if segments else 0
+    count_bits = util.length_in_bits(tail_mode, planned_version)
+    fixed_bits = sum(MODE_INDICATOR_BITS + util.length_in_bits(segment.mode, planned_version) + segment_bits
+                     for segment, segment_bits in zip(segments[:-1], data_bits[:-1]))
+    tail_capacity = min(_characters_in_bits(tail_mode, capacity_bits - fixed_bits - MODE_INDICATOR_BITS - count_bits),
+                        (1 << count_bits) - 1)
+    capacity = length - tail_length + tail_capacity
+    used_bits = fixed_bits + (MODE_INDICATOR_BITS + count_bits + data_bits[-1] if segments else 0)
+
+    modes = {segment.mode for segment in segments} or {tail_mode}
+    return {
+        'fits': version is not None,
+        'version': version,
+        'mode': MODE_NAMES[modes.pop()] if len(modes) == 1 else 'mixed',
+        'segments': [(MODE_NAMES[segment.mode], len(segment)) for segment in segments],
+        'length': length,
+        'bits': used_bits,
+        'capacity_bits': capacity_bits,
+        'capacity': capacity,
+        'remaining': capacity - length,
+        'modules': version * 4 + 17 if version else None,
+        'pixel_size': symbol_size(version, box_size, border) if version else None
+    }
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行模块
+提供批量生成、批量解码、监视目录、合并分片、解码评测等无界面操作
+"""
+
+import sys
+import argparse
+import json
+import signal
+from contextlib import nullcontext
+from typing import List, Optional
+
+from .batch import BatchGenerator, BatchDecoder, find_image_files, load_jobs_csv, write_decode_csv
+from .manifest import JobManifest
+from .archive_writer import ARCHIVE_FORMATS, ArchiveWriter, detect_archive_format
+from .sharding import Shard, merge_manifests, merged_decode_results, parse_shard, relative_key, \
+    select_shard, shard_file_name
+from .utils import handle_error
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """
+    构建命令行参数解析器
+
+    Returns:
+        argparse.ArgumentParser: 参数解析器
+    """
+    parser = argparse.ArgumentParser(prog="main.py", description="QR码生成器命令行工具")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # 批量生成
+    generate_parser = subparsers.add_parser("generate", help="从CSV任务文件批量生成QR码")
+    generate_parser.add_argument("jobs", help="CSV任务文件，需包含content列，可选key和content_type列")
+    generate_parser.add_argument("-o", "--output", required=True,
+                                 help="输出目录，或.zip/.tar/.tar.gz归档路径，'-'表示将归档写到标准输出")
+    generate_parser.add_argument("--archive-format", choices=list(ARCHIVE_FORMATS),
+                                 help="归档格式，默认根据输出路径的扩展名判断")
+    _add_render_arguments(generate_parser)
+    generate_parser.add_argument("--workers", type=int, default=None, help="工作进程数(默认CPU核心数)")
+    generate_parser.add_argument("--verify-rate", type=float, default=0.0,
+                                 help="生成后解码校验的抽样比例0-1(默认0)")
+    generate_parser.add_argument("--verify-quality", type=int, default=None,
+                                 help="校验前模拟保存为该质量的JPEG")
+    generate_parser.add_argument("--report", help="将生成报告写入JSON文件")
+    generate_parser.add_argument("--manifest", help="任务清单文件，重新运行时跳过已完成的项")
+    _add_shard_argument(generate_parser)
+
+    # 批量解码
+    decode_parser = subparsers.add_parser("decode", help="批量解码目录中的图片")
+    decode_parser.add_argument("directory", help="图片目录(包含子目录)")
+    decode_parser.add_argument("-o", "--output", required=True, help="解码结果CSV文件")
+    decode_parser.add_argument("--backend", default="pyzbar", help="解码后端(默认pyzbar)")
+    decode_parser.add_argument("--workers", type=int, default=None, help="工作进程数(默认CPU核心数)")
+    decode_parser.add_argument("--manifest", help="任务清单文件，重新运行时跳过已解码且未变化的图片")
+    _add_shard_argument(decode_parser)
+
+    # 合并分片
+    merge_parser = subparsers.add_parser("merge", help="合并各分片的任务清单并检查是否完整覆盖")
+    merge_parser.add_argument("manifest", help="运行分片任务时指定的--manifest路径")
+    merge_parser.add_argument("--shards", type=int, required=True, help="分片总数")
+    merge_input = merge_parser.add_mutually_exclusive_group()
+    merge_input.add_argument("--jobs", help="CSV任务文件，检查每个任务都已完成")
+    merge_input.add_argument("--images", help="图片目录，检查每张图片都已解码")
+    merge_parser.add_argument("-o", "--output", help="合并后的任务清单文件")
+    merge_parser.add_argument("--csv", help="将合并后的解码结果写入CSV文件(仅批量解码的清单)")
+
+    # 合成测试集
+    corpus_parser = subparsers.add_parser("corpus", help="生成带标注的合成失真测试集")
+    corpus_parser.add_argument("output", help="测试集输出目录")
+    corpus_parser.add_argument("--count", type=int, default=20, help="每个失真分组的样本数(默认20)")
+    corpus_parser.add_argument("--seed", type=int, default=0, help="随机种子(默认0)")
+    corpus_parser.add_argument("--distortions", help="逗号分隔的失真类型，默认全部")
+    corpus_parser.add_argument("--error-correction", default="M", choices=["L", "M", "Q", "H"],
+                               help="纠错级别(默认M)")
+    corpus_parser.add_argument("--workers", type=int, default=None, help="工作进程数(默认CPU核心数)")
+
+    # 解码评测
+    benchmark_parser = subparsers.add_parser("benchmark", help="解码测试集并按失真分组统计成功率和耗时")
+    benchmark_parser.add_argument("corpus", help="测试集目录")
+    benchmark_parser.add_argument("--backend", default="pyzbar", help="解码后端(默认pyzbar)")
+    benchmark_parser.add_argument("--workers", type=int, default=0,
+                                  help="工作进程数(默认0，在当前进程中逐张解码)")
+    benchmark_parser.add_argument("--report", help="将评测报告写入JSON文件")
+    benchmark_parser.add_argument("--baseline", help="基准评测报告JSON，输出与其相比的变化")
+
+    # 监视目录
+    watch_parser = subparsers.add_parser("watch", help="持续监视目录，自动处理新的任务文件和图片")
+    watch_parser.add_argument("--jobs", help="CSV任务文件目录，新文件批量生成QR码")
+    watch_parser.add_argument("--images", help="图片目录，新图片自动解码")
+    watch_parser.add_argument("-o", "--output", required=True,
+                              help="输出目录，结果写入jobs、decoded子目录，错误写入errors子目录")
+    _add_render_arguments(watch_parser)
+    watch_parser.add_argument("--backend", default="pyzbar", help="解码后端(默认pyzbar)")
+    watch_parser.add_argument("--workers", type=int, default=None, help="工作进程数(默认CPU核心数)")
+    watch_parser.add_argument("--poll-interval", type=float, default=1.0, help="轮询间隔秒数(默认1)")
+    watch_parser.add_argument("--no-inotify", action="store_true", help="不使用inotify，始终轮询")
+
+    return parser
+
+
+def _add_shard_argument(parser: argparse.ArgumentParser) -> None:
+    """
+    添加分片选项
+
+    Args:
+        parser: 子命令参数解析器
+    """
+    parser.add_argument("--shard", type=_shard_type, metavar="I/N",
+                        help="只处理N个分片中的第I个(按key的稳定哈希划分)，"
+                             "清单、报告和结果文件名自动加上分片标记")
+
+
+def _shard_type(spec: str) -> Shard:
+    """
+    解析--shard参数
+
+    Args:
+        spec: 形如'2/8'的字符串
+
+    Returns:
+        Shard: (分片序号, 分片总数)
+
+    Raises:
+        argparse.ArgumentTypeError: 当格式或取值无效时
+    """
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def _shard_path(path: Optional[str], shard: Optional[Shard]) -> Optional[str]:
+    """
+    为分片运行的输出文件加上分片标记，不分片或输出到标准输出时原样返回
+
+    Args:
+        path: 文件路径
+        shard: 分片
+
+    Returns:
+        Optional[str]: 文件路径
+    """
+    if not path or path == "-" or shard is None:
+        return path
+    return shard_file_name(path, shard)
+
+
+def _add_render_arguments(parser: argparse.ArgumentParser) -> None:
+    """
+    添加QR码渲染选项
+
+    Args:
+        parser: 子命令参数解析器
+    """
+    parser.add_argument("--format", default="PNG", help="输出图像格式(默认PNG)")
+    parser.add_argument("--quality", type=int, default=90, help="JPG图像质量(默认90)")
+    parser.add_argument("--size", type=int, default=10, help="QR码版本1-40(默认10)")
+    parser.add_argument("--error-correction", default="M", choices=["L", "M", "Q", "H"],
+                        help="纠错级别(默认M)")
+    parser.add_argument("--box-size", type=int, default=10, help="格子大小(默认10)")
+    parser.add_argument("--border", type=int, default=4, help="边框大小(默认4)")
+    parser.add_argument("--fill-color", help="前景色，如navy或#1a237e(默认黑色)")
+    parser.add_argument("--back-color", help="背景色(默认白色)")
+    parser.add_argument("--module-shape", choices=["square", "rounded", "dot"], help="模块形状(默认方块)")
+    parser.add_argument("--logo", help="居中logo图片，必要时自动提高纠错级别")
+    parser.add_argument("--logo-ratio", type=float, help="logo边长占符号边长的比例(默认0.2)")
+
+
+def _style_options(args: argparse.Namespace) -> dict:
+    """
+    从命令行参数中提取样式选项
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        dict: 样式选项，未指定的选项为None
+    """
+    return {
+        'fill_color': args.fill_color,
+        'back_color': args.back_color,
+        'module_shape': args.module_shape,
+        'logo': args.logo,
+        'logo_ratio': args.logo_ratio
+    }
+
+
+def _run_generate(args: argparse.Namespace) -> int:
+    """
+    执行批量生成命令
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        int: 退出码
+    """
+    batch = BatchGenerator(
+        workers=args.workers,
+        size=args.size,
+        error_correction=args.error_correction,
+        box_size=args.box_size,
+        border=args.border,
+        image_format=args.format,
+        quality=args.quality,
+        style=_style_options(args)
+    )
+    archive_format = args.archive_format or detect_archive_format(args.output)
+    if args.output == "-" and not archive_format:
+        raise ValueError("输出到标准输出时需指定--archive-format")
+
+    items = select_shard(load_jobs_csv(args.jobs), args.shard, lambda item: item['key'])
+    if archive_format:
+        if args.manifest:
+            raise ValueError("归档输出不支持--manifest")
+        with ArchiveWriter(_shard_path(args.output, args.shard), archive_format) as archive:
+            report = batch.generate_archive(items, archive,
+                                            verify_rate=args.verify_rate,
+                                            verify_quality=args.verify_quality)
+    else:
+        # 各分片的图片文件名互不重叠，且只清理自己的临时文件，可以写入同一个输出目录
+        with _open_manifest(_shard_path(args.manifest, args.shard)) as manifest:
+            report = batch.generate(items, args.output,
+                                    verify_rate=args.verify_rate, verify_quality=args.verify_quality,
+                                    manifest=manifest)
+
+    # 归档写到标准输出时，摘要输出到标准错误
+    summary_stream = sys.stderr if args.output == "-" else sys.stdout
+    print(f"生成 {report['generated']}/{report['total']} 个QR码，跳过已完成 {report['skipped']} 个，"
+          f"校验 {report['verified']} 个，不一致 {len(report['mismatches'])} 个，"
+          f"校验出错 {len(report['verify_errors'])} 个，"
+          f"失败 {len(report['errors'])} 个，耗时 {report['elapsed']:.2f} 秒", file=summary_stream)
+
+    if args.report:
+        with open(_shard_path(args.report, args.shard), 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return 0 if not any(report[field] for field in ('errors', 'mismatches', 'verify_errors')) else 1
+
+
+def _run_decode(args: argparse.Namespace) -> int:
+    """
+    执行批量解码命令
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        int: 退出码
+    """
+    # 以相对输入目录的路径作为分片和清单的key，各节点的目录可以挂载在不同路径
+    paths = list(select_shard(find_image_files(args.directory), args.shard,
+                              lambda path: relative_key(path, args.directory)))
+    with _open_manifest(_shard_path(args.manifest, args.shard)) as manifest:
+        report = BatchDecoder(workers=args.workers, backend=args.backend).decode(
+            paths, manifest, root=args.directory)
+    write_decode_csv(report['results'], _shard_path(args.output, args.shard))
+
+    print(f"解码 {report['total']} 张图片，识别 {report['decoded']} 张，未识别 {report['empty']} 张，"
+          f"失败 {report['errors']} 张，跳过已完成 {report['skipped']} 张，"
+          f"耗时 {report['elapsed']:.2f} 秒")
+
+    return 0 if not report['errors'] else 1
+
+
+def _run_merge(args: argparse.Namespace) -> int:
+    """
+    执行合并分片命令
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        int: 退出码，未完整覆盖时为1
+    """
+    expected = None
+    if args.jobs:
+        expected = [item['key'] for item in load_jobs_csv(args.jobs)]
+    elif args.images:
+        expected = [relative_key(path, args.images) for path in find_image_files(args.images)]
+
+    report = merge_manifests(args.manifest, args.shards, expected, args.output)
+    if args.csv:
+        write_decode_csv(merged_decode_results(report, expected), args.csv)
+
+    print(f"合并 {args.shards} 个分片，共 {report['keys']} 项，各分片 {report['per_shard']}")
+    problems = [
+        ('missing_shards', "缺失的分片清单"),
+        ('missing', "未完成的项"),
+        ('unexpected', "不在任务中的项"),
+        ('misplaced', "不属于所在分片的项"),
+        ('duplicates', "重复的项")
+    ]
+    for field, label in problems:
+        if report[field]:
+            shown = ', '.join(report[field][:5])
+            more = f" 等{len(report[field])}个" if len(report[field]) > 5 else ""
+            print(f"{label}: {shown}{more}")
+    if expected is None:
+        print("未指定--jobs或--images，只检查了分片之间的一致性")
+    print("覆盖完整" if report['complete'] else "覆盖不完整")
+
+    return 0 if report['complete'] else 1
+
+
+def _run_corpus(args: argparse.Namespace) -> int:
+    """
+    执行生成测试集命令
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        int: 退出码
+    """
+    from .corpus import build_corpus
+
+    distortions = [name.strip() for name in args.distortions.split(",")] if args.distortions else None
+    report = build_corpus(args.output, count=args.count, seed=args.seed, distortions=distortions,
+                          error_correction=args.error_correction, workers=args.workers)
+    print(f"生成 {report['total']} 张测试图片，{len(report['buckets'])} 个分组，"
+          f"标注写入 {report['labels']}，耗时 {report['elapsed']:.2f} 秒")
+    return 0
+
+
+def _run_benchmark(args: argparse.Namespace) -> int:
+    """
+    执行解码评测命令
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        int: 退出码
+    """
+    from .corpus import benchmark_corpus, compare_reports
+
+    report = benchmark_corpus(args.corpus, backend=args.backend, workers=args.workers)
+    deltas = {}
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            deltas = compare_reports(json.load(f), report)
+
+    # 中文字符显示宽度为2，表头按显示宽度对齐
+    print(f"{'分组':<18}{'样本':>4}{'成功率':>6}{'P50(ms)':>10}{'P95(ms)':>10}")
+    for name, bucket in report['buckets'].items():
+        line = (f"{name:<20}{bucket['count']:>6}{bucket['success_rate']:>9.1%}"
+                f"{bucket['latency_ms']['p50']:>10.1f}{bucket['latency_ms']['p95']:>10.1f}")
+        if name in deltas:
+            line += f"  ({deltas[name]['success_rate']:+.1%}, {deltas[name]['p50_ms']:+.1f}ms)"
+        print(line)
+    print(f"后端 {report['backend']}：识别 {report['decoded']}/{report['total']} 张，"
+          f"成功率 {report['success_rate']:.1%}，耗时 {report['elapsed']:.2f} 秒")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    return 0
+
+
+def _open_manifest(file_path: Optional[str]):
+    """
+    按需打开任务清单
+
+    Args:
+        file_path: 清单文件路径，None表示不使用清单
+
+    Returns:
+        上下文管理器，进入时返回JobManifest或None
+    """
+    return JobManifest(file_path) if file_path else nullcontext()
+
+
+def _run_watch(args: argparse.Namespace) -> int:
+    """
+    执行监视目录命令，收到SIGINT或SIGTERM后处理完已提交的文件再退出
+
+    Args:
+        args: 命令行参数
+
+    Returns:
+        int: 退出码
+    """
+    from .watcher import FolderWatcher
+
+    watcher = FolderWatcher(
+        args.output,
+        jobs_dir=args.jobs,
+        images_dir=args.images,
+        workers=args.workers,
+        poll_interval=args.poll_interval,
+        use_inotify=False if args.no_inotify else None,
+        backend=args.backend,
+        generator_options={
+            'size': args.size,
+            'error_correction': args.error_correction,
+            'box_size': args.box_size,
+            'border': args.border,
+            'image_format': args.format,
+            'quality': args.quality,
+            'style': _style_options(args)
+        }
+    )
+
+    def _stop(signum, frame):
+        print("正在停止，等待处理中的文件完成...")
+        watcher.stop()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    print("开始监视目录，按Ctrl+C停止")
+    stats = watcher.run()
+    print(f"已停止：处理任务文件 {stats['jobs']} 个，图片 {stats['images']} 张，"
+          f"错误 {stats['errors']} 个")
+    return 0
+
+
+def run_cli(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+
+    Args:
+        argv: 命令行参数列表，默认使用sys.argv
+
+    Returns:
+        int: 退出码
+    """
+    args = _build_parser().parse_args(argv)
+
+    try:
+        if args.command == "generate":
+            return _run_generate(args)
+        if args.command == "decode":
+            return _run_decode(args)
+        if args.command == "watch":
+            return _run_watch(args)
+        if args.command == "merge":
+            return _run_merge(args)
+        if args.command == "corpus":
+            return _run_corpus(args)
+        if args.command == "benchmark":
+            return _run_benchmark(args)
+    except Exception as e:
+        handle_error(e, f"执行命令 {args.command}")
+        print(f"命令执行失败: {e}")
+        return 1
+
+    return 0
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成测试集模块
+用QRCodeGenerator生成QR码并施加带种子的失真(旋转、透视、模糊、噪声、JPEG压缩、
+低对比度、缩小)，写出带标注的清单，按失真分组统计解码成功率和耗时
+"""
+
+import os
+import json
+import time
+from io import BytesIO
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from .qrcode_generator import QRCodeGenerator
+from .batch import BatchDecoder, _run_tasks
+from .manifest import write_file_atomic
+
+
+# 标注清单文件名
+LABELS_NAME = 'labels.jsonl'
+
+# 失真程度
+LEVELS = ('low', 'medium', 'high')
+
+# 各失真在每个程度下的参数取值范围，样本在范围内均匀抽取
+DISTORTIONS = {
+    # 旋转角度(度)，方向随机
+    'rotation': {'low': (1.0, 5.0), 'medium': (5.0, 20.0), 'high': (20.0, 45.0)},
+    # 四个角点的随机位移(占图像边长的比例)
+    'perspective': {'low': (0.02, 0.05), 'medium': (0.05, 0.10), 'high': (0.10, 0.18)},
+    # 高斯模糊半径(模块数)
+    'blur': {'low': (0.15, 0.3), 'medium': (0.3, 0.45), 'high': (0.45, 0.7)},
+    # 高斯噪声标准差(灰度级)
+    'noise': {'low': (5.0, 15.0), 'medium': (15.0, 35.0), 'high': (35.0, 60.0)},
+    # JPEG质量
+    'jpeg': {'low': (60.0, 80.0), 'medium': (25.0, 60.0), 'high': (5.0, 25.0)},
+    # 对比度系数，同时随机调整亮度
+    'contrast': {'low': (0.5, 0.8), 'medium': (0.25, 0.5), 'high': (0.1, 0.25)},
+    # 缩小后每个模块的像素数
+    'scale': {'low': (3.0, 4.0), 'medium': (2.0, 3.0), 'high': (1.5, 2.0)}
+}
+
+# 未施加失真的对照组
+CLEAN_BUCKET = 'clean'
+
+# 生成时每个模块的像素数和边框模块数
+BASE_BOX_SIZE = 6
+BASE_BORDER = 4
+
+# 四周额外留白占边长的比例，避免旋转和透视后QR码被裁切
+CANVAS_MARGIN = 0.2
+
+# 内容字符集
+_ALPHANUMERIC = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+_TEXT = 'abcdefghijklmnopqrstuvwxyz0123456789 ,.-_二维码测试样本'
+
+
+def bucket_name(distortion: str, level: Optional[str]) -> str:
+    """
+    获取失真分组名称
+
+    Args:
+        distortion: 失真类型
+        level: 失真程度，对照组为None
+
+    Returns:
+        str: 分组名称，如'blur/medium'
+    """
+    return distortion if level is None else f"{distortion}/{level}"
+
+
+def _random_content(rng: np.random.Generator) -> str:
+    """
+    随机生成内容，覆盖数字、字母数字、URL和UTF-8文本
+
+    Args:
+        rng: 随机数生成器
+
+    Returns:
+        str: 内容
+    """
+    kind = rng.integers(4)
+    length = int(rng.integers(8, 120))
+    if kind == 0:
+        return ''.join(rng.choice(list('0123456789'), length))
+    if kind == 1:
+        return ''.join(rng.choice(list(_ALPHANUMERIC), length))
+    if kind == 2:
+        path = ''.join(rng.choice(list('abcdefghijklmnopqrstuvwxyz0123456789'), length))
+        return f"https://example.com/{path}"
+    return ''.join(rng.choice(list(_TEXT), length))
+
+
+def _perspective_coefficients(target: List[Tuple[float, float]],
+                              source: List[Tuple[float, float]]) -> List[float]:
+    """
+    计算将输出图像坐标映射到输入图像坐标的透视变换系数
+
+    Args:
+        target: 输出图像中的四个角点
+        source: 对应的输入图像角点
+
+    Returns:
+        List[float]: Image.transform所需的8个系数
+    """
+    matrix = []
+    for (x, y), (u, v) in zip(target, source):
+        matrix.append([x, y, 1, 0, 0, 0, -u * x, -u * y])
+        matrix.append([0, 0, 0, x, y, 1, -v * x, -v * y])
+    vector = [coordinate for point in source for coordinate in point]
+    return np.linalg.solve(np.array(matrix, dtype=float), np.array(vector, dtype=float)).tolist()
+
+
+def apply_distortion(img: Image.Image, distortion: str, value: float,
+                     rng: np.random.Generator, box_size: int) -> Tuple[Image.Image, Dict[str, Any]]:
+    """
+    对灰度图像施加一种失真
+
+    Args:
+        img: 灰度QR码图像(已留白)
+        distortion: 失真类型
+        value: 从参数范围中抽取的失真强度
+        rng: 随机数生成器，用于方向、角点等附加随机量
+        box_size: 当前每个模块的像素数
+
+    Returns:
+        Tuple[Image.Image, Dict[str, Any]]: (失真后的图像, 实际使用的参数)；
+            jpeg失真返回的图像尚未压缩，由调用方按quality参数保存
+
+    Raises:
+        ValueError: 当失真类型无效时
+    """
+    if distortion == 'rotation':
+        angle = value if rng.random() < 0.5 else -value
+        img = img.rotate(angle, resample=Image.Resampling.BICUBIC, expand=True, fillcolor=255)
+        return img, {'angle': round(angle, 3)}
+
+    if distortion == 'perspective':
+        width, height = img.size
+        corners = [(0, 0), (width, 0), (width, height), (0, height)]
+        offsets = rng.uniform(-value, value, size=(4, 2)) * (width, height)
+        source = [(x + dx, y + dy) for (x, y), (dx, dy) in zip(corners, offsets)]
+        coefficients = _perspective_coefficients(corners, source)
+        img = img.transform(img.size, Image.Transform.PERSPECTIVE, coefficients,
+                            Image.Resampling.BICUBIC, fillcolor=255)
+        return img, {'offset': round(value, 4)}
+
+    if distortion == 'blur':
+        radius = value * box_size
+        return img.filter(ImageFilter.GaussianBlur(radius)), {'radius_px': round(radius, 3)}
+
+    if distortion == 'noise':
+        pixels = np.asarray(img, dtype=np.float32) + rng.normal(0.0, value, size=(img.height, img.width))
+        return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'L'), {'sigma': round(value, 3)}
+
+    if distortion == 'jpeg':
+        return img, {'quality': int(round(value))}
+
+    if distortion == 'contrast':
+        # 压缩灰度范围并随机偏移亮度，保持在0-255内
+        span = 255 * value
+        low = rng.uniform(0, 255 - span)
+        pixels = np.asarray(img, dtype=np.float32) / 255 * span + low
+        img = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8), 'L')
+        return img, {'contrast': round(value, 4), 'black_level': int(low)}
+
+    if distortion == 'scale':
+        factor = value / box_size
+        size = (max(1, round(img.width * factor)), max(1, round(img.height * factor)))
+        return img.resize(size, Image.Resampling.BILINEAR, reducing_gap=2.0), \
+            {'module_px': round(value, 3)}
+
+    raise ValueError(f"无效的失真类型: {distortion}，支持{list(DISTORTIONS)}")
+
+
+def _build_item(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    生成单个样本并写出图片
+
+    在工作进程中执行，随机数由(种子, 样本序号)确定，结果与执行顺序和进程数无关。
+
+    Args:
+        task: 任务，包含index、seed、distortion、level、output_dir和error_correction字段
+
+    Returns:
+        Dict[str, Any]: 样本标注
+    """
+    rng = np.random.default_rng([task['seed'], task['index']])
+    distortion, level = task['distortion'], task['level']
+
+    content = _random_content(rng)
+    generator = QRCodeGenerator()
+    img = generator.generate_qr_code(content, size=1, error_correction=task['error_correction'],
+                                     box_size=BASE_BOX_SIZE, border=BASE_BORDER).convert('L')
+    version = (img.width // BASE_BOX_SIZE - BASE_BORDER * 2 - 17) // 4
+
+    margin = int(img.width * CANVAS_MARGIN)
+    canvas = Image.new('L', (img.width + margin * 2, img.height + margin * 2), 255)
+    canvas.paste(img, (margin, margin))
+
+    params = {}
+    extension = 'png'
+    if level is not None:
+        value = float(rng.uniform(*DISTORTIONS[distortion][level]))
+        canvas, params = apply_distortion(canvas, distortion, value, rng, BASE_BOX_SIZE)
+        if distortion == 'jpeg':
+            extension = 'jpg'
+
+    name = f"{bucket_name(distortion, level).replace('/', '-')}-{task['index']:05d}.{extension}"
+    buffer = BytesIO()
+    if extension == 'jpg':
+        canvas.save(buffer, format='JPEG', quality=params['quality'])
+    else:
+        canvas.save(buffer, format='PNG')
+    write_file_atomic(os.path.join(task['output_dir'], name), buffer.getvalue())
+
+    return {
+        'name': name,
+        'bucket': bucket_name(distortion, level),
+        'distortion': distortion,
+        'level': level,
+        'params': params,
+        'content': content,
+        'version': version,
+        'error_correction': task['error_correction'],
+        'module_px': params.get('module_px', BASE_BOX_SIZE)
+    }
+
+
+def build_corpus(output_dir: str, count: int = 20, seed: int = 0,
+                 distortions: Optional[Iterable[str]] = None, error_correction: str = 'M',
+                 workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    生成合成失真测试集
+
+    每个失真类型的每个程度以及对照组各生成count张图片，相同参数和种子生成相同的测试集。
+
+    Args:
+        output_dir: 输出目录，图片和labels.jsonl写入该目录
+        count: 每个分组的样本数
+        seed: 随机种子
+        distortions: 失真类型列表，默认全部
+        error_correction: 纠错级别
+        workers: 工作进程数，默认使用CPU核心数，0表示在当前进程中生成
+
+    Returns:
+        Dict[str, Any]: 生成报告，包含total、buckets(各分组样本数)、labels(标注文件路径)和elapsed
+
+    Raises:
+        ValueError: 当失真类型或样本数无效时
+    """
+    distortions = list(DISTORTIONS) if distortions is None else list(distortions)
+    for distortion in distortions:
+        if distortion not in DISTORTIONS:
+            raise ValueError(f"无效的失真类型: {distortion}，支持{list(DISTORTIONS)}")
+    if count < 1:
+        raise ValueError(f"无效的样本数: {count}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+
+    buckets = [(CLEAN_BUCKET, None)] + [(distortion, level) for distortion in distortions
+                                        for level in LEVELS]
+    tasks = ({
+        'index': index,
+        'seed': seed,
+        'distortion': distortion,
+        'level': level,
+        'output_dir': output_dir,
+        'error_correction': error_correction
+    } for index, (distortion, level) in enumerate(
+        bucket for bucket in buckets for _ in range(count)))
+
+    workers = os.cpu_count() if workers is None else workers
+    lines = []
+    counts: Dict[str, int] = {}
+    for label in _run_tasks(_build_item, tasks, workers):
+        label['seed'] = seed
+        lines.append(json.dumps(label, ensure_ascii=False))
+        counts[label['bucket']] = counts.get(label['bucket'], 0) + 1
+
+    labels_path = os.path.join(output_dir, LABELS_NAME)
+    write_file_atomic(labels_path, ('\n'.join(lines) + '\n').encode('utf-8'))
+
+    return {
+        'total': len(lines),
+        'buckets': counts,
+        'labels': labels_path,
+        'elapsed': time.perf_counter() - start
+    }
+
+
+def load_labels(corpus_dir: str) -> List[Dict[str, Any]]:
+    """
+    读取测试集标注
+
+    Args:
+        corpus_dir: 测试集目录
+
+    Returns:
+        List[Dict[str, Any]]: 样本标注列表
+
+    Raises:
+        ValueError: 当标注文件不存在时
+    """
+    labels_path = os.path.join(corpus_dir, LABELS_NAME)
+    if not os.path.exists(labels_path):
+        raise ValueError(f"标注文件不存在: {labels_path}")
+    with open(labels_path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """
+    计算已排序数据的百分位数(最近秩法)
+
+    Args:
+        values: 已排序的数据
+        percent: 百分位(0-100)
+
+    Returns:
+        float: 百分位数，无数据时为0
+    """
+    if not values:
+        return 0.0
+    rank = max(1, int(np.ceil(percent / 100 * len(values))))
+    return values[rank - 1]
+
+
+def benchmark_corpus(corpus_dir: str, backend: str = 'pyzbar', workers: int = 0) -> Dict[str, Any]:
+    """
+    解码测试集并按失真分组统计成功率和耗时
+
+    解码结果中包含标注内容才算成功；识别出其他内容计为wrong，未识别计为missed。
+    默认在当前进程中逐张解码，使耗时不受进程调度影响。
+
+    Args:
+        corpus_dir: 测试集目录
+        backend: 解码后端名称
+        workers: 工作进程数，0表示在当前进程中解码
+
+    Returns:
+        Dict[str, Any]: 评测报告，包含backend、total、decoded、success_rate、elapsed和buckets；
+            buckets中每个分组包含count、decoded、wrong、missed、errors、success_rate
+            以及耗时统计latency_ms(mean、p50、p95、max)
+
+    Raises:
+        ValueError: 当标注文件不存在或解码后端无效时
+    """
+    labels = load_labels(corpus_dir)
+    paths = [os.path.join(corpus_dir, label['name']) for label in labels]
+    start = time.perf_counter()
+
+    stats: Dict[str, Dict[str, Any]] = {}
+    latencies: Dict[str, List[float]] = {}
+    decoder = BatchDecoder(workers=workers, backend=backend)
+    for label, result in zip(labels, decoder.iter_decode(paths)):
+        bucket = stats.setdefault(label['bucket'], {'count': 0, 'decoded': 0, 'wrong': 0,
+                                                    'missed': 0, 'errors': 0})
+        bucket['count'] += 1
+        latencies.setdefault(label['bucket'], []).append(result['elapsed'] * 1000)
+        decoded = [r['data'] for r in result['results']]
+        if result['error']:
+            bucket['errors'] += 1
+        elif label['content'] in decoded:
+            bucket['decoded'] += 1
+        elif decoded:
+            bucket['wrong'] += 1
+        else:
+            bucket['missed'] += 1
+
+    for name, bucket in stats.items():
+        values = sorted(latencies[name])
+        bucket['success_rate'] = bucket['decoded'] / bucket['count']
+        bucket['latency_ms'] = {
+            'mean': sum(values) / len(values),
+            'p50': _percentile(values, 50),
+            'p95': _percentile(values, 95),
+            'max': values[-1]
+        }
+
+    decoded = sum(bucket['decoded'] for bucket in stats.values())
+    return {
+        'backend': backend,
+        'total': len(labels),
+        'decoded': decoded,
+        'success_rate': decoded / len(labels) if labels else 0.0,
+        'elapsed': time.perf_counter() - start,
+        'buckets': stats
+    }
+
+
+def compare_reports(baseline: Dict[str, Any], report: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """
+    对比两次评测报告，用于跟踪不同版本之间的变化
+
+    Args:
+        baseline: 基准评测报告
+        report: 本次评测报告
+
+    Returns:
+        Dict[str, Dict[str, float]]: 两次都有的分组 -> success_rate(成功率变化)和p50_ms(中位耗时变化)
+    """
+    deltas = {}
+    for name, bucket in report['buckets'].items():
+        previous = baseline['buckets'].get(name)
+        if previous is None:
+            continue
+        deltas[name] = {
+            'success_rate': bucket['success_rate'] - previous['success_rate'],
+            'p50_ms': bucket['latency_ms']['p50'] - previous['latency_ms']['p50']
+        }
+    return deltas
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解码结果缓存模块
+按文件(大小, 修改时间)和内容哈希缓存解码结果，可选使用SQLite持久化
+"""
+
+import os
+import copy
+import json
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Dict, Any, Optional, Tuple
+
+
+class DecodeCache:
+    """
+    解码结果缓存类
+    先按(路径, 大小, 修改时间)查找，未命中时按文件内容哈希查找
+    """
+
+    def __init__(self, db_path: Optional[str] = None, max_entries: int = 10000):
+        """
+        初始化解码结果缓存
+
+        Args:
+            db_path: SQLite数据库路径，None表示只使用内存缓存
+            max_entries: 内存中最多缓存的结果数
+        """
+        if max_entries < 1:
+            raise ValueError(f"无效的缓存容量: {max_entries}")
+
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._settings = None
+        self._files = {}
+        self._results = OrderedDict()
+        self._stats = {'stat_hits': 0, 'hash_hits': 0, 'misses': 0, 'invalidations': 0}
+
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.executescript("""
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, digest TEXT
+                );
+                CREATE TABLE IF NOT EXISTS results (
+                    digest TEXT PRIMARY KEY, settings TEXT, data TEXT
+                );
+            """)
+
+    def decode_file(self, file_path: str, settings: str,
+                    decode_bytes: Callable[[bytes], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        获取文件的解码结果，未命中时读取文件并调用decode_bytes解码
+
+        Args:
+            file_path: 图片文件路径
+            settings: 解码器设置指纹，变化时清空已有缓存
+            decode_bytes: 从文件内容解码的函数
+
+        Returns:
+            List[Dict[str, Any]]: 解码结果列表(副本)
+
+        Raises:
+            FileNotFoundError: 当文件不存在时
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        file_key = (stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            self._bind(settings)
+            digest = self._lookup_digest(path, file_key)
+            results = self._lookup_results(digest) if digest else None
+            if results is not None:
+                self._stats['stat_hits'] += 1
+                return copy.deepcopy(results)
+
+        # 文件已变化或首次出现，按内容哈希查找
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            results = self._lookup_results(digest)
+            if results is not None:
+                self._stats['hash_hits'] += 1
+                self._store_file(path, file_key, digest)
+                return copy.deepcopy(results)
+
+        results = decode_bytes(data)
+
+        with self._lock:
+            self._stats['misses'] += 1
+            self._store_file(path, file_key, digest)
+            self._store_results(digest, results)
+
+        return copy.deepcopy(results)
+
+    def clear(self) -> None:
+        """清空内存和持久化缓存"""
+        with self._lock:
+            self._clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            Dict[str, Any]: 命中次数、未命中次数、命中率和缓存条目数
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._results)
+            if self._db is not None:
+                stats['persistent_entries'] = self._db.execute(
+                    "SELECT COUNT(*) FROM results").fetchone()[0]
+
+        lookups = stats['stat_hits'] + stats['hash_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['stat_hits'] + stats['hash_hits']) / lookups if lookups else 0.0
+        return stats
+
+    def close(self) -> None:
+        """关闭持久化数据库连接"""
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _bind(self, settings: str) -> None:
+        """
+        绑定解码器设置，设置变化时使已有缓存失效
+
+        Args:
+            settings: 解码器设置指纹
+        """
+        if settings == self._settings:
+            return
+
+        if self._settings is not None:
+            self._stats['invalidations'] += 1
+        self._settings = settings
+        self._files.clear()
+        self._results.clear()
+
+        if self._db is not None:
+            with self._db:
+                self._db.execute("DELETE FROM results WHERE settings != ?", (settings,))
+
+    def _clear(self) -> None:
+        """内部方法：清空缓存(调用方需持有锁)"""
+        self._files.clear()
+        self._results.clear()
+        if self._db is not None:
+            with self._db:
+                self._db.execute("DELETE FROM files")
+                self._db.execute("DELETE FROM results")
+
+    def _lookup_digest(self, path: str, file_key: Tuple[int, int]) -> Optional[str]:
+        """
+        按路径和(大小, 修改时间)查找内容哈希
+
+        Args:
+            path: 文件绝对路径
+            file_key: (大小, 修改时间)
+
+        Returns:
+            Optional[str]: 内容哈希，文件未记录或已变化时返回None
+        """
+        entry = self._files.get(path)
+        if entry is None and self._db is not None:
+            row = self._db.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?",
+                                   (path,)).fetchone()
+            if row:
+                entry = ((row[0], row[1]), row[2])
+                self._files[path] = entry
+
+        if entry is None or entry[0] != file_key:
+            return None
+        return entry[1]
+
+    def _lookup_results(self, digest: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        按内容哈希查找解码结果
+
+        Args:
+            digest: 内容哈希
+
+        Returns:
+            Optional[List[Dict[str, Any]]]: 解码结果列表，未命中时返回None
+        """
+        results = self._results.get(digest)
+        if results is not None:
+            self._results.move_to_end(digest)
+            return results
+
+        if self._db is not None:
+            row = self._db.execute("SELECT data FROM results WHERE digest = ? AND settings = ?",
+                                   (digest, self._settings)).fetchone()
+            if row:
+                results = json.loads(row[0])
+                self._remember(digest, results)
+        return results
+
+    def _store_file(self, path: str, file_key: Tuple[int, int], digest: str) -> None:
+        """
+        记录文件与内容哈希的对应关系
+
+        Args:
+            path: 文件绝对路径
+            file_key: (大小, 修改时间)
+            digest: 内容哈希
+        """
+        self._files[path] = (file_key, digest)
+        if self._db is not None:
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                                 (path, file_key[0], file_key[1], digest))
+
+    def _store_results(self, digest: str, results: List[Dict[str, Any]]) -> None:
+        """
+        保存解码结果
+
+        Args:
+            digest: 内容哈希
+            results: 解码结果列表
+        """
+        results = copy.deepcopy(results)
+        self._remember(digest, results)
+        if self._db is not None:
+            with self._db:
+                self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                 (digest, self._settings, json.dumps(results, ensure_ascii=False)))
+
+    def _remember(self, digest: str, results: List[Dict[str, Any]]) -> None:
+        """
+        将解码结果放入内存缓存，超出容量时淘汰最久未使用的条目
+
+        Args:
+            digest: 内容哈希
+            results: 解码结果列表
+        """
+        self._results[digest] = results
+        self._results.move_to_end(digest)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
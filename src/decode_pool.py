@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享内存解码池模块
+将灰度帧写入multiprocessing.shared_memory环形缓冲区，只向工作进程传递槽位序号和尺寸，
+避免序列化大尺寸图像
+"""
+
+import os
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+# 默认槽位大小，可容纳4K灰度帧
+DEFAULT_SLOT_SIZE = 16 * 1024 * 1024
+
+# 工作进程中复用的解码器和已连接的共享内存
+_worker_decoder = None
+_worker_segment = None
+
+
+def _attach_segment(name: str) -> shared_memory.SharedMemory:
+    """
+    在工作进程中连接共享内存，连接不转移所有权，由主进程负责释放
+
+    Args:
+        name: 共享内存名称
+
+    Returns:
+        shared_memory.SharedMemory: 共享内存对象
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+
+    # Python 3.13以前连接时也会登记到resource_tracker；工作进程与主进程共用同一个
+    # resource_tracker，登记后再取消会删掉主进程的登记，因此连接时跳过登记
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _init_worker(segment_name: str, backend: str, decompress: bool) -> None:
+    """
+    工作进程初始化：连接共享内存并创建解码器
+
+    Args:
+        segment_name: 共享内存名称
+        backend: 解码后端名称
+        decompress: 是否自动解压压缩负载
+    """
+    global _worker_decoder, _worker_segment
+    from .qrcode_decoder import QRCodeDecoder
+    _worker_segment = _attach_segment(segment_name)
+    _worker_decoder = QRCodeDecoder(backend=backend, decompress=decompress)
+
+
+def _decode_slot(slot_offset: int, shape: Tuple[int, int]) -> List[Dict[str, Any]]:
+    """
+    解码共享内存中某个槽位的灰度帧
+
+    在工作进程中执行，直接在共享内存上构造图像，不复制像素。
+
+    Args:
+        slot_offset: 槽位在共享内存中的字节偏移
+        shape: 帧的(高, 宽)
+
+    Returns:
+        List[Dict[str, Any]]: 解码结果列表
+    """
+    height, width = shape
+    view = _worker_segment.buf[slot_offset:slot_offset + height * width]
+    try:
+        img = Image.frombuffer('L', (width, height), view, 'raw', 'L', 0, 1)
+        results = _worker_decoder.decode_from_image(img)
+        del img
+    finally:
+        view.release()
+    return results
+
+
+class SharedMemoryDecodePool:
+    """
+    共享内存解码池类
+    一块共享内存划分为固定大小的槽位，提交帧时占用一个空闲槽位，解码完成后回收
+    """
+
+    def __init__(self, workers: Optional[int] = None, slots: Optional[int] = None,
+                 slot_size: int = DEFAULT_SLOT_SIZE, backend: str = 'pyzbar',
+                 decompress: bool = True):
+        """
+        初始化解码池
+
+        Args:
+            workers: 工作进程数，默认使用CPU核心数
+            slots: 槽位数，默认为工作进程数的2倍；槽位全部占用时提交会阻塞
+            slot_size: 每个槽位的字节数，决定可提交的最大帧(宽x高)
+            backend: 解码后端名称
+            decompress: 是否自动解压压缩负载
+
+        Raises:
+            ValueError: 当解码后端名称无效时
+            ImportError: 当解码后端依赖未安装时
+        """
+        from .decoder_backends import create_backend
+        create_backend(backend)
+
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = slots or self.workers * 2
+        self.slot_size = slot_size
+
+        self._segment = shared_memory.SharedMemory(create=True, size=self.slots * slot_size)
+        self._free = queue.Queue()
+        for slot in range(self.slots):
+            self._free.put(slot)
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self._segment.name, backend, decompress)
+        )
+
+    def __enter__(self) -> 'SharedMemoryDecodePool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def submit(self, img: Image.Image) -> Future:
+        """
+        提交一帧图像，转为灰度后写入空闲槽位
+
+        Args:
+            img: PIL Image对象
+
+        Returns:
+            Future: 结果为解码结果列表
+
+        Raises:
+            ValueError: 当帧超过槽位大小时
+            RuntimeError: 当解码池已关闭时
+        """
+        if self._closed:
+            raise RuntimeError("解码池已关闭")
+
+        frame = np.asarray(img if img.mode == 'L' else img.convert('L'))
+        height, width = frame.shape
+        if height * width > self.slot_size:
+            raise ValueError(f"帧过大: {width}x{height}，槽位大小为{self.slot_size}字节")
+
+        slot = self._free.get()
+        offset = slot * self.slot_size
+        target = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._segment.buf, offset=offset)
+        target[...] = frame
+        del target
+
+        try:
+            future = self._executor.submit(_decode_slot, offset, (height, width))
+        except Exception:
+            self._free.put(slot)
+            raise
+        # 解码完成(无论成功与否)后回收槽位
+        future.add_done_callback(lambda _: self._free.put(slot))
+        return future
+
+    def decode(self, img: Image.Image) -> List[Dict[str, Any]]:
+        """
+        解码单帧图像
+
+        Args:
+            img: PIL Image对象
+
+        Returns:
+            List[Dict[str, Any]]: 解码结果列表
+        """
+        return self.submit(img).result()
+
+    def map(self, images: Iterable[Image.Image]) -> Iterator[List[Dict[str, Any]]]:
+        """
+        依次解码多帧图像，按提交顺序返回结果，同时在处理的帧数不超过槽位数
+
+        Args:
+            images: PIL Image对象序列
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: 解码结果迭代器
+        """
+        pending = deque()
+        for img in images:
+            if len(pending) >= self.slots:
+                yield pending.popleft().result()
+            pending.append(self.submit(img))
+        while pending:
+            yield pending.popleft().result()
+
+    def close(self) -> None:
+        """等待已提交的帧解码完成，关闭工作进程并释放共享内存"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._executor.shutdown(wait=True)
+        self._segment.close()
+        self._segment.unlink()
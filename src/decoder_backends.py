@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解码后端模块
+提供pyzbar、OpenCV和网格采样等可插拔解码后端，以及按实测表现排序的后端选择策略
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, List, Dict, Any, Optional, Tuple, Union
+import numpy as np
+from PIL import Image
+
+from .grid_decoder import GridDecoder, GridDecodeError
+from .raw_result import RawResult
+
+# 可选依赖在导入时检测
+try:
+    from pyzbar.pyzbar import decode as pyzbar_decode
+except ImportError:
+    pyzbar_decode = None
+
+try:
+    import cv2
+except ImportError:
+    cv2 = None
+
+
+class DecoderBackend:
+    """
+    解码后端基类
+    子类实现_decode方法，基类负责记录调用次数、成功次数和耗时
+    """
+
+    name = 'base'
+
+    # 结果中是否包含结构化追加头(structured_append字段)
+    reports_structured_append = False
+
+    # 原始模式返回的负载是否与符号中的字节完全一致
+    binary_safe = False
+
+    def __init__(self):
+        """初始化统计信息"""
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._successes = 0
+        self._total_time = 0.0
+
+    def decode(self, img: Image.Image, raw: bool = False) -> List[Union[Dict[str, Any], RawResult]]:
+        """
+        解码图像并记录统计信息
+
+        Args:
+            img: PIL Image对象(RGB或灰度模式)
+            raw: 是否返回RawResult对象，负载保持为原始字节
+
+        Returns:
+            List[Union[Dict[str, Any], RawResult]]: 解码结果列表，默认格式与QRCodeDecoder一致
+        """
+        start = time.perf_counter()
+        try:
+            results = self._decode_raw(img) if raw else self._decode(img)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._calls += 1
+                self._total_time += elapsed
+        if results:
+            with self._lock:
+                self._successes += 1
+        return results
+
+    def _decode(self, img: Image.Image) -> List[Dict[str, Any]]:
+        """
+        实际的解码实现
+
+        Args:
+            img: PIL Image对象
+
+        Returns:
+            List[Dict[str, Any]]: 解码结果列表
+        """
+        raise NotImplementedError
+
+    def _decode_raw(self, img: Image.Image) -> List[RawResult]:
+        """
+        返回原始解码结果的实现，默认由字典结果转换，能取得负载字节的后端应覆盖
+
+        Args:
+            img: PIL Image对象
+
+        Returns:
+            List[RawResult]: 原始解码结果列表
+        """
+        return [RawResult.from_dict(result) for result in self._decode(img)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取后端统计信息
+
+        Returns:
+            Dict[str, Any]: 调用次数、成功次数、成功率和平均耗时
+        """
+        with self._lock:
+            calls, successes, total_time = self._calls, self._successes, self._total_time
+        return {
+            'calls': calls,
+            'successes': successes,
+            'success_rate': successes / calls if calls else 0.0,
+            'total_time': total_time,
+            'mean_latency': total_time / calls if calls else 0.0
+        }
+
+    def reset_stats(self) -> None:
+        """重置统计信息"""
+        with self._lock:
+            self._calls = 0
+            self._successes = 0
+            self._total_time = 0.0
+
+
+class PyzbarBackend(DecoderBackend):
+    """基于pyzbar(zbar)的解码后端"""
+
+    name = 'pyzbar'
+
+    def __init__(self):
+        if pyzbar_decode is None:
+            raise ImportError("未安装pyzbar或找不到zbar库")
+        super().__init__()
+
+    def _decode(self, img: Image.Image) -> List[Dict[str, Any]]:
+        results = []
+        for obj in pyzbar_decode(img):
+            result = {
+                'type': obj.type,
+                'data': obj.data.decode('utf-8'),
+                'rect': {
+                    'left': obj.rect.left,
+                    'top': obj.rect.top,
+                    'width': obj.rect.width,
+                    'height': obj.rect.height
+                },
+                'polygon': [{'x': point.x, 'y': point.y} for point in obj.polygon]
+            }
+            results.append(result)
+        return results
+
+    def _decode_raw(self, img: Image.Image) -> List[RawResult]:
+        # 直接引用zbar返回的字节和坐标，不解码文本也不构造字典；
+        # zbar会把非UTF-8负载按猜测的字符集转码，pyzbar无法开启ZBAR_CFG_BINARY，字节不保证与符号一致
+        return [RawResult(obj.type, obj.data, obj.rect, obj.polygon) for obj in pyzbar_decode(img)]
+
+
+class OpenCVBackend(DecoderBackend):
+    """基于OpenCV QRCodeDetector的解码后端"""
+
+    name = 'opencv'
+
+    def __init__(self):
+        if cv2 is None:
+            raise ImportError("未安装opencv-python")
+        super().__init__()
+        # QRCodeDetector不是线程安全的，每个线程使用独立实例
+        self._local = threading.local()
+
+    def _decode(self, img: Image.Image) -> List[Dict[str, Any]]:
+        detector = getattr(self._local, 'detector', None)
+        if detector is None:
+            detector = self._local.detector = cv2.QRCodeDetector()
+
+        pixels = np.asarray(img.convert('L'))
+        found, texts, points, _ = detector.detectAndDecodeMulti(pixels)
+        if not found:
+            return []
+
+        results = []
+        for text, corners in zip(texts, points):
+            # 检测到但未能解码的QR码返回空字符串
+            if not text:
+                continue
+            polygon = [{'x': int(round(x)), 'y': int(round(y))} for x, y in corners]
+            xs = [point['x'] for point in polygon]
+            ys = [point['y'] for point in polygon]
+            results.append({
+                'type': 'QRCODE',
+                'data': text,
+                'rect': {
+                    'left': min(xs),
+                    'top': min(ys),
+                    'width': max(xs) - min(xs),
+                    'height': max(ys) - min(ys)
+                },
+                'polygon': polygon
+            })
+        return results
+
+
+class GridBackend(DecoderBackend):
+    """基于已知网格采样的解码后端，只适用于本程序生成的无畸变图像"""
+
+    name = 'grid'
+    reports_structured_append = True
+    binary_safe = True
+
+    def __init__(self, box_size: Optional[int] = None, border: Optional[int] = None):
+        super().__init__()
+        self._decoder = GridDecoder(box_size, border)
+
+    def _decode(self, img: Image.Image) -> List[Dict[str, Any]]:
+        try:
+            return self._decoder.decode(img)
+        except GridDecodeError:
+            return []
+
+    def _decode_raw(self, img: Image.Image) -> List[RawResult]:
+        try:
+            return self._decoder.decode_raw(img)
+        except GridDecodeError:
+            return []
+
+
+# 后端名称映射
+BACKENDS = {
+    PyzbarBackend.name: PyzbarBackend,
+    OpenCVBackend.name: OpenCVBackend,
+    GridBackend.name: GridBackend
+}
+
+
+def get_available_backends() -> List[str]:
+    """
+    获取当前环境中可用的后端名称
+
+    Returns:
+        List[str]: 可用后端名称列表
+    """
+    available = []
+    if pyzbar_decode is not None:
+        available.append(PyzbarBackend.name)
+    if cv2 is not None:
+        available.append(OpenCVBackend.name)
+    available.append(GridBackend.name)
+    return available
+
+
+def create_backend(backend: Union[str, DecoderBackend]) -> DecoderBackend:
+    """
+    根据名称创建解码后端
+
+    Args:
+        backend: 后端名称或后端实例
+
+    Returns:
+        DecoderBackend: 解码后端实例
+
+    Raises:
+        ValueError: 当后端名称无效时
+        ImportError: 当后端依赖未安装时
+    """
+    if isinstance(backend, DecoderBackend):
+        return backend
+    if backend not in BACKENDS:
+        raise ValueError(f"无效的解码后端: {backend}，支持{list(BACKENDS)}")
+    return BACKENDS[backend]()
+
+
+class BackendSelector(DecoderBackend):
+    """
+    解码后端选择器类
+    按校准结果排序多个后端，依次回退(fallback)或并发竞速(race)
+    """
+
+    POLICIES = ('fallback', 'race')
+
+    def __init__(self, backends: Optional[Iterable[Union[str, DecoderBackend]]] = None,
+                 policy: str = 'fallback'):
+        """
+        初始化后端选择器
+
+        Args:
+            backends: 后端名称或实例序列，默认使用除网格采样外的所有可用后端
+            policy: 选择策略，'fallback'按顺序尝试直到成功，'race'并发执行并采用最先成功的结果
+        """
+        if policy not in self.POLICIES:
+            raise ValueError(f"无效的选择策略: {policy}，支持{self.POLICIES}")
+
+        super().__init__()
+        if backends is None:
+            backends = [name for name in get_available_backends() if name != GridBackend.name]
+        self.backends = [create_backend(backend) for backend in backends]
+        if not self.backends:
+            raise ValueError("没有可用的解码后端")
+
+        self.policy = policy
+        self.name = f"{policy}({','.join(backend.name for backend in self.backends)})"
+        # 任一后端都可能给出结果，只有全部后端都能报告时才能保证得到结构化追加头
+        self.reports_structured_append = all(backend.reports_structured_append
+                                             for backend in self.backends)
+        self.binary_safe = all(backend.binary_safe for backend in self.backends)
+        self._executor = None
+
+    def _decode(self, img: Image.Image) -> List[Dict[str, Any]]:
+        return self._select(img, False)
+
+    def _decode_raw(self, img: Image.Image) -> List[RawResult]:
+        return self._select(img, True)
+
+    def _select(self, img: Image.Image, raw: bool) -> List[Union[Dict[str, Any], RawResult]]:
+        """
+        按选择策略调用各后端
+
+        Args:
+            img: PIL Image对象
+            raw: 是否返回原始解码结果
+
+        Returns:
+            List[Union[Dict[str, Any], RawResult]]: 解码结果列表
+        """
+        if self.policy == 'race' and len(self.backends) > 1:
+            return self._race(img, raw)
+
+        for backend in self.backends:
+            try:
+                results = backend.decode(img, raw)
+            except Exception:
+                continue
+            if results:
+                return results
+        return []
+
+    def _race(self, img: Image.Image, raw: bool = False) -> List[Union[Dict[str, Any], RawResult]]:
+        """
+        并发执行所有后端，返回最先成功的结果
+
+        其余后端仍会在后台运行完毕，其统计信息照常记录。
+
+        Args:
+            img: PIL Image对象
+            raw: 是否返回原始解码结果
+
+        Returns:
+            List[Union[Dict[str, Any], RawResult]]: 解码结果列表
+        """
+        # 多个线程可能同时首次竞速，加锁保证只创建一个线程池
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=len(self.backends))
+            executor = self._executor
+
+        futures = [executor.submit(backend.decode, img, raw) for backend in self.backends]
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception:
+                continue
+            if results:
+                return results
+        return []
+
+    def calibrate(self, corpus: Iterable[Union[Image.Image, str, Tuple[Any, Optional[str]]]]) -> List[Dict[str, Any]]:
+        """
+        在校准样本上运行所有后端，按成功率从高到低、平均耗时从低到高重新排序
+
+        Args:
+            corpus: 校准样本序列，元素为Image对象、图片路径或(图像, 期望内容)元组
+
+        Returns:
+            List[Dict[str, Any]]: 排序后各后端的校准结果
+        """
+        measurements = {id(backend): {'name': backend.name, 'samples': 0, 'successes': 0,
+                                      'total_time': 0.0}
+                        for backend in self.backends}
+
+        for sample in corpus:
+            expected = None
+            if isinstance(sample, tuple):
+                sample, expected = sample
+            img = Image.open(sample) if isinstance(sample, str) else sample
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+
+            for backend in self.backends:
+                measurement = measurements[id(backend)]
+                start = time.perf_counter()
+                try:
+                    results = backend.decode(img)
+                except Exception:
+                    results = []
+                measurement['total_time'] += time.perf_counter() - start
+                measurement['samples'] += 1
+
+                decoded = [result['data'] for result in results]
+                if decoded and (expected is None or expected in decoded):
+                    measurement['successes'] += 1
+
+        for measurement in measurements.values():
+            samples = measurement['samples']
+            measurement['success_rate'] = measurement['successes'] / samples if samples else 0.0
+            measurement['mean_latency'] = measurement['total_time'] / samples if samples else 0.0
+
+        self.backends.sort(key=lambda backend: (-measurements[id(backend)]['success_rate'],
+                                                measurements[id(backend)]['mean_latency']))
+        self.name = f"{self.policy}({','.join(backend.name for backend in self.backends)})"
+        return [measurements[id(backend)] for backend in self.backends]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取选择器及各后端的统计信息
+
+        Returns:
+            Dict[str, Any]: 选择器统计信息，backends字段包含各后端的统计信息
+        """
+        stats = super().get_stats()
+        stats['policy'] = self.policy
+        stats['backends'] = {backend.name: backend.get_stats() for backend in self.backends}
+        return stats
+
+    def close(self) -> None:
+        """关闭竞速使用的线程池"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
@@ -0,0 +1,489 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+网格采样解码模块
+针对本程序生成的无畸变QR码图像，按已知网格直接采样模块中心并解码
+"""
+
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from qrcode import base, constants, util
+
+from .raw_result import RawResult
+
+
+class GridDecodeError(ValueError):
+    """网格采样解码失败，调用方应回退到通用解码器"""
+
+
+# 纠错级别映射(格式信息中的2位编码)
+ERROR_CORRECTION_NAMES = {
+    constants.ERROR_CORRECT_L: 'L',
+    constants.ERROR_CORRECT_M: 'M',
+    constants.ERROR_CORRECT_Q: 'Q',
+    constants.ERROR_CORRECT_H: 'H'
+}
+
+# 数据模式
+MODE_END = 0
+MODE_ECI = 7
+MODE_STRUCTURED_APPEND = 3
+
+# 所有合法的格式信息(含掩码)及其对应的(纠错级别, 掩码)
+FORMAT_INFO = {util.BCH_type_info((ec << 3) | mask): (ec, mask)
+               for ec in ERROR_CORRECTION_NAMES for mask in range(8)}
+
+# GF(256)对数和指数表
+EXP = np.array(base.EXP_TABLE, dtype=np.int32)
+LOG = np.array(base.LOG_TABLE, dtype=np.int32)
+
+ALPHA_NUM = util.ALPHA_NUM.decode('ascii')
+
+
+def _character_count_bits(mode: int, version: int) -> int:
+    """
+    获取字符计数字段的位数
+
+    Args:
+        mode: 数据模式
+        version: QR码版本
+
+    Returns:
+        int: 字符计数字段位数
+    """
+    return util.mode_sizes_for_version(version)[mode]
+
+
+@lru_cache(maxsize=None)
+def _function_mask(version: int) -> np.ndarray:
+    """
+    计算功能图形(定位、定时、校正图形及格式/版本信息)占用的模块
+
+    Args:
+        version: QR码版本
+
+    Returns:
+        np.ndarray: 布尔矩阵，True表示功能模块
+    """
+    n = version * 4 + 17
+    reserved = np.zeros((n, n), dtype=bool)
+
+    # 定位图形、分隔符和格式信息
+    reserved[:9, :9] = True
+    reserved[:9, n - 8:] = True
+    reserved[n - 8:, :9] = True
+
+    # 校正图形，与定位图形重叠的位置跳过(需在标记定时图形前判断)
+    positions = util.pattern_position(version)
+    for row in positions:
+        for col in positions:
+            if reserved[row, col]:
+                continue
+            reserved[row - 2:row + 3, col - 2:col + 3] = True
+
+    # 定时图形
+    reserved[6, :] = True
+    reserved[:, 6] = True
+
+    # 版本信息
+    if version >= 7:
+        reserved[:6, n - 11:n - 8] = True
+        reserved[n - 11:n - 8, :6] = True
+
+    return reserved
+
+
+@lru_cache(maxsize=None)
+def _data_positions(version: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算数据模块按读取顺序(自右下角起两列一组蛇形)排列的坐标
+
+    Args:
+        version: QR码版本
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: 行坐标数组和列坐标数组
+    """
+    n = version * 4 + 17
+    reserved = _function_mask(version)
+    rows, cols = [], []
+
+    upward = True
+    for col in range(n - 1, 0, -2):
+        # 跳过垂直定时图形所在列
+        if col <= 6:
+            col -= 1
+        row_range = range(n - 1, -1, -1) if upward else range(n)
+        for row in row_range:
+            for c in (col, col - 1):
+                if not reserved[row, c]:
+                    rows.append(row)
+                    cols.append(c)
+        upward = not upward
+
+    return np.array(rows, dtype=np.intp), np.array(cols, dtype=np.intp)
+
+
+@lru_cache(maxsize=None)
+def _data_mask(version: int, mask: int) -> np.ndarray:
+    """
+    计算数据模块按读取顺序排列的掩码位
+
+    Args:
+        version: QR码版本
+        mask: 掩码图形编号(0-7)
+
+    Returns:
+        np.ndarray: 布尔数组，True表示需要翻转
+    """
+    i, j = _data_positions(version)
+    if mask == 0:
+        return (i + j) % 2 == 0
+    if mask == 1:
+        return i % 2 == 0
+    if mask == 2:
+        return j % 3 == 0
+    if mask == 3:
+        return (i + j) % 3 == 0
+    if mask == 4:
+        return (i // 2 + j // 3) % 2 == 0
+    if mask == 5:
+        return (i * j) % 2 + (i * j) % 3 == 0
+    if mask == 6:
+        return ((i * j) % 2 + (i * j) % 3) % 2 == 0
+    return ((i * j) % 3 + (i + j) % 2) % 2 == 0
+
+
+@lru_cache(maxsize=None)
+def _block_layout(version: int, error_correction: int) -> Tuple[Tuple[int, np.ndarray, np.ndarray], ...]:
+    """
+    计算交错码字到各RS块的索引，相同长度的块归为一组以便批量校验
+
+    Args:
+        version: QR码版本
+        error_correction: 纠错级别
+
+    Returns:
+        Tuple[Tuple[int, np.ndarray, np.ndarray], ...]: 每组的(数据码字数, 索引矩阵, 伴随式指数矩阵)，
+            索引矩阵每行为一个块在交错码字序列中的索引(数据码字在前，纠错码字在后)
+    """
+    blocks = base.rs_blocks(version, error_correction)
+    data_counts = [block.data_count for block in blocks]
+    ec_counts = [block.total_count - block.data_count for block in blocks]
+    indices = [[] for _ in blocks]
+
+    position = 0
+    for i in range(max(data_counts)):
+        for b, count in enumerate(data_counts):
+            if i < count:
+                indices[b].append(position)
+                position += 1
+    for i in range(max(ec_counts)):
+        for b, count in enumerate(ec_counts):
+            if i < count:
+                indices[b].append(position)
+                position += 1
+
+    # RS块表中相同规格的块总是相邻
+    groups = []
+    start = 0
+    while start < len(blocks):
+        end = start
+        while end < len(blocks) and blocks[end] == blocks[start]:
+            end += 1
+        total, data_count = blocks[start].total_count, blocks[start].data_count
+
+        # 伴随式S_j = sum(c_i * a^(j * (total - 1 - i)))，j = 0..ec_count-1
+        powers = np.arange(total - 1, -1, -1)
+        exponents = (np.arange(total - data_count)[:, None] * powers[None, :]) % 255
+
+        groups.append((data_count, np.array(indices[start:end], dtype=np.intp), exponents))
+        start = end
+
+    return tuple(groups)
+
+
+def _check_blocks(codewords: np.ndarray, exponents: np.ndarray) -> bool:
+    """
+    批量计算同一组RS块的伴随式，全部为0时表示没有错误
+
+    Args:
+        codewords: 码字矩阵，每行为一个块(数据码字在前)
+        exponents: 伴随式指数矩阵
+
+    Returns:
+        bool: 所有块是否无误
+    """
+    terms = EXP[(LOG[codewords][:, None, :] + exponents[None, :, :]) % 255]
+    terms[np.broadcast_to(codewords[:, None, :] == 0, terms.shape)] = 0
+    return not np.bitwise_xor.reduce(terms, axis=2).any()
+
+
+class _BitReader:
+    """按位读取码字序列"""
+
+    def __init__(self, data: bytes):
+        self.value = int.from_bytes(data, 'big')
+        self.length = len(data) * 8
+        self.position = 0
+
+    def remaining(self) -> int:
+        return self.length - self.position
+
+    def read(self, count: int) -> int:
+        if count > self.length - self.position:
+            raise GridDecodeError("数据位不足")
+        self.position += count
+        return (self.value >> (self.length - self.position)) & ((1 << count) - 1)
+
+    def read_bytes(self, count: int) -> bytes:
+        return self.read(count * 8).to_bytes(count, 'big')
+
+    def read_digits(self, count: int, bits: int) -> str:
+        value = self.read(bits)
+        if value >= 10 ** count:
+            raise GridDecodeError(f"无效的数字编码: {value}")
+        return f"{value:0{count}d}"
+
+
+class GridDecoder:
+    """
+    网格采样解码器类
+    只适用于轴对齐、无畸变的合成图像，任何不一致都会抛出GridDecodeError
+    """
+
+    def __init__(self, box_size: Optional[int] = None, border: Optional[int] = None,
+                 threshold: int = 128):
+        """
+        初始化网格采样解码器
+
+        Args:
+            box_size: 每个格子的像素大小，None表示从图像推断
+            border: 边框格子数，None表示从图像推断
+            threshold: 灰度阈值，小于该值的模块视为深色
+        """
+        self.box_size = box_size
+        self.border = border
+        self.threshold = threshold
+
+    def decode(self, img: Image.Image) -> List[Dict[str, Any]]:
+        """
+        解码QR码图像
+
+        Args:
+            img: PIL Image对象
+
+        Returns:
+            List[Dict[str, Any]]: 解码结果列表，格式与QRCodeDecoder一致
+
+        Raises:
+            GridDecodeError: 当图像不符合已知网格、校验失败或内容不是UTF-8文本时
+        """
+        results = self.decode_raw(img)
+        try:
+            return [result.to_dict() for result in results]
+        except UnicodeDecodeError as e:
+            raise GridDecodeError(f"数据不是有效的UTF-8文本: {e}")
+
+    def decode_raw(self, img: Image.Image) -> List[RawResult]:
+        """
+        解码QR码图像，负载保持为原始字节
+
+        Args:
+            img: PIL Image对象
+
+        Returns:
+            List[RawResult]: 原始解码结果列表
+
+        Raises:
+            GridDecodeError: 当图像不符合已知网格或校验失败时
+        """
+        box_size, border = self.box_size, self.border
+        if box_size is None or border is None:
+            box_size, border = self._infer_geometry(img)
+
+        modules = self._sample_modules(img, box_size, border)
+        version = (modules.shape[0] - 17) // 4
+        error_correction, mask = self._read_format(modules)
+
+        # 按读取顺序取出数据位并去除掩码
+        rows, cols = _data_positions(version)
+        bits = modules[rows, cols] ^ _data_mask(version, mask)
+        codewords = np.packbits(bits[:len(bits) // 8 * 8]).astype(np.int32)
+
+        # 去交错并逐块校验
+        data = bytearray()
+        for data_count, indices, exponents in _block_layout(version, error_correction):
+            block_codewords = codewords[indices]
+            if not _check_blocks(block_codewords, exponents):
+                raise GridDecodeError("纠错校验失败")
+            data.extend(block_codewords[:, :data_count].astype(np.uint8).tobytes())
+
+        payload, structured_append = self._decode_segments(bytes(data), version)
+
+        left = top = border * box_size
+        right = bottom = left + modules.shape[0] * box_size
+        points = ((left, top), (left, bottom), (right, bottom), (right, top))
+        return [RawResult('QRCODE', payload, (left, top, right - left, bottom - top), points,
+                          version, ERROR_CORRECTION_NAMES[error_correction], structured_append)]
+
+    def _infer_geometry(self, img: Image.Image) -> Tuple[int, int]:
+        """
+        根据左上角定位图形推断格子大小和边框宽度
+
+        Args:
+            img: PIL Image对象
+
+        Returns:
+            Tuple[int, int]: (格子大小, 边框格子数)
+        """
+        dark = np.asarray(img.convert('L')) < self.threshold
+        diagonal = np.nonzero(dark.diagonal())[0]
+        if len(diagonal) == 0:
+            raise GridDecodeError("未找到定位图形")
+
+        # 定位图形外框为7个模块宽的深色线
+        offset = int(diagonal[0])
+        row = dark[offset, offset:]
+        light = np.nonzero(~row)[0]
+        run = int(light[0]) if len(light) else len(row)
+        if run % 7:
+            raise GridDecodeError("定位图形尺寸不符合网格")
+        box_size = run // 7
+        if offset % box_size:
+            raise GridDecodeError("边框宽度不符合网格")
+        return box_size, offset // box_size
+
+    def _sample_modules(self, img: Image.Image, box_size: int, border: int) -> np.ndarray:
+        """
+        在网格模块中心采样
+
+        Args:
+            img: PIL Image对象
+            box_size: 格子大小
+            border: 边框格子数
+
+        Returns:
+            np.ndarray: 布尔模块矩阵，True表示深色
+        """
+        width, height = img.size
+        if box_size < 1 or width != height or width % box_size:
+            raise GridDecodeError("图像尺寸不符合网格")
+
+        count = width // box_size - 2 * border
+        if count < 21 or (count - 17) % 4 or count > 177:
+            raise GridDecodeError(f"无效的模块数: {count}")
+
+        # 最近邻缩放到模块网格即在每个模块中心取样，无需转换整张图像
+        offset = border * box_size
+        end = offset + count * box_size
+        grid = img.resize((count, count), Image.Resampling.NEAREST, box=(offset, offset, end, end))
+        if grid.mode != 'L':
+            grid = grid.convert('L')
+        return np.asarray(grid) < self.threshold
+
+    def _read_format(self, modules: np.ndarray) -> Tuple[int, int]:
+        """
+        读取格式信息，允许最多3位错误
+
+        Args:
+            modules: 模块矩阵
+
+        Returns:
+            Tuple[int, int]: (纠错级别, 掩码图形编号)
+        """
+        n = modules.shape[0]
+        vertical = [(i, 8) if i < 6 else (i + 1, 8) if i < 8 else (n - 15 + i, 8)
+                    for i in range(15)]
+        horizontal = [(8, n - i - 1) if i < 8 else (8, 7) if i == 8 else (8, 14 - i)
+                      for i in range(15)]
+
+        for positions in (vertical, horizontal):
+            value = sum(1 << i for i, (r, c) in enumerate(positions) if modules[r, c])
+            if value in FORMAT_INFO:
+                return FORMAT_INFO[value]
+            for code, info in FORMAT_INFO.items():
+                if bin(code ^ value).count('1') <= 3:
+                    return info
+
+        raise GridDecodeError("无法读取格式信息")
+
+    def _decode_segments(self, data: bytes,
+                         version: int) -> Tuple[bytes, Optional[Dict[str, int]]]:
+        """
+        解析数据码字中的各个数据段
+
+        Args:
+            data: 数据码字
+            version: QR码版本
+
+        Returns:
+            Tuple[bytes, Optional[Dict[str, int]]]: 拼接后的数据和结构化追加头信息
+        """
+        reader = _BitReader(data)
+        payload = bytearray()
+        structured_append = None
+
+        while reader.remaining() >= 4:
+            mode = reader.read(4)
+            if mode == MODE_END:
+                break
+
+            if mode == MODE_STRUCTURED_APPEND:
+                index = reader.read(4)
+                total = reader.read(4) + 1
+                parity = reader.read(8)
+                structured_append = {'index': index, 'total': total, 'parity': parity}
+            elif mode == MODE_ECI:
+                # 只支持UTF-8(26)，其他字符集回退到通用解码器
+                designator = reader.read(8)
+                if designator & 0x80:
+                    raise GridDecodeError("不支持的ECI指定符")
+                if designator != 26:
+                    raise GridDecodeError(f"不支持的ECI字符集: {designator}")
+            elif mode == util.MODE_NUMBER:
+                count = reader.read(_character_count_bits(mode, version))
+                digits = []
+                while count >= 3:
+                    digits.append(reader.read_digits(3, 10))
+                    count -= 3
+                if count == 2:
+                    digits.append(reader.read_digits(2, 7))
+                elif count == 1:
+                    digits.append(reader.read_digits(1, 4))
+                payload.extend(''.join(digits).encode('ascii'))
+            elif mode == util.MODE_ALPHA_NUM:
+                count = reader.read(_character_count_bits(mode, version))
+                chars = []
+                while count >= 2:
+                    value = reader.read(11)
+                    if value >= 45 * 45:
+                        raise GridDecodeError(f"无效的字母数字编码: {value}")
+                    chars.append(ALPHA_NUM[value // 45] + ALPHA_NUM[value % 45])
+                    count -= 2
+                if count:
+                    value = reader.read(6)
+                    if value >= 45:
+                        raise GridDecodeError(f"无效的字母数字编码: {value}")
+                    chars.append(ALPHA_NUM[value])
+                payload.extend(''.join(chars).encode('ascii'))
+            elif mode == util.MODE_8BIT_BYTE:
+                count = reader.read(_character_count_bits(mode, version))
+                payload.extend(reader.read_bytes(count))
+            elif mode == util.MODE_KANJI:
+                count = reader.read(_character_count_bits(mode, version))
+                for _ in range(count):
+                    value = reader.read(13)
+                    code = (value // 0xC0 << 8) | (value % 0xC0)
+                    code += 0x8140 if code < 0x1F00 else 0xC140
+                    try:
+                        payload.extend(code.to_bytes(2, 'big').decode('shift_jis').encode('utf-8'))
+                    except UnicodeDecodeError as e:
+                        raise GridDecodeError(f"无效的汉字编码: {e}")
+            else:
+                raise GridDecodeError(f"不支持的数据模式: {mode}")
+
+        return bytes(payload), structured_append
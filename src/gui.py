@@ -9,10 +9,16 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from PIL import Image, ImageTk
 import os
+import queue
+import threading
+import time
+from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
 from .qrcode_generator import QRCodeGenerator
 from .utils import validate_file_path, get_default_file_name, handle_error
+from .virtual_table import VirtualTable
 
 # 延迟导入QRCodeDecoder，避免启动时加载pyzbar依赖
 
@@ -36,6 +42,19 @@ class QRCodeGUI:
         self.current_image = None
         self.decoded_results = []
         
+        # 解码在后台线程中执行，结果经队列传回界面线程，新请求取代尚未完成的请求
+        self._decode_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="decode")
+        self._decode_queue = None
+        self._decode_cancel_event = None
+        
+        # 批量解码状态，结果由后台线程经队列传回界面线程
+        self.batch_results = []
+        self._batch_queue = None
+        self._batch_cancel_event = None
+        self._batch_total = 0
+        self._batch_counts = {}
+        self._batch_start = 0.0
+        
         # 配置窗口
         self._setup_window()
         
@@ -151,6 +170,10 @@ class QRCodeGUI:
         )
         self.box_size_spinbox.pack(side=tk.LEFT)
         
+        # 实时容量显示
+        self.capacity_var = tk.StringVar(value="")
+        self.capacity_label = ttk.Label(self.options_frame, textvariable=self.capacity_var)
+        
         # 生成按钮
         self.generate_button = ttk.Button(
             self.control_panel,
@@ -214,6 +237,15 @@ class QRCodeGUI:
             command=self.decode_qr_code
         )
         
+        # 解码进度和取消按钮
+        self.decode_progress = ttk.Progressbar(self.decode_control_panel, mode="indeterminate")
+        self.cancel_decode_button = ttk.Button(
+            self.decode_control_panel,
+            text="取消",
+            command=self.cancel_decode,
+            state="disabled"
+        )
+        
         # 解码标签页的右侧结果面板
         self.decode_result_panel = ttk.LabelFrame(self.decode_tab, text="结果", padding="10")
         
@@ -224,6 +256,55 @@ class QRCodeGUI:
         # 解码结果文本框
         self.result_text = tk.Text(self.decode_result_panel, height=10, width=40, state="disabled")
         self.result_text.pack(fill=tk.BOTH, expand=True, pady=(10, 0))
+        
+        # ------------------------ 批量解码标签页 ------------------------
+        self.batch_tab = ttk.Frame(self.tab_control, padding="10")
+        self.tab_control.add(self.batch_tab, text="批量解码")
+        
+        # 文件夹选择区域
+        self.batch_folder_frame = ttk.Frame(self.batch_tab)
+        ttk.Label(self.batch_folder_frame, text="文件夹:").pack(side=tk.LEFT, padx=(0, 10))
+        self.batch_folder_var = tk.StringVar()
+        self.batch_folder_entry = ttk.Entry(self.batch_folder_frame, textvariable=self.batch_folder_var, state="readonly")
+        self.batch_folder_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(0, 10))
+        self.batch_browse_button = ttk.Button(self.batch_folder_frame, text="浏览", command=self.browse_batch_folder)
+        self.batch_browse_button.pack(side=tk.LEFT)
+        
+        # 工作进程数和操作按钮
+        self.batch_action_frame = ttk.Frame(self.batch_tab)
+        ttk.Label(self.batch_action_frame, text="工作进程:").pack(side=tk.LEFT, padx=(0, 10))
+        self.batch_workers_var = tk.IntVar(value=os.cpu_count() or 1)
+        self.batch_workers_spinbox = ttk.Spinbox(
+            self.batch_action_frame,
+            from_=0, to=64,
+            textvariable=self.batch_workers_var,
+            width=5
+        )
+        self.batch_workers_spinbox.pack(side=tk.LEFT, padx=(0, 10))
+        self.batch_start_button = ttk.Button(self.batch_action_frame, text="开始解码", command=self.start_batch_decode)
+        self.batch_start_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.batch_cancel_button = ttk.Button(
+            self.batch_action_frame,
+            text="取消",
+            command=self.cancel_batch_decode,
+            state="disabled"
+        )
+        self.batch_cancel_button.pack(side=tk.LEFT, padx=(0, 5))
+        self.batch_export_button = ttk.Button(self.batch_action_frame, text="导出CSV", command=self.export_batch_csv)
+        self.batch_export_button.pack(side=tk.LEFT)
+        
+        # 进度和统计
+        self.batch_progress = ttk.Progressbar(self.batch_tab, mode="determinate")
+        self.batch_stats_var = tk.StringVar(value="请选择要解码的文件夹")
+        self.batch_stats_label = ttk.Label(self.batch_tab, textvariable=self.batch_stats_var)
+        
+        # 结果表格，只为可见行创建条目
+        self.batch_table = VirtualTable(self.batch_tab, columns=[
+            ("file", "文件", 240),
+            ("status", "状态", 70),
+            ("elapsed", "耗时(ms)", 80),
+            ("data", "内容", 300)
+        ])
     
     def _layout_widgets(self) -> None:
         """布局界面组件"""
@@ -249,6 +330,7 @@ class QRCodeGUI:
         self.ec_frame.pack(fill=tk.X, pady=(0, 5))
         self.border_frame.pack(fill=tk.X, pady=(0, 5))
         self.box_size_frame.pack(fill=tk.X, pady=(0, 5))
+        self.capacity_label.pack(anchor=tk.W)
         
         # 生成按钮布局
         self.generate_button.pack(fill=tk.X)
@@ -272,8 +354,19 @@ class QRCodeGUI:
         # 解码按钮布局
         self.decode_button.pack(fill=tk.X)
         
+        # 解码进度和取消按钮布局
+        self.decode_progress.pack(fill=tk.X, pady=(10, 0))
+        self.cancel_decode_button.pack(fill=tk.X, pady=(5, 0))
+        
         # 右侧结果面板布局
         self.decode_result_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True)
+        
+        # ------------------------ 批量解码标签页布局 ------------------------
+        self.batch_folder_frame.pack(fill=tk.X, pady=(0, 10))
+        self.batch_action_frame.pack(fill=tk.X, pady=(0, 10))
+        self.batch_progress.pack(fill=tk.X, pady=(0, 5))
+        self.batch_stats_label.pack(anchor=tk.W, pady=(0, 10))
+        self.batch_table.pack(fill=tk.BOTH, expand=True)
     
     def _bind_events(self) -> None:
         """绑定事件"""
@@ -309,6 +402,7 @@ class QRCodeGUI:
             # 获取内容
             content = self.content_text.get("1.0", tk.END).strip()
             if not content:
+                self.capacity_var.set("")
                 self._clear_preview()
                 return
             
@@ -319,6 +413,12 @@ class QRCodeGUI:
             border = self.border_var.get()
             box_size = self.box_size_var.get()
             
+            # 查表显示容量，内容过长时不再尝试生成
+            if not self._update_capacity(content, content_type, size, error_correction,
+                                         box_size, border):
+                self._clear_preview()
+                return
+            
             # 生成QR码
             self.current_image = self.generator.generate_qr_code(
                 content=content,
@@ -337,6 +437,34 @@ class QRCodeGUI:
             messagebox.showerror("错误", f"生成QR码失败: {e}")
             self._clear_preview()
     
+    def _update_capacity(self, content: str, content_type: str, size: int,
+                         error_correction: str, box_size: int, border: int) -> bool:
+        """
+        更新容量显示
+        
+        Args:
+            content: 内容
+            content_type: 内容类型
+            size: 版本下限
+            error_correction: 纠错级别
+            box_size: 每个格子的像素大小
+            border: 边框格子数
+            
+        Returns:
+            bool: 内容是否能放入版本40以内
+        """
+        plan = self.generator.plan_capacity(content, content_type, size, error_correction,
+                                            box_size, border)
+        # 剩余容量按末尾分段的编码模式计算
+        tail_mode = plan['segments'][-1][0] if plan['segments'] else 'byte'
+        unit = "字节" if tail_mode == 'byte' else "字符"
+        if plan['fits']:
+            self.capacity_var.set(f"版本 {plan['version']}，剩余 {plan['remaining']} {unit}，"
+                                  f"{plan['pixel_size']}x{plan['pixel_size']} 像素")
+        else:
+            self.capacity_var.set(f"内容过长，超出版本40容量 {-plan['remaining']} {unit}")
+        return plan['fits']
+    
     def _update_preview(self) -> None:
         """更新预览显示"""
         if not self.current_image:
@@ -439,54 +567,149 @@ class QRCodeGUI:
     
     def decode_qr_code(self) -> None:
         """
-        解码QR码并显示结果
+        在后台线程中解码QR码，完成后在界面线程中显示结果
         """
-        try:
-            # 延迟初始化decoder，避免启动时加载pyzbar
-            if self.decoder is None:
+        method = self.decode_method_var.get()
+        
+        # 根据解码方式获取图片来源
+        if method == "file":
+            source = self.file_path_var.get()
+            if not source:
+                messagebox.showwarning("警告", "请先选择要解码的图片文件")
+                return
+        else:
+            source = self.url_var.get().strip()
+            if not source:
+                messagebox.showwarning("警告", "请先输入图片URL")
+                return
+        
+        # 在界面线程中延迟创建decoder，避免启动时加载pyzbar，
+        # 也避免后台线程使用未初始化完成的decoder
+        if self.decoder is None:
+            try:
                 from .qrcode_decoder import QRCodeDecoder
                 self.decoder = QRCodeDecoder()
-            
-            method = self.decode_method_var.get()
-            img = None
-            
-            # 根据解码方式获取图片
+            except Exception as e:
+                handle_error(e, "初始化解码器")
+                messagebox.showerror("错误", f"解码失败: {e}")
+                return
+        
+        # 新请求取代尚未完成的请求
+        if self._decode_cancel_event is not None:
+            self._decode_cancel_event.set()
+        
+        # 每个请求使用新的队列，被取代的请求的结果不会被读取
+        self._decode_queue = queue.Queue()
+        self._decode_cancel_event = threading.Event()
+        self._set_decoding(True)
+        
+        self._decode_executor.submit(self._decode_worker, method, source,
+                                     self._decode_queue, self._decode_cancel_event)
+        self.root.after(100, self._poll_decode_queue, self._decode_queue)
+    
+    def cancel_decode(self) -> None:
+        """
+        取消正在进行的解码请求
+        """
+        if self._decode_cancel_event is None:
+            return
+        
+        # 中止下载，并使尚未返回的结果失效
+        self._decode_cancel_event.set()
+        self._decode_cancel_event = None
+        self._decode_queue = None
+        self._set_decoding(False)
+        
+        self.result_text.config(state="normal")
+        self.result_text.delete("1.0", tk.END)
+        self.result_text.insert(tk.END, "解码已取消")
+        self.result_text.config(state="disabled")
+    
+    def _decode_worker(self, method: str, source: str, messages: queue.Queue,
+                       cancel_event: threading.Event) -> None:
+        """
+        后台线程：获取图片并解码，结果放入队列，decoder已由界面线程创建
+        
+        Args:
+            method: 解码方式，'file'或'url'
+            source: 文件路径或图片URL
+            messages: 本次请求的结果队列
+            cancel_event: 取消事件
+        """
+        # 单个后台线程依次执行请求，排队期间已被取代的请求直接跳过
+        if cancel_event.is_set():
+            return
+        
+        try:
             if method == "file":
-                file_path = self.file_path_var.get()
-                if not file_path:
-                    messagebox.showwarning("警告", "请先选择要解码的图片文件")
-                    return
-                
                 # 解码本地文件
-                results = self.decoder.decode_from_file(file_path)
-                img = Image.open(file_path)
+                results = self.decoder.decode_from_file(source)
+                img = Image.open(source)
+                img.load()
             else:
-                url = self.url_var.get().strip()
-                if not url:
-                    messagebox.showwarning("警告", "请先输入图片URL")
-                    return
-                
-                # 解码网络图片
-                results = self.decoder.decode_from_url(url)
-                
-                # 获取图片用于预览
-                import requests
-                from io import BytesIO
-                response = requests.get(url, timeout=10)
-                response.raise_for_status()
-                img = Image.open(BytesIO(response.content))
-            
-            # 显示预览
-            self._update_decode_preview(img)
-            
-            # 显示解码结果
-            self._display_decode_results(results)
+                # 下载一次，同时用于解码和预览
+                data = self.decoder.download_image(source, cancel_event)
+                img = Image.open(BytesIO(data))
+                img.load()
+                results = self.decoder.decode_from_image(img)
             
+            error = None
         except Exception as e:
-            handle_error(e, "解码QR码")
-            messagebox.showerror("错误", f"解码失败: {e}")
+            img, results, error = None, [], e
+        
+        # 已取消的请求不再更新界面
+        if cancel_event.is_set():
+            return
+        
+        messages.put((img, results, error))
+    
+    def _poll_decode_queue(self, messages: queue.Queue) -> None:
+        """
+        界面线程：定时检查解码结果，取得后显示
+        
+        Args:
+            messages: 本次请求的结果队列
+        """
+        # 请求已被取代或取消
+        if messages is not self._decode_queue:
+            return
+        
+        try:
+            img, results, error = messages.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self._poll_decode_queue, messages)
+            return
+        
+        self._decode_queue = None
+        self._decode_cancel_event = None
+        self._set_decoding(False)
+        
+        if error is not None:
+            handle_error(error, "解码QR码")
+            messagebox.showerror("错误", f"解码失败: {error}")
             self._clear_decode_preview()
             self._display_decode_results([])
+            return
+        
+        # 显示预览
+        self._update_decode_preview(img)
+        
+        # 显示解码结果
+        self._display_decode_results(results)
+    
+    def _set_decoding(self, active: bool) -> None:
+        """
+        切换解码进度显示
+        
+        Args:
+            active: 是否正在解码
+        """
+        if active:
+            self.decode_progress.start(10)
+            self.cancel_decode_button.config(state="normal")
+        else:
+            self.decode_progress.stop()
+            self.cancel_decode_button.config(state="disabled")
     
     def _update_decode_preview(self, img: Image.Image) -> None:
         """
@@ -550,9 +773,225 @@ class QRCodeGUI:
         
         self.result_text.config(state="disabled")
     
+    def browse_batch_folder(self) -> None:
+        """
+        选择要批量解码的文件夹
+        """
+        directory = filedialog.askdirectory(title="选择要批量解码的图片文件夹")
+        if directory:
+            self.batch_folder_var.set(directory)
+    
+    def start_batch_decode(self) -> None:
+        """
+        在后台线程中批量解码文件夹中的图片
+        """
+        directory = self.batch_folder_var.get()
+        if not directory:
+            messagebox.showwarning("警告", "请先选择要解码的文件夹")
+            return
+        
+        try:
+            workers = self.batch_workers_var.get()
+        except tk.TclError:
+            messagebox.showwarning("警告", "工作进程数必须是整数")
+            return
+        
+        # 重置表格和统计
+        self.batch_results = []
+        self.batch_table.clear()
+        self._batch_total = 0
+        self._batch_counts = {'ok': 0, 'empty': 0, 'error': 0}
+        self._batch_start = time.perf_counter()
+        self.batch_stats_var.set("正在扫描文件夹...")
+        
+        # 每次运行使用新的队列，旧运行残留的消息不会被读取
+        self._batch_queue = queue.Queue()
+        self._batch_cancel_event = threading.Event()
+        self._set_batch_running(True)
+        
+        threading.Thread(
+            target=self._batch_decode_worker,
+            args=(directory, workers, self._batch_queue, self._batch_cancel_event),
+            daemon=True
+        ).start()
+        self.root.after(100, self._poll_batch_queue, self._batch_queue)
+    
+    def cancel_batch_decode(self) -> None:
+        """
+        取消批量解码，已完成的结果保留
+        """
+        if self._batch_cancel_event is not None:
+            self._batch_cancel_event.set()
+            self.batch_stats_var.set("正在取消...")
+    
+    def export_batch_csv(self) -> None:
+        """
+        将批量解码结果导出为CSV文件
+        """
+        if not self.batch_results:
+            messagebox.showwarning("警告", "没有可导出的解码结果")
+            return
+        
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".csv",
+            filetypes=[("CSV文件", "*.csv"), ("所有文件", "*.*")],
+            initialfile="decode_results.csv",
+            title="导出解码结果"
+        )
+        if not file_path:
+            return
+        
+        try:
+            from .batch import write_decode_csv
+            count = write_decode_csv(self.batch_results, file_path)
+            messagebox.showinfo("成功", f"已导出 {count} 条结果到: {file_path}")
+        except Exception as e:
+            handle_error(e, "导出解码结果")
+            messagebox.showerror("错误", f"导出解码结果失败: {e}")
+    
+    def _batch_decode_worker(self, directory: str, workers: int, messages: queue.Queue,
+                             cancel_event: threading.Event) -> None:
+        """
+        后台线程：扫描文件夹并批量解码，结果逐条放入队列
+        
+        Args:
+            directory: 图片文件夹
+            workers: 工作进程数
+            messages: 消息队列
+            cancel_event: 取消事件
+        """
+        try:
+            from .batch import BatchDecoder, find_image_files
+            paths = find_image_files(directory)
+            messages.put(("total", len(paths)))
+            
+            for result in BatchDecoder(workers=workers).iter_decode(paths, cancel_event):
+                messages.put(("result", result))
+        except Exception as e:
+            messages.put(("error", e))
+        finally:
+            messages.put(("done", None))
+    
+    def _poll_batch_queue(self, messages: queue.Queue) -> None:
+        """
+        界面线程：定时取出队列中的结果并更新表格
+        
+        Args:
+            messages: 本次运行的消息队列
+        """
+        # 已开始新的运行
+        if messages is not self._batch_queue:
+            return
+        
+        from .batch import decode_status
+        
+        rows = []
+        done = False
+        # 每次最多处理一批消息，保证界面响应
+        for _ in range(2000):
+            try:
+                kind, value = messages.get_nowait()
+            except queue.Empty:
+                break
+            
+            if kind == "total":
+                self._batch_total = value
+                self.batch_progress.config(maximum=max(value, 1), value=0)
+            elif kind == "result":
+                status = decode_status(value)
+                self._batch_counts[status] += 1
+                self.batch_results.append(value)
+                rows.append(self._batch_row(value, status))
+            elif kind == "error":
+                handle_error(value, "批量解码")
+                messagebox.showerror("错误", f"批量解码失败: {value}")
+            else:
+                done = True
+                break
+        
+        if rows:
+            self.batch_table.append_rows(rows)
+        self._update_batch_stats(done)
+        
+        if done:
+            self._batch_queue = None
+            self._batch_cancel_event = None
+            self._set_batch_running(False)
+        else:
+            self.root.after(100, self._poll_batch_queue, messages)
+    
+    def _batch_row(self, result: dict, status: str) -> tuple:
+        """
+        将批量解码结果转换为表格行
+        
+        Args:
+            result: 批量解码结果
+            status: 结果状态
+        
+        Returns:
+            tuple: 表格行
+        """
+        status_names = {'ok': "成功", 'empty': "未识别", 'error': "错误"}
+        
+        try:
+            file_name = os.path.relpath(result['path'], self.batch_folder_var.get())
+        except ValueError:
+            file_name = result['path']
+        
+        if status == 'error':
+            content = result['error']
+        else:
+            content = " | ".join(r['data'] for r in result['results'])
+        
+        return (file_name, status_names[status], f"{result['elapsed'] * 1000:.0f}", content)
+    
+    def _update_batch_stats(self, finished: bool) -> None:
+        """
+        更新批量解码的进度、吞吐量和失败数
+        
+        Args:
+            finished: 是否已结束
+        """
+        processed = len(self.batch_results)
+        elapsed = time.perf_counter() - self._batch_start
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        
+        self.batch_progress.config(value=processed)
+        
+        prefix = "已完成" if finished else "解码中"
+        if finished and processed < self._batch_total:
+            prefix = "已取消"
+        self.batch_stats_var.set(
+            f"{prefix}: {processed}/{self._batch_total}  "
+            f"成功 {self._batch_counts['ok']}  "
+            f"未识别 {self._batch_counts['empty']}  "
+            f"错误 {self._batch_counts['error']}  "
+            f"{rate:.1f} 张/秒"
+        )
+    
+    def _set_batch_running(self, running: bool) -> None:
+        """
+        切换批量解码按钮状态
+        
+        Args:
+            running: 是否正在解码
+        """
+        self.batch_start_button.config(state="disabled" if running else "normal")
+        self.batch_browse_button.config(state="disabled" if running else "normal")
+        self.batch_cancel_button.config(state="normal" if running else "disabled")
+    
     def run(self) -> None:
         """运行GUI程序"""
         self.root.mainloop()
+        
+        # 窗口关闭后中止未完成的批量解码
+        if self._batch_cancel_event is not None:
+            self._batch_cancel_event.set()
+        
+        # 窗口关闭后中止未完成的解码
+        if self._decode_cancel_event is not None:
+            self._decode_cancel_event.set()
+        self._decode_executor.shutdown(wait=False, cancel_futures=True)
 
 
 def create_gui() -> None:
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+任务清单模块
+以只追加的JSONL文件记录已完成的批量任务项，中断后重新运行时跳过已完成的项
+"""
+
+import os
+import json
+import time
+import hashlib
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+from .utils import logger
+
+
+# 写出过程中的临时文件后缀，残留的临时文件说明上次运行在写出时中断
+PARTIAL_SUFFIX = '.part'
+
+
+def file_checksum(data: bytes) -> str:
+    """
+    计算数据的SHA-256校验值
+
+    Args:
+        data: 文件内容
+
+    Returns:
+        str: 十六进制校验值
+    """
+    return hashlib.sha256(data).hexdigest()
+
+
+def write_file_atomic(file_path: str, data: bytes) -> None:
+    """
+    先写入临时文件再替换目标文件，中断时目标文件不会处于半写入状态
+
+    Args:
+        file_path: 目标文件路径
+        data: 文件内容
+    """
+    temp_path = file_path + PARTIAL_SUFFIX
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, file_path)
+
+
+def remove_partial_file(file_path: str) -> bool:
+    """
+    删除目标文件上次写出时中断残留的临时文件
+
+    只处理指定的目标文件，多个分片共用输出目录时不会删除其他分片正在写出的临时文件。
+
+    Args:
+        file_path: 目标文件路径
+
+    Returns:
+        bool: 是否删除了临时文件
+    """
+    try:
+        os.remove(file_path + PARTIAL_SUFFIX)
+    except FileNotFoundError:
+        return False
+    return True
+
+
+class JobManifest:
+    """
+    任务清单类
+    每完成一项追加一行JSON记录，按记录数或时间间隔批量fsync；
+    打开时加载已有记录，查询某项是否完成为O(1)
+    """
+
+    def __init__(self, file_path: str, sync_every: int = 256, sync_interval: float = 1.0):
+        """
+        打开任务清单，文件不存在时创建
+
+        Args:
+            file_path: 清单文件路径
+            sync_every: 每追加多少条记录fsync一次
+            sync_interval: 距上次fsync超过该秒数时也会fsync
+        """
+        self.file_path = file_path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        # key到原始记录行的映射，按需解析以减少内存占用
+        self._entries: Dict[str, str] = {}
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.corrupt_lines = 0
+
+        needs_newline = self._load()
+        directory = os.path.dirname(file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(file_path, 'a', encoding='utf-8')
+        if needs_newline:
+            # 上次运行在写记录时中断，补齐换行避免与新记录连在一起
+            self._file.write('\n')
+
+    def __enter__(self) -> 'JobManifest':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def keys(self) -> Iterator[str]:
+        """
+        按首次记录的顺序返回已完成项的key
+
+        Returns:
+            Iterator[str]: key迭代器
+        """
+        return iter(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        获取某项的完成记录
+
+        Args:
+            key: 任务项key
+
+        Returns:
+            Optional[Dict[str, Any]]: 完成记录，未完成时返回None
+        """
+        line = self._entries.get(key)
+        return json.loads(line) if line is not None else None
+
+    def record(self, key: str, **fields) -> None:
+        """
+        追加一项完成记录，同一key的后一条记录覆盖前一条
+
+        Args:
+            key: 任务项key
+            **fields: 记录字段，如path、sha256、size
+        """
+        line = json.dumps({'key': key, **fields}, ensure_ascii=False)
+        self._file.write(line + '\n')
+        self._entries[key] = line
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or \
+                time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def discard(self, key: str) -> None:
+        """
+        在内存中忽略某项的记录(如输出文件已丢失)，使其被重新处理
+
+        Args:
+            key: 任务项key
+        """
+        self._entries.pop(key, None)
+
+    def sync(self) -> None:
+        """将已追加的记录写入磁盘"""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        """同步并关闭清单文件"""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+    def _load(self) -> bool:
+        """
+        加载已有记录，跳过中断时写了一半的行
+
+        Returns:
+            bool: 文件末尾是否缺少换行
+        """
+        self._entries, self.corrupt_lines, needs_newline = _scan_manifest(self.file_path)
+        return needs_newline
+
+
+def _scan_manifest(file_path: str) -> Tuple[Dict[str, str], int, bool]:
+    """
+    只读地解析清单文件，跳过中断时写了一半的行
+
+    Args:
+        file_path: 清单文件路径
+
+    Returns:
+        Tuple[Dict[str, str], int, bool]: key到原始记录行的映射、不完整的行数、文件末尾是否缺少换行
+    """
+    entries: Dict[str, str] = {}
+    corrupt_lines = 0
+    if not os.path.exists(file_path):
+        return entries, corrupt_lines, False
+
+    last_line = ''
+    with open(file_path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            last_line = line
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                key = json.loads(line)['key']
+            except (ValueError, KeyError, TypeError):
+                corrupt_lines += 1
+                continue
+            entries[key] = line
+
+    if corrupt_lines:
+        logger.warning(f"任务清单中有 {corrupt_lines} 行不完整，对应的项将重新处理: {file_path}")
+    return entries, corrupt_lines, bool(last_line) and not last_line.endswith('\n')
+
+
+def read_manifest(file_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    只读地加载清单中的全部记录，不会创建或修改文件，可用于读取其他进程正在写入的清单
+
+    Args:
+        file_path: 清单文件路径
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 按首次记录顺序排列的key到完成记录的映射
+    """
+    entries, _, _ = _scan_manifest(file_path)
+    return {key: json.loads(line) for key, line in entries.items()}
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+负载压缩编解码模块
+使用带预置字典的deflate压缩内容，再以Base45编码，使结果保持在字母数字模式
+"""
+
+import zlib
+from typing import Dict, Any, Tuple
+
+from . import capacity_planner
+
+
+# 压缩内容的前缀，全部字符都在字母数字模式字符集中
+PREFIX = 'QZ1:'
+
+# Base45字符集(RFC 9285)，与QR码字母数字模式字符集相同
+BASE45_CHARSET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:'
+BASE45_INDEX = {char: index for index, char in enumerate(BASE45_CHARSET)}
+
+# 预置字典：JSON类负载中的常见片段，越常见的放在越后面
+PRESET_DICTIONARY = (
+    b'BEGIN:VCARD\nVERSION:3.0\nFN:TEL:EMAIL:END:VCARD'
+    b'https://www.http://.com/.cn/.org/index.html?id=&page='
+    b'"description":"created_at":"updated_at":"timestamp":"version":"status":'
+    b'"quantity":"price":"amount":"currency":"CNY""USD""unit":"code":"sku":'
+    b'"batch":"serial":"date":"time":"url":"email":"phone":"address":'
+    b'"items":[{"value":"data":"type":"name":"id":'
+    b'true,false,null,":"","}]}'
+)
+
+# 压缩后的版本至少减少该值才采用压缩结果
+MIN_VERSION_GAIN = 1
+
+
+def base45_encode(data: bytes) -> str:
+    """
+    Base45编码
+
+    Args:
+        data: 原始字节
+
+    Returns:
+        str: Base45字符串
+    """
+    chars = []
+    for i in range(0, len(data) - 1, 2):
+        value = data[i] * 256 + data[i + 1]
+        value, c0 = divmod(value, 45)
+        c2, c1 = divmod(value, 45)
+        chars.extend((BASE45_CHARSET[c0], BASE45_CHARSET[c1], BASE45_CHARSET[c2]))
+    if len(data) % 2:
+        c1, c0 = divmod(data[-1], 45)
+        chars.extend((BASE45_CHARSET[c0], BASE45_CHARSET[c1]))
+    return ''.join(chars)
+
+
+def base45_decode(text: str) -> bytes:
+    """
+    Base45解码
+
+    Args:
+        text: Base45字符串
+
+    Returns:
+        bytes: 原始字节
+
+    Raises:
+        ValueError: 当字符串不是有效的Base45编码时
+    """
+    try:
+        values = [BASE45_INDEX[char] for char in text]
+    except KeyError as e:
+        raise ValueError(f"无效的Base45字符: {e}")
+    if len(values) % 3 == 1:
+        raise ValueError("无效的Base45长度")
+
+    data = bytearray()
+    for i in range(0, len(values), 3):
+        chunk = values[i:i + 3]
+        if len(chunk) == 3:
+            value = chunk[0] + chunk[1] * 45 + chunk[2] * 2025
+            if value > 0xFFFF:
+                raise ValueError("无效的Base45数据")
+            data.extend(divmod(value, 256))
+        else:
+            value = chunk[0] + chunk[1] * 45
+            if value > 0xFF:
+                raise ValueError("无效的Base45数据")
+            data.append(value)
+    return bytes(data)
+
+
+def compress_payload(content: str) -> str:
+    """
+    压缩内容并编码为带前缀的Base45字符串
+
+    Args:
+        content: 原始内容
+
+    Returns:
+        str: 压缩后的负载
+    """
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, PRESET_DICTIONARY)
+    data = compressor.compress(content.encode('utf-8')) + compressor.flush()
+    return PREFIX + base45_encode(data)
+
+
+def decompress_payload(payload: str) -> str:
+    """
+    解压带前缀的负载，不是压缩负载时原样返回
+
+    Args:
+        payload: 解码得到的内容
+
+    Returns:
+        str: 解压后的内容
+    """
+    if not is_compressed(payload):
+        return payload
+    try:
+        decompressor = zlib.decompressobj(-15, PRESET_DICTIONARY)
+        data = decompressor.decompress(base45_decode(payload[len(PREFIX):])) + decompressor.flush()
+        if not decompressor.eof:
+            return payload
+        return data.decode('utf-8')
+    except (ValueError, zlib.error, UnicodeDecodeError):
+        # 恰好以前缀开头的普通内容
+        return payload
+
+
+def is_compressed(payload: str) -> bool:
+    """
+    判断内容是否为压缩负载
+
+    Args:
+        payload: 内容
+
+    Returns:
+        bool: 是否以压缩前缀开头
+    """
+    return payload.startswith(PREFIX)
+
+
+def estimate_version(content: str, error_correction: int) -> int:
+    """
+    估算内容所需的最小QR码版本
+
+    Args:
+        content: 内容
+        error_correction: 纠错级别常量
+
+    Returns:
+        int: 最小版本，超出版本40容量时返回41
+    """
+    return capacity_planner.minimal_version(content, error_correction)
+
+
+def compress_if_smaller(content: str, error_correction: int) -> Tuple[str, Dict[str, Any]]:
+    """
+    仅在压缩能降低QR码版本时采用压缩结果
+
+    Args:
+        content: 格式化后的内容
+        error_correction: 纠错级别常量
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: (最终负载, 压缩信息)，压缩信息包含compressed、
+            version_before、version_after、size_before和size_after
+    """
+    compressed = compress_payload(content)
+    version_before = estimate_version(content, error_correction)
+    version_after = estimate_version(compressed, error_correction)
+
+    use_compressed = version_before - version_after >= MIN_VERSION_GAIN
+    payload = compressed if use_compressed else content
+    info = {
+        'compressed': use_compressed,
+        'version_before': version_before,
+        'version_after': version_after if use_compressed else version_before,
+        'size_before': len(content.encode('utf-8')),
+        'size_after': len(payload.encode('utf-8'))
+    }
+    return payload, info
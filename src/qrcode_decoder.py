@@ -5,11 +5,27 @@ QR码解码核心模块
 支持从本地图片和网络图片解码
 """
 
-from pyzbar.pyzbar import decode
 from PIL import Image
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Union
+import os
+import json
+import threading
 import requests
 from io import BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .decode_cache import DecodeCache
+from .grid_decoder import GridDecoder, GridDecodeError
+from .decoder_backends import DecoderBackend, create_backend
+from .structured_append import StructuredAppendAssembler
+from .payload_codec import decompress_payload, is_compressed
+from .raw_result import RawResult
+from .utils import logger
+
+
+class DecodeCancelledError(Exception):
+    """解码请求被取消"""
 
 
 class QRCodeDecoder:
@@ -18,26 +34,64 @@ class QRCodeDecoder:
     支持从本地图片和网络图片解码
     """
     
-    def decode_from_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def __init__(self, cache: Optional[DecodeCache] = None,
+                 backend: Union[str, DecoderBackend] = 'pyzbar',
+                 decompress: bool = True):
+        """
+        初始化QR码解码器
+        
+        Args:
+            cache: 解码结果缓存，仅对decode_from_file生效，None表示不使用缓存
+            backend: 解码后端名称('pyzbar', 'opencv', 'grid')或后端实例(如BackendSelector)
+            decompress: 是否自动解压QRCodeGenerator压缩的内容
+            
+        Raises:
+            ImportError: 当解码后端的依赖未安装时
+        """
+        self.cache = cache
+        self.backend = create_backend(backend)
+        self.decompress = decompress
+    
+    def get_settings(self) -> Dict[str, Any]:
+        """
+        获取影响解码结果的设置，用于判断缓存是否失效
+        
+        Returns:
+            Dict[str, Any]: 解码器设置
+        """
+        return {'engine': self.backend.name, 'decompress': self.decompress}
+    
+    def decode_from_file(self, file_path: str,
+                         raw: bool = False) -> List[Union[Dict[str, Any], RawResult]]:
         """
         从本地图片文件解码QR码
         
         Args:
             file_path: 本地图片文件路径
+            raw: 是否返回RawResult对象(负载为原始字节，不解压，不使用缓存)，只支持grid后端
             
         Returns:
-            List[Dict[str, Any]]: 解码结果列表，每个结果包含类型和数据
+            List[Union[Dict[str, Any], RawResult]]: 解码结果列表，每个结果包含类型和数据
             
         Raises:
             FileNotFoundError: 当文件不存在时
-            ValueError: 当文件不是有效的图片时
+            ValueError: 当文件不是有效的图片，或后端不支持原始模式时
         """
+        if raw:
+            self._check_binary_safe()
+        
         try:
+            # 启用缓存时按文件内容复用解码结果
+            if self.cache is not None and not raw:
+                settings = json.dumps(self.get_settings(), sort_keys=True)
+                return self.cache.decode_file(
+                    file_path, settings, lambda data: self._decode_image(Image.open(BytesIO(data))))
+            
             # 打开图片
             img = Image.open(file_path)
             
             # 解码QR码
-            results = self._decode_image(img)
+            results = self._decode_image(img, raw)
             
             return results
         except FileNotFoundError:
@@ -45,80 +99,524 @@ class QRCodeDecoder:
         except Exception as e:
             raise ValueError(f"无法解码图片: {e}")
     
-    def decode_from_url(self, url: str) -> List[Dict[str, Any]]:
+    def iter_decode_pages(self, file_path: str, workers: int = 0) -> Iterator[Dict[str, Any]]:
+        """
+        逐页解码多页图片(如多页TIFF、动态GIF)，按页序返回结果
+        
+        Args:
+            file_path: 本地图片文件路径
+            workers: 并行解码的线程数，0表示在当前线程中逐页解码
+            
+        Returns:
+            Iterator[Dict[str, Any]]: 每页的解码结果，包含page和results字段
+            
+        Raises:
+            FileNotFoundError: 当文件不存在时
+            ValueError: 当文件不是有效的图片时
+        """
+        if workers < 0:
+            raise ValueError(f"无效的线程数: {workers}")
+        
+        if not workers:
+            for page, frame in iter_image_pages(file_path):
+                yield {'page': page, 'results': self._decode_page(frame)}
+            return
+        
+        page_count = get_page_count(file_path)
+        
+        # 每个任务自行打开文件并定位到对应页，限制同时在处理的页数
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = deque()
+            for page in range(page_count):
+                pending.append((page, executor.submit(self._decode_file_page, file_path, page)))
+                if len(pending) >= workers * 2:
+                    done_page, future = pending.popleft()
+                    yield {'page': done_page, 'results': future.result()}
+            
+            while pending:
+                done_page, future = pending.popleft()
+                yield {'page': done_page, 'results': future.result()}
+    
+    def decode_from_url(self, url: str,
+                        cancel_event: Optional[threading.Event] = None) -> List[Dict[str, Any]]:
         """
         从网络图片URL解码QR码
         
         Args:
             url: 网络图片URL
+            cancel_event: 取消事件，设置后中止下载
             
         Returns:
             List[Dict[str, Any]]: 解码结果列表，每个结果包含类型和数据
             
         Raises:
             requests.exceptions.RequestException: 当网络请求失败时
+            DecodeCancelledError: 当请求被取消时
             ValueError: 当URL不是有效的图片时
         """
+        # 获取网络图片
+        data = self.download_image(url, cancel_event)
+        
         try:
-            # 发送网络请求获取图片
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
             # 从响应中读取图片
-            img = Image.open(BytesIO(response.content))
+            img = Image.open(BytesIO(data))
             
             # 解码QR码
             results = self._decode_image(img)
             
             return results
-        except requests.exceptions.RequestException as e:
-            raise
         except Exception as e:
             raise ValueError(f"无法解码网络图片: {e}")
     
-    def decode_from_image(self, img: Image.Image) -> List[Dict[str, Any]]:
+    def download_image(self, url: str, cancel_event: Optional[threading.Event] = None,
+                       timeout: float = 10, chunk_size: int = 65536) -> bytes:
+        """
+        分块下载网络图片，每块之间检查取消事件
+        
+        Args:
+            url: 网络图片URL
+            cancel_event: 取消事件，设置后中止下载
+            timeout: 连接和读取超时时间(秒)
+            chunk_size: 每次读取的字节数
+            
+        Returns:
+            bytes: 图片内容
+            
+        Raises:
+            requests.exceptions.RequestException: 当网络请求失败时
+            DecodeCancelledError: 当请求被取消时
+        """
+        with requests.get(url, timeout=timeout, stream=True) as response:
+            response.raise_for_status()
+            
+            buffer = BytesIO()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise DecodeCancelledError("下载已取消")
+                buffer.write(chunk)
+            
+            return buffer.getvalue()
+    
+    def decode_from_image(self, img: Image.Image,
+                          raw: bool = False) -> List[Union[Dict[str, Any], RawResult]]:
         """
         从PIL Image对象解码QR码
         
+        raw模式下返回RawResult对象：data为负载字节的memoryview，支持二进制负载；
+        text、rect和polygon在首次访问时才生成；压缩负载不会自动解压。
+        zbar会转码非UTF-8负载，OpenCV只返回文本，因此raw模式只支持字节与符号一致的grid后端。
+        
         Args:
             img: PIL Image对象
+            raw: 是否返回RawResult对象
+            
+        Returns:
+            List[Union[Dict[str, Any], RawResult]]: 解码结果列表，每个结果包含类型和数据
+            
+        Raises:
+            ValueError: 当raw为True而后端不能返回原始字节时
+        """
+        if raw:
+            self._check_binary_safe()
+        return self._decode_image(img, raw)
+    
+    def decode_generated(self, img: Image.Image, box_size: Optional[int] = None,
+                         border: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        解码本程序生成的QR码图像，优先按已知网格直接采样，失败时回退到pyzbar
+        
+        Args:
+            img: PIL Image对象
+            box_size: 生成时每个格子的像素大小，None表示从图像推断
+            border: 生成时的边框格子数，None表示从图像推断
             
         Returns:
             List[Dict[str, Any]]: 解码结果列表，每个结果包含类型和数据
         """
-        return self._decode_image(img)
+        try:
+            return self._postprocess(GridDecoder(box_size, border).decode(img))
+        except GridDecodeError:
+            return self._decode_image(img)
     
-    def _decode_image(self, img: Image.Image) -> List[Dict[str, Any]]:
+    def decode_structured_append(self, sources: List[Any],
+                                 assembler: Optional[StructuredAppendAssembler] = None) -> Dict[str, Any]:
+        """
+        解码一组图片并重组其中的结构化追加QR码
+        
+        只有能报告结构化追加头的后端(如grid)返回的结果参与重组。pyzbar和OpenCV不报告头信息
+        (zbar会自行合并同一张图片中的完整分组)，使用这类后端时每张图片先用grid后端解码，
+        grid解不出时才使用本解码器的后端，其结果作为独立内容返回并记录警告。
+        grid只适用于本程序生成的无畸变图像，拍摄或扫描得到的分组无法跨图片重组。
+        
+        Args:
+            sources: 图片文件路径或PIL Image对象列表
+            assembler: 结构化追加重组器，传入同一实例可跨多次调用缓存未集齐的分组
+            
+        Returns:
+            Dict[str, Any]: 包含messages(重组后的完整内容)、standalone(普通QR码结果)
+                和pending(未集齐的分组)
+        """
+        if assembler is None:
+            assembler = StructuredAppendAssembler()
+        
+        # 后端不报告结构化追加头时改用grid后端读取头信息
+        header_decoder = self
+        if not self.backend.reports_structured_append:
+            header_decoder = QRCodeDecoder(backend='grid', decompress=self.decompress)
+        
+        messages = []
+        standalone = []
+        unassembled = 0
+        for source in sources:
+            if isinstance(source, str):
+                results = header_decoder.decode_from_file(source)
+                if not results and header_decoder is not self:
+                    results = self.decode_from_file(source)
+                    unassembled += len(results)
+            else:
+                results = header_decoder._decode_image(source)
+                if not results and header_decoder is not self:
+                    results = self._decode_image(source)
+                    unassembled += len(results)
+            
+            standalone.extend(result for result in results if 'structured_append' not in result)
+            messages.extend(assembler.add(results))
+        
+        if unassembled:
+            logger.warning(f"解码后端 {self.backend.name} 不报告结构化追加头，"
+                           f"{unassembled} 个结果无法参与重组，作为独立内容返回")
+        
+        return {
+            'messages': messages,
+            'standalone': standalone,
+            'pending': assembler.get_pending()
+        }
+    
+    def decode_region(self, img: Image.Image, box: Tuple[int, int, int, int]) -> List[Dict[str, Any]]:
+        """
+        从PIL Image对象的指定区域解码QR码
+        
+        Args:
+            img: PIL Image对象
+            box: 区域坐标(left, top, right, bottom)
+            
+        Returns:
+            List[Dict[str, Any]]: 解码结果列表，坐标已映射回原图
+        """
+        left, top = box[0], box[1]
+        results = self._decode_image(img.crop(box))
+        
+        # 将区域内坐标映射回原图
+        for result in results:
+            _offset_result(result, left, top)
+        
+        return results
+    
+    def decode_tiled(self, img: Image.Image, tile_size: int = 2048, overlap: int = 256,
+                     workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        将大图切分为相互重叠的分块并行解码，适用于高分辨率扫描件
+        
+        Args:
+            img: PIL Image对象
+            tile_size: 分块边长(像素)
+            overlap: 相邻分块的重叠宽度(像素)，应不小于最大QR码的边长
+            workers: 并行解码的线程数，默认使用CPU核心数
+            
+        Returns:
+            List[Dict[str, Any]]: 合并去重后的解码结果列表，坐标为原图坐标
+            
+        Raises:
+            ValueError: 当分块参数无效时
+        """
+        if tile_size < 1:
+            raise ValueError(f"无效的分块大小: {tile_size}")
+        if overlap < 0 or overlap >= tile_size:
+            raise ValueError(f"无效的重叠宽度: {overlap}，需小于分块大小{tile_size}")
+        
+        # pyzbar内部使用灰度图，提前转换可减少每个分块的转换开销
+        if img.mode != 'L':
+            img = img.convert('L')
+        else:
+            img.load()
+        
+        boxes = _tile_boxes(img.size, tile_size, overlap)
+        if len(boxes) == 1:
+            return self._decode_image(img)
+        
+        with ThreadPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            tile_results = executor.map(lambda box: self.decode_region(img, box), boxes)
+            results = [result for results in tile_results for result in results]
+        
+        return _merge_results(results)
+    
+    def _decode_file_page(self, file_path: str, page: int) -> List[Dict[str, Any]]:
+        """
+        内部方法：打开图片文件并解码指定页
+        
+        Args:
+            file_path: 本地图片文件路径
+            page: 页序号(从0开始)
+            
+        Returns:
+            List[Dict[str, Any]]: 该页的解码结果列表
+            
+        Raises:
+            FileNotFoundError: 当文件不存在时
+            ValueError: 当文件或该页不是有效的图片时
+        """
+        try:
+            img = Image.open(file_path)
+        except FileNotFoundError:
+            raise
+        except Exception as e:
+            raise ValueError(f"无法打开图片: {e}")
+        
+        # 与逐页解码的错误信息保持一致
+        with img:
+            try:
+                img.seek(page)
+            except Exception as e:
+                raise ValueError(f"无法读取第{page + 1}页: {e}")
+            return self._decode_page(img)
+    
+    def _decode_page(self, frame: Image.Image) -> List[Dict[str, Any]]:
+        """
+        内部方法：解码单页图像
+        
+        Args:
+            frame: 页图像
+            
+        Returns:
+            List[Dict[str, Any]]: 该页的解码结果列表
+        """
+        try:
+            return self._decode_image(frame)
+        except Exception as e:
+            raise ValueError(f"无法解码图片: {e}")
+    
+    def _decode_image(self, img: Image.Image,
+                      raw: bool = False) -> List[Union[Dict[str, Any], RawResult]]:
         """
         内部方法：从Image对象解码QR码
         
         Args:
             img: PIL Image对象
+            raw: 是否返回RawResult对象
             
         Returns:
-            List[Dict[str, Any]]: 解码结果列表，每个结果包含类型和数据
+            List[Union[Dict[str, Any], RawResult]]: 解码结果列表，每个结果包含类型和数据
         """
-        # 确保图片是RGB模式
-        if img.mode != 'RGB':
+        # 确保图片是RGB或灰度模式
+        if img.mode not in ('RGB', 'L'):
             img = img.convert('RGB')
         
-        # 使用pyzbar解码
-        decoded_objects = decode(img)
-        
-        # 格式化结果
-        results = []
-        for obj in decoded_objects:
-            result = {
-                'type': obj.type,
-                'data': obj.data.decode('utf-8'),
-                'rect': {
-                    'left': obj.rect.left,
-                    'top': obj.rect.top,
-                    'width': obj.rect.width,
-                    'height': obj.rect.height
-                },
-                'polygon': [{'x': point.x, 'y': point.y} for point in obj.polygon]
-            }
-            results.append(result)
+        # 原始结果保持负载字节不变，不做解压等文本后处理
+        if raw:
+            return self.backend.decode(img, raw=True)
+        
+        # 使用解码后端解码
+        return self._postprocess(self.backend.decode(img))
+    
+    def _check_binary_safe(self) -> None:
+        """
+        内部方法：检查后端能否返回与符号一致的原始字节
+        
+        Raises:
+            ValueError: 当后端会转码或只能返回文本时
+        """
+        if not self.backend.binary_safe:
+            raise ValueError(f"解码后端 {self.backend.name} 不能返回原始字节，原始模式需使用grid后端")
+    
+    def _postprocess(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        内部方法：对解码结果进行后处理，按需解压压缩内容
         
+        Args:
+            results: 解码后端返回的结果列表
+            
+        Returns:
+            List[Dict[str, Any]]: 处理后的结果列表
+        """
+        if self.decompress:
+            for result in results:
+                if is_compressed(result['data']):
+                    data = decompress_payload(result['data'])
+                    if data != result['data']:
+                        result['data'] = data
+                        result['compressed'] = True
         return results
+
+
+def get_page_count(file_path: str) -> int:
+    """
+    获取图片文件的页数(帧数)
+    
+    Args:
+        file_path: 本地图片文件路径
+        
+    Returns:
+        int: 页数，单页图片返回1
+        
+    Raises:
+        FileNotFoundError: 当文件不存在时
+        ValueError: 当文件不是有效的图片时
+    """
+    try:
+        with Image.open(file_path) as img:
+            return getattr(img, 'n_frames', 1)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise ValueError(f"无法打开图片: {e}")
+
+
+def iter_image_pages(file_path: str) -> Iterator[Tuple[int, Image.Image]]:
+    """
+    惰性遍历图片文件的每一页，同一时间只加载一页
+    
+    Args:
+        file_path: 本地图片文件路径
+        
+    Returns:
+        Iterator[Tuple[int, Image.Image]]: (页序号, 页图像)迭代器
+        
+    Raises:
+        FileNotFoundError: 当文件不存在时
+        ValueError: 当文件不是有效的图片时
+    """
+    try:
+        img = Image.open(file_path)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise ValueError(f"无法打开图片: {e}")
+    
+    with img:
+        try:
+            page_count = getattr(img, 'n_frames', 1)
+        except Exception as e:
+            raise ValueError(f"无法打开图片: {e}")
+        for page in range(page_count):
+            try:
+                img.seek(page)
+            except Exception as e:
+                raise ValueError(f"无法读取第{page + 1}页: {e}")
+            yield page, img
+
+
+def _tile_boxes(image_size: Tuple[int, int], tile_size: int,
+                overlap: int) -> List[Tuple[int, int, int, int]]:
+    """
+    计算覆盖整张图片的重叠分块坐标
+    
+    Args:
+        image_size: 图片尺寸(width, height)
+        tile_size: 分块边长
+        overlap: 相邻分块的重叠宽度
+        
+    Returns:
+        List[Tuple[int, int, int, int]]: 分块坐标(left, top, right, bottom)列表
+    """
+    def starts(length: int) -> List[int]:
+        if length <= tile_size:
+            return [0]
+        step = tile_size - overlap
+        positions = list(range(0, length - tile_size, step))
+        # 最后一个分块与图片边缘对齐
+        positions.append(length - tile_size)
+        return positions
+    
+    width, height = image_size
+    return [(left, top, min(left + tile_size, width), min(top + tile_size, height))
+            for top in starts(height) for left in starts(width)]
+
+
+def _bounding_box(result: Dict[str, Any]) -> Tuple[int, int, int, int]:
+    """
+    计算解码结果多边形的边界框
+    
+    Args:
+        result: 解码结果
+        
+    Returns:
+        Tuple[int, int, int, int]: 边界框(left, top, right, bottom)
+    """
+    points = result['polygon']
+    if not points:
+        rect = result['rect']
+        return (rect['left'], rect['top'],
+                rect['left'] + rect['width'], rect['top'] + rect['height'])
+    xs = [point['x'] for point in points]
+    ys = [point['y'] for point in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _overlap_ratio(a: Tuple[int, int, int, int], b: Tuple[int, int, int, int]) -> float:
+    """
+    计算两个边界框的交集占较小边界框面积的比例
+    
+    Args:
+        a: 边界框a
+        b: 边界框b
+        
+    Returns:
+        float: 重叠比例(0-1)
+    """
+    width = min(a[2], b[2]) - max(a[0], b[0])
+    height = min(a[3], b[3]) - max(a[1], b[1])
+    if width <= 0 or height <= 0:
+        return 0.0
+    smaller = min((a[2] - a[0]) * (a[3] - a[1]), (b[2] - b[0]) * (b[3] - b[1]))
+    return width * height / smaller if smaller > 0 else 1.0
+
+
+def _merge_results(results: List[Dict[str, Any]],
+                   min_overlap: float = 0.5) -> List[Dict[str, Any]]:
+    """
+    合并分块解码结果，内容相同且位置重叠的结果只保留面积最大的一个
+    
+    Args:
+        results: 原图坐标下的解码结果列表
+        min_overlap: 判定为同一个QR码的最小重叠比例
+        
+    Returns:
+        List[Dict[str, Any]]: 去重后的解码结果列表
+    """
+    # 面积大的结果优先保留，被分块截断的不完整结果会被丢弃
+    def area(box: Tuple[int, int, int, int]) -> int:
+        return (box[2] - box[0]) * (box[3] - box[1])
+    
+    candidates = sorted(((result, _bounding_box(result)) for result in results),
+                        key=lambda item: area(item[1]), reverse=True)
+    
+    merged = []
+    for result, box in candidates:
+        if any(kept['data'] == result['data'] and _overlap_ratio(kept_box, box) >= min_overlap
+               for kept, kept_box in merged):
+            continue
+        merged.append((result, box))
+    
+    # 按从上到下、从左到右的顺序返回
+    merged.sort(key=lambda item: (item[1][1], item[1][0]))
+    return [result for result, _ in merged]
+
+
+def _offset_result(result: Dict[str, Any], dx: int, dy: int) -> Dict[str, Any]:
+    """
+    将解码结果中的坐标平移指定偏移量
+    
+    Args:
+        result: 解码结果
+        dx: 水平偏移量
+        dy: 垂直偏移量
+        
+    Returns:
+        Dict[str, Any]: 平移后的解码结果(原地修改)
+    """
+    result['rect']['left'] += dx
+    result['rect']['top'] += dy
+    for point in result['polygon']:
+        point['x'] += dx
+        point['y'] += dy
+    return result
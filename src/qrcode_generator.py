@@ -5,9 +5,18 @@ QR码生成核心模块
 支持多种内容类型和自定义选项
 """
 
+import os
 import qrcode
 from PIL import Image
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union
+from concurrent.futures import ProcessPoolExecutor
+
+from . import capacity_planner
+from . import structured_append
+from . import payload_codec
+from . import raster_writer
+from . import styled_renderer
+from .utils import logger
 
 
 class QRCodeGenerator:
@@ -31,26 +40,136 @@ class QRCodeGenerator:
         """初始化QR码生成器"""
         pass
     
-    def generate_qr_code(self, content: str, content_type: str = 'text', 
+    def generate_qr_code(self, content: Union[str, bytes], content_type: str = 'text', 
                         size: int = 10, error_correction: str = 'M', 
-                        box_size: int = 10, border: int = 4) -> Image.Image:
+                        box_size: int = 10, border: int = 4,
+                        compress: bool = False, fill_color: str = 'black',
+                        back_color: str = 'white', module_shape: str = 'square',
+                        logo: Optional[str] = None, logo_ratio: float = 0.2) -> Image.Image:
         """
         生成QR码图像
         
         Args:
-            content: 要编码的内容
+            content: 要编码的内容，bytes按原样以字节模式(或能表示时的数字、字母数字模式)编码，
+                适用于二进制负载，此时content_type须为'text'且不支持压缩
             content_type: 内容类型，支持'text', 'url', 'contact'
-            size: QR码版本(1-40)，决定二维码大小
+            size: QR码最小版本(1-40)，内容放不下时使用能容纳内容的最小版本
             error_correction: 纠错级别，支持'L', 'M', 'Q', 'H'
             box_size: 每个格子的像素大小
             border: 边框格子数
+            compress: 是否压缩内容，仅在能降低版本时生效，解码时由QRCodeDecoder自动解压
+            fill_color: 前景色，颜色名称或十六进制值
+            back_color: 背景色
+            module_shape: 模块形状，支持'square', 'rounded', 'dot'，定位图案始终为方块
+            logo: 居中logo图片路径，logo四周清空一圈模块作为静区，必要时自动提高纠错级别
+            logo_ratio: logo边长占符号边长的比例(0-0.4)
             
         Returns:
-            PIL.Image.Image: 生成的QR码图像
+            PIL.Image.Image: 生成的QR码图像，使用样式时为RGB模式
             
         Raises:
             ValueError: 当参数无效时
         """
+        if not styled_renderer.is_default_style(fill_color, back_color, module_shape, logo):
+            return self._generate_styled(content, content_type, size, error_correction, box_size,
+                                         border, compress, fill_color, back_color, module_shape,
+                                         logo, logo_ratio)
+        
+        qr = self._make_qr(content, content_type, size, error_correction, box_size, border, compress)
+        
+        # 生成图像
+        img = qr.make_image(fill_color="black", back_color="white")
+        
+        return img
+    
+    def _generate_styled(self, content: Union[str, bytes], content_type: str, size: int,
+                         error_correction: str, box_size: int, border: int, compress: bool,
+                         fill_color: str, back_color: str, module_shape: str,
+                         logo: Optional[str], logo_ratio: float) -> Image.Image:
+        """
+        按样式生成QR码图像，有logo时提高纠错级别直到能恢复被遮挡的模块
+        
+        Returns:
+            PIL.Image.Image: RGB模式的QR码图像
+            
+        Raises:
+            ValueError: 当参数无效或logo过大时
+        """
+        if module_shape not in styled_renderer.MODULE_SHAPES:
+            raise ValueError(f"无效的模块形状: {module_shape}，支持{styled_renderer.MODULE_SHAPES}")
+        if logo and not 0 < logo_ratio <= 0.4:
+            raise ValueError(f"无效的logo比例: {logo_ratio}，支持0-0.4")
+        
+        qr = self._make_qr(content, content_type, size, error_correction, box_size, border, compress)
+        
+        # 提高纠错级别可能使版本增大，重新检查直到级别稳定
+        level = error_correction
+        while logo:
+            required = styled_renderer.required_error_correction(
+                len(qr.modules), logo_ratio, 1, level)
+            if required is None:
+                raise ValueError("logo过大，纠错级别H也无法恢复被遮挡的模块，请减小logo_ratio")
+            if required == level:
+                break
+            logger.debug(f"为容纳logo将纠错级别从{level}提高到{required}")
+            level = required
+            qr = self._make_qr(content, content_type, size, level, box_size, border, compress)
+        
+        return styled_renderer.render_styled(qr.modules, box_size, border, fill_color, back_color,
+                                             module_shape, logo, logo_ratio)
+    
+    def generate_to_file(self, content: Union[str, bytes], file_path: str, content_type: str = 'text',
+                         size: int = 10, error_correction: str = 'M',
+                         box_size: int = 10, border: int = 4,
+                         image_format: Optional[str] = None,
+                         compress: bool = False) -> None:
+        """
+        生成QR码并逐行写出到文件，不在内存中创建完整图像，适合超大尺寸输出
+        
+        输出像素与generate_qr_code后save_qr_code的结果相同。
+        
+        Args:
+            content: 要编码的内容，支持bytes
+            file_path: 保存路径
+            content_type: 内容类型，支持'text', 'url', 'contact'
+            size: QR码版本(1-40)
+            error_correction: 纠错级别，支持'L', 'M', 'Q', 'H'
+            box_size: 每个格子的像素大小
+            border: 边框格子数
+            image_format: 图像格式，支持'PNG'和'TIFF'，默认从文件扩展名推断
+            compress: 是否压缩内容
+            
+        Raises:
+            ValueError: 当参数无效或格式不支持流式写出时
+        """
+        if not image_format:
+            image_format = file_path.split('.')[-1].upper()
+        if image_format.upper() not in raster_writer.STREAM_FORMATS:
+            raise ValueError(f"不支持流式写出的图像格式: {image_format}，支持{raster_writer.STREAM_FORMATS}")
+        
+        qr = self._make_qr(content, content_type, size, error_correction, box_size, border, compress)
+        raster_writer.write_raster(qr.modules, file_path, image_format, box_size, border)
+    
+    def _make_qr(self, content: Union[str, bytes], content_type: str, size: int, error_correction: str,
+                 box_size: int, border: int, compress: bool) -> qrcode.QRCode:
+        """
+        验证参数并构造已完成编码的QR码对象
+        
+        Args:
+            content: 要编码的内容
+            content_type: 内容类型
+            size: QR码版本(1-40)
+            error_correction: 纠错级别
+            box_size: 每个格子的像素大小
+            border: 边框格子数
+            compress: 是否压缩内容
+            
+        Returns:
+            qrcode.QRCode: 已生成模块矩阵的QR码对象
+            
+        Raises:
+            ValueError: 当参数无效或内容过长时
+        """
         # 验证参数
         if error_correction not in self.ERROR_CORRECTION:
             raise ValueError(f"无效的纠错级别: {error_correction}，支持{L, M, Q, H}")
@@ -59,24 +178,105 @@ class QRCodeGenerator:
             raise ValueError(f"无效的尺寸: {size}，支持1-40")
         
         # 格式化内容
-        formatted_content = self._format_content(content, content_type)
+        formatted_content = self._format_content(content, content_type, compress, error_correction)
+        
+        # 查表确定版本：不小于size且能容纳内容的最小版本，避免逐版本试编码
+        segments = capacity_planner.split_segments(formatted_content)
+        plan = capacity_planner.plan(segments, error_correction, size)
+        if not plan['fits']:
+            raise ValueError("内容过长，超出版本40的容量，可使用generate_structured_append分割为多个QR码")
         
         # 创建QR码对象
         qr = qrcode.QRCode(
-            version=size,
+            version=plan['version'],
             error_correction=self.ERROR_CORRECTION[error_correction],
             box_size=box_size,
             border=border,
         )
         
-        # 添加内容
-        qr.add_data(formatted_content)
-        qr.make(fit=True)
+        # 添加规划时使用的同一组分段，编码结果与规划的版本一致
+        for segment in segments:
+            qr.add_data(segment)
+        qr.make(fit=False)
         
-        # 生成图像
-        img = qr.make_image(fill_color="black", back_color="white")
+        return qr
+    
+    def plan_capacity(self, content: Union[str, bytes], content_type: str = 'text', size: int = 1,
+                      error_correction: str = 'M', box_size: int = 10, border: int = 4,
+                      compress: bool = False) -> Dict[str, Any]:
+        """
+        不生成图像，查表得到内容所需的版本、剩余容量和图像尺寸
         
-        return img
+        Args:
+            content: 要编码的内容，支持bytes
+            content_type: 内容类型，支持'text', 'url', 'contact'
+            size: 版本下限(1-40)
+            error_correction: 纠错级别，支持'L', 'M', 'Q', 'H'
+            box_size: 每个格子的像素大小
+            border: 边框格子数
+            compress: 是否压缩内容
+            
+        Returns:
+            Dict[str, Any]: capacity_planner.plan的结果
+            
+        Raises:
+            ValueError: 当参数无效时
+        """
+        if error_correction not in self.ERROR_CORRECTION:
+            raise ValueError(f"无效的纠错级别: {error_correction}，支持{self.get_error_correction_levels()}")
+        
+        formatted_content = self._format_content(content, content_type, compress, error_correction)
+        return capacity_planner.plan(formatted_content, error_correction, size, box_size, border)
+    
+    def generate_structured_append(self, content: str, content_type: str = 'text',
+                                   size: int = 10, error_correction: str = 'M',
+                                   box_size: int = 10, border: int = 4,
+                                   workers: Optional[int] = None) -> List[Image.Image]:
+        """
+        将内容分割为多个结构化追加QR码(最多16个)，并行生成
+        
+        Args:
+            content: 要编码的内容
+            content_type: 内容类型，支持'text', 'url', 'contact'
+            size: 每个QR码的目标版本(1-40)
+            error_correction: 纠错级别，支持'L', 'M', 'Q', 'H'
+            box_size: 每个格子的像素大小
+            border: 边框格子数
+            workers: 并行生成的进程数，默认按符号数和CPU核心数确定，0表示在当前进程中生成
+            
+        Returns:
+            List[PIL.Image.Image]: 按序号排列的QR码图像列表
+            
+        Raises:
+            ValueError: 当参数无效或内容超过16个符号的容量时
+        """
+        if error_correction not in self.ERROR_CORRECTION:
+            raise ValueError(f"无效的纠错级别: {error_correction}，支持{self.get_error_correction_levels()}")
+        
+        if size < 1 or size > 40:
+            raise ValueError(f"无效的尺寸: {size}，支持1-40")
+        
+        formatted_content = self._format_content(content, content_type)
+        level = self.ERROR_CORRECTION[error_correction]
+        
+        # 按目标版本的容量分割内容
+        capacity = structured_append.symbol_capacity(size, level)
+        chunks = structured_append.split_content(formatted_content, capacity)
+        if len(chunks) > structured_append.MAX_SYMBOLS:
+            raise ValueError(f"内容过长，版本{size}需要{len(chunks)}个QR码，"
+                             f"最多支持{structured_append.MAX_SYMBOLS}个")
+        
+        parity = structured_append.compute_parity(formatted_content.encode('utf-8'))
+        tasks = [(chunk, index, len(chunks), parity, size, level, box_size, border)
+                 for index, chunk in enumerate(chunks)]
+        
+        if workers is None:
+            workers = min(len(tasks), os.cpu_count() or 1)
+        if workers <= 1 or len(tasks) == 1:
+            return [structured_append.render_symbol(task) for task in tasks]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(structured_append.render_symbol, tasks))
     
     def save_qr_code(self, img: Image.Image, file_path: str, 
                     image_format: Optional[str] = None, 
@@ -114,17 +314,53 @@ class QRCodeGenerator:
         else:
             img.save(file_path, format=save_format)
     
-    def _format_content(self, content: str, content_type: str) -> str:
+    def compress_content(self, content: str, content_type: str = 'text',
+                         error_correction: str = 'M') -> Dict[str, Any]:
+        """
+        计算压缩内容的效果，不生成图像
+        
+        Args:
+            content: 要编码的内容
+            content_type: 内容类型，支持'text', 'url', 'contact'
+            error_correction: 纠错级别，支持'L', 'M', 'Q', 'H'
+            
+        Returns:
+            Dict[str, Any]: 包含payload(最终负载)、compressed(是否采用压缩)、
+                version_before/version_after(压缩前后的最小版本)和size_before/size_after(字节数)
+        """
+        if error_correction not in self.ERROR_CORRECTION:
+            raise ValueError(f"无效的纠错级别: {error_correction}，支持{self.get_error_correction_levels()}")
+        
+        formatted_content = self._format_content(content, content_type)
+        payload, info = payload_codec.compress_if_smaller(
+            formatted_content, self.ERROR_CORRECTION[error_correction])
+        info['payload'] = payload
+        return info
+    
+    def _format_content(self, content: Union[str, bytes], content_type: str, compress: bool = False,
+                        error_correction: str = 'M') -> Union[str, bytes]:
         """
         根据内容类型格式化内容
         
         Args:
-            content: 原始内容
+            content: 原始内容，bytes原样返回
             content_type: 内容类型
+            compress: 是否压缩内容，仅在能降低版本时采用压缩结果
+            error_correction: 纠错级别，用于判断压缩是否降低版本
             
         Returns:
-            str: 格式化后的内容
+            Union[str, bytes]: 格式化后的内容
+            
+        Raises:
+            ValueError: 当bytes内容指定了非text类型或压缩时
         """
+        if isinstance(content, bytes):
+            if content_type != 'text':
+                raise ValueError(f"bytes内容只支持text类型，不支持{content_type}")
+            if compress:
+                raise ValueError("bytes内容不支持压缩")
+            return content
+        
         if content_type == 'url':
             # 确保URL格式正确
             if not content.startswith(('http://', 'https://')):
@@ -133,6 +369,9 @@ class QRCodeGenerator:
             # 格式化为vCard格式
             content = f"BEGIN:VCARD\nVERSION:3.0\nFN:{content}\nEND:VCARD"
         
+        if compress:
+            content, _ = payload_codec.compress_if_smaller(content, self.ERROR_CORRECTION[error_correction])
+        
         return content
     
     def get_supported_formats(self) -> list:
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式栅格写出模块
+直接由模块矩阵逐行生成PNG或基线TIFF扫描线，内存占用只与图像宽度有关
+"""
+
+import struct
+import zlib
+from typing import BinaryIO, Iterator, List, Sequence, Union
+
+import numpy as np
+
+
+# 流式写出支持的格式
+STREAM_FORMATS = ('PNG', 'TIFF', 'TIF')
+
+# PNG文件签名
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 压缩数据累积到该大小时写出一个IDAT块
+IDAT_CHUNK_SIZE = 1 << 16
+
+
+def iter_module_rows(modules: Sequence[Sequence[bool]], border: int) -> Iterator[np.ndarray]:
+    """
+    逐行返回带边框的模块行，True表示深色模块
+
+    Args:
+        modules: QR码模块矩阵(不含边框)
+        border: 边框格子数
+
+    Returns:
+        Iterator[np.ndarray]: 模块行迭代器
+    """
+    width = len(modules) + border * 2
+    blank = np.zeros(width, dtype=bool)
+    for _ in range(border):
+        yield blank
+    for row in modules:
+        line = np.zeros(width, dtype=bool)
+        line[border:border + len(row)] = row
+        yield line
+    for _ in range(border):
+        yield blank
+
+
+def pack_scanline(module_row: np.ndarray, box_size: int) -> bytes:
+    """
+    将一行模块放大为1位灰度扫描线，1表示白色，与PIL的'1'模式一致
+
+    Args:
+        module_row: 模块行，True表示深色模块
+        box_size: 每个格子的像素大小
+
+    Returns:
+        bytes: 按字节对齐的扫描线
+    """
+    return np.packbits(~np.repeat(module_row, box_size)).tobytes()
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """
+    构造PNG数据块
+
+    Args:
+        chunk_type: 块类型
+        data: 块数据
+
+    Returns:
+        bytes: 包含长度和CRC的完整数据块
+    """
+    return (struct.pack('>I', len(data)) + chunk_type + data +
+            struct.pack('>I', zlib.crc32(chunk_type + data)))
+
+
+def write_png(modules: Sequence[Sequence[bool]], output: BinaryIO,
+              box_size: int = 10, border: int = 4) -> None:
+    """
+    以1位灰度PNG流式写出QR码
+
+    Args:
+        modules: QR码模块矩阵(不含边框)
+        output: 可写的二进制文件对象
+        box_size: 每个格子的像素大小
+        border: 边框格子数
+    """
+    size = (len(modules) + border * 2) * box_size
+    output.write(PNG_SIGNATURE)
+    output.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', size, size, 1, 0, 0, 0, 0)))
+
+    compressor = zlib.compressobj()
+    pending = []
+    pending_size = 0
+    for module_row in iter_module_rows(modules, border):
+        # 每个模块行对应box_size条相同的扫描线，行首为过滤类型0
+        line = b'\x00' + pack_scanline(module_row, box_size)
+        for _ in range(box_size):
+            data = compressor.compress(line)
+            if data:
+                pending.append(data)
+                pending_size += len(data)
+        if pending_size >= IDAT_CHUNK_SIZE:
+            output.write(_png_chunk(b'IDAT', b''.join(pending)))
+            pending, pending_size = [], 0
+
+    pending.append(compressor.flush())
+    output.write(_png_chunk(b'IDAT', b''.join(pending)))
+    output.write(_png_chunk(b'IEND', b''))
+
+
+def write_tiff(modules: Sequence[Sequence[bool]], output: BinaryIO,
+               box_size: int = 10, border: int = 4) -> None:
+    """
+    以未压缩的基线双色TIFF流式写出QR码，每个模块行一个条带
+
+    Args:
+        modules: QR码模块矩阵(不含边框)
+        output: 可写的二进制文件对象
+        box_size: 每个格子的像素大小
+        border: 边框格子数
+    """
+    count = len(modules) + border * 2
+    size = count * box_size
+    row_bytes = (size + 7) // 8
+    strip_bytes = row_bytes * box_size
+
+    # 文件布局：文件头、IFD、条带偏移和字节数数组、分辨率、图像数据
+    entries = 12
+    ifd_offset = 8
+    offsets_offset = ifd_offset + 2 + entries * 12 + 4
+    counts_offset = offsets_offset + count * 4
+    resolution_offset = counts_offset + count * 4
+    data_offset = resolution_offset + 8
+
+    tags: List[tuple] = [
+        (256, 4, 1, size),                  # ImageWidth
+        (257, 4, 1, size),                  # ImageLength
+        (258, 3, 1, 1),                     # BitsPerSample
+        (259, 3, 1, 1),                     # Compression: 无压缩
+        (262, 3, 1, 1),                     # PhotometricInterpretation: BlackIsZero
+        (273, 4, count, offsets_offset),    # StripOffsets
+        (277, 3, 1, 1),                     # SamplesPerPixel
+        (278, 4, 1, box_size),              # RowsPerStrip
+        (279, 4, count, counts_offset),     # StripByteCounts
+        (282, 5, 1, resolution_offset),     # XResolution
+        (283, 5, 1, resolution_offset),     # YResolution
+        (296, 3, 1, 1),                     # ResolutionUnit: 无单位
+    ]
+
+    header = bytearray(b'II*\x00' + struct.pack('<I', ifd_offset))
+    header += struct.pack('<H', entries)
+    for tag, field_type, value_count, value in tags:
+        if field_type == 3 and value_count == 1:
+            header += struct.pack('<HHIHH', tag, field_type, value_count, value, 0)
+        else:
+            header += struct.pack('<HHII', tag, field_type, value_count, value)
+    header += struct.pack('<I', 0)
+    header += struct.pack(f'<{count}I', *(data_offset + i * strip_bytes for i in range(count)))
+    header += struct.pack(f'<{count}I', *([strip_bytes] * count))
+    header += struct.pack('<II', 1, 1)
+    output.write(bytes(header))
+
+    for module_row in iter_module_rows(modules, border):
+        output.write(pack_scanline(module_row, box_size) * box_size)
+
+
+def write_raster(modules: Sequence[Sequence[bool]], output: Union[str, BinaryIO],
+                 image_format: str = 'PNG', box_size: int = 10, border: int = 4) -> None:
+    """
+    按格式流式写出QR码到文件路径或文件对象
+
+    Args:
+        modules: QR码模块矩阵(不含边框)
+        output: 文件路径或可写的二进制文件对象
+        image_format: 图像格式，支持'PNG'和'TIFF'
+        box_size: 每个格子的像素大小
+        border: 边框格子数
+
+    Raises:
+        ValueError: 当图像格式不支持流式写出时
+    """
+    image_format = image_format.upper()
+    if image_format not in STREAM_FORMATS:
+        raise ValueError(f"不支持流式写出的图像格式: {image_format}，支持{STREAM_FORMATS}")
+    writer = write_png if image_format == 'PNG' else write_tiff
+
+    if isinstance(output, str):
+        with open(output, 'wb') as f:
+            writer(modules, f, box_size, border)
+    else:
+        writer(modules, output, box_size, border)
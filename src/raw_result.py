@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+原始解码结果模块
+以memoryview保存负载字节，文本和位置字典在首次访问时才生成，适合二进制负载和大批量解码
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+
+class RawResult:
+    """
+    原始解码结果类
+    data为负载字节的只读memoryview，text按UTF-8惰性解码，
+    rect和polygon由后端返回的坐标元组惰性构造为与字典结果相同的格式
+    """
+
+    __slots__ = ('type', 'data', 'version', 'error_correction', 'structured_append',
+                 '_text', '_box', '_points', '_rect', '_polygon')
+
+    def __init__(self, type: str, data: bytes, box: Sequence[int],
+                 points: Sequence[Sequence[int]], version: Optional[int] = None,
+                 error_correction: Optional[str] = None,
+                 structured_append: Optional[Dict[str, int]] = None):
+        """
+        初始化原始解码结果
+
+        Args:
+            type: 码制，如'QRCODE'
+            data: 负载字节
+            box: 外接矩形(left, top, width, height)
+            points: 轮廓顶点序列，每个顶点为(x, y)
+            version: QR码版本，后端无法提供时为None
+            error_correction: 纠错级别，后端无法提供时为None
+            structured_append: 结构化追加头信息
+        """
+        self.type = type
+        self.data = memoryview(data)
+        self.version = version
+        self.error_correction = error_correction
+        self.structured_append = structured_append
+        self._text = None
+        self._box = box
+        self._points = points
+        self._rect = None
+        self._polygon = None
+
+    @classmethod
+    def from_dict(cls, result: Dict[str, Any]) -> 'RawResult':
+        """
+        由字典格式的解码结果构造，用于只能返回文本的后端
+
+        Args:
+            result: 字典格式的解码结果
+
+        Returns:
+            RawResult: 原始解码结果，负载为文本的UTF-8编码
+        """
+        rect = result['rect']
+        return cls(
+            result['type'],
+            result['data'].encode('utf-8'),
+            (rect['left'], rect['top'], rect['width'], rect['height']),
+            [(point['x'], point['y']) for point in result['polygon']],
+            result.get('version'),
+            result.get('error_correction'),
+            result.get('structured_append')
+        )
+
+    @property
+    def text(self) -> str:
+        """
+        负载的UTF-8文本，首次访问时解码
+
+        Raises:
+            UnicodeDecodeError: 当负载不是有效的UTF-8文本时
+        """
+        if self._text is None:
+            self._text = str(self.data, 'utf-8')
+        return self._text
+
+    @property
+    def rect(self) -> Dict[str, int]:
+        """外接矩形，包含left、top、width和height"""
+        if self._rect is None:
+            left, top, width, height = self._box
+            self._rect = {'left': left, 'top': top, 'width': width, 'height': height}
+        return self._rect
+
+    @property
+    def polygon(self) -> List[Dict[str, int]]:
+        """轮廓顶点列表，每个顶点包含x和y"""
+        if self._polygon is None:
+            self._polygon = [{'x': x, 'y': y} for x, y in self._points]
+        return self._polygon
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        转换为QRCodeDecoder默认的字典格式
+
+        Returns:
+            Dict[str, Any]: 字典格式的解码结果
+
+        Raises:
+            UnicodeDecodeError: 当负载不是有效的UTF-8文本时
+        """
+        result = {'type': self.type, 'data': self.text, 'rect': self.rect, 'polygon': self.polygon}
+        if self.version is not None:
+            result['version'] = self.version
+        if self.error_correction is not None:
+            result['error_correction'] = self.error_correction
+        if self.structured_append is not None:
+            result['structured_append'] = self.structured_append
+        return result
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # memoryview不能序列化，跨进程传递时复制为bytes
+        return (RawResult, (self.type, self.data.tobytes(), tuple(self._box),
+                            [tuple(point) for point in self._points], self.version,
+                            self.error_correction, self.structured_append))
+
+    def __repr__(self) -> str:
+        return f"RawResult(type={self.type!r}, data={self.data.tobytes()!r})"
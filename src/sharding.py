@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片模块
+按任务key的稳定哈希将批量任务划分到多台机器，各分片互不重叠且无需协调；
+合并时检查各分片的任务清单是否完整覆盖全部任务
+"""
+
+import os
+import hashlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from .archive_writer import ARCHIVE_FORMATS
+from .manifest import PARTIAL_SUFFIX, JobManifest, read_manifest
+
+
+T = TypeVar('T')
+
+# 分片(序号, 总数)，序号从1开始
+Shard = Tuple[int, int]
+
+
+def parse_shard(spec: str) -> Shard:
+    """
+    解析分片参数
+
+    Args:
+        spec: 形如'2/8'的字符串，表示共8个分片中的第2个
+
+    Returns:
+        Shard: (分片序号, 分片总数)
+
+    Raises:
+        ValueError: 当格式或取值无效时
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"无效的分片: {spec}，格式为 序号/总数，如 1/4")
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"无效的分片: {spec}，序号应在1-{count}之间")
+    return index, count
+
+
+def shard_of(key: str, count: int) -> int:
+    """
+    计算key所属的分片序号
+
+    使用BLAKE2b而不是内置hash(进程间不稳定)，也不使用抽样校验所用的CRC32，
+    避免某些分片集中了全部校验项。
+
+    Args:
+        key: 任务key
+        count: 分片总数
+
+    Returns:
+        int: 分片序号(从1开始)
+    """
+    digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') % count + 1
+
+
+def relative_key(path: str, root: str) -> str:
+    """
+    以相对输入根目录的路径作为任务key，路径分隔符统一为/
+
+    各节点的输入目录可能挂载在不同路径，相对路径保证同一文件在各节点得到相同的key和分片。
+
+    Args:
+        path: 文件路径
+        root: 输入根目录
+
+    Returns:
+        str: 相对路径key
+    """
+    return os.path.relpath(path, root).replace(os.sep, '/')
+
+
+def select_shard(items: Iterable[T], shard: Optional[Shard],
+                 key: Callable[[T], str]) -> Iterator[T]:
+    """
+    筛选属于指定分片的任务
+
+    Args:
+        items: 任务序列
+        shard: 分片，None表示不分片
+        key: 获取任务key的函数
+
+    Returns:
+        Iterator[T]: 属于该分片的任务
+    """
+    if shard is None:
+        yield from items
+        return
+    index, count = shard
+    for item in items:
+        if shard_of(key(item), count) == index:
+            yield item
+
+
+def shard_file_name(path: str, shard: Shard) -> str:
+    """
+    在文件名的扩展名前插入分片标记，如 run.jsonl -> run.shard-2-of-8.jsonl
+
+    Args:
+        path: 文件路径
+        shard: 分片
+
+    Returns:
+        str: 分片的文件路径
+    """
+    index, count = shard
+    # 归档的复合扩展名(如.tar.gz)整体保留
+    extension = next((ext for extensions in ARCHIVE_FORMATS.values() for ext in extensions
+                      if path.lower().endswith(ext)), None)
+    if extension is None:
+        extension = os.path.splitext(path)[1]
+    stem = path[:len(path) - len(extension)]
+    return f"{stem}.shard-{index}-of-{count}{extension}"
+
+
+def merge_manifests(manifest_path: str, count: int,
+                    expected_keys: Optional[Iterable[str]] = None,
+                    output: Optional[str] = None) -> Dict[str, Any]:
+    """
+    合并各分片的任务清单并检查覆盖情况
+
+    Args:
+        manifest_path: 运行分片任务时指定的清单路径，各分片清单由shard_file_name得到
+        count: 分片总数
+        expected_keys: 全部任务的key，提供时检查是否有遗漏或多余的项
+        output: 合并后的清单路径，None表示只检查不写出
+
+    Returns:
+        Dict[str, Any]: 合并报告，包含keys(合并后的项数)、per_shard(各分片项数)、
+            missing_shards(缺失的分片清单)、missing(未完成的key)、unexpected(不在任务中的key)、
+            misplaced(不属于所在分片的key)、duplicates(出现在多个分片中的key)和complete(是否完整覆盖)
+
+    Raises:
+        ValueError: 当分片总数无效时
+    """
+    if count < 1:
+        raise ValueError(f"无效的分片总数: {count}")
+
+    report = {
+        'keys': 0,
+        'per_shard': [],
+        'missing_shards': [],
+        'missing': [],
+        'unexpected': [],
+        'misplaced': [],
+        'duplicates': [],
+        'complete': False
+    }
+    records: Dict[str, Dict[str, Any]] = {}
+
+    for index in range(1, count + 1):
+        path = shard_file_name(manifest_path, (index, count))
+        if not os.path.exists(path):
+            report['missing_shards'].append(path)
+            report['per_shard'].append(0)
+            continue
+        # 分片可能仍在运行，只读加载以免改动其清单文件
+        shard_records = read_manifest(path)
+        report['per_shard'].append(len(shard_records))
+        for key, record in shard_records.items():
+            if key in records:
+                report['duplicates'].append(key)
+                continue
+            if shard_of(key, count) != index:
+                report['misplaced'].append(key)
+            records[key] = record
+
+    if expected_keys is not None:
+        expected = set()
+        for key in expected_keys:
+            expected.add(key)
+            if key not in records:
+                report['missing'].append(key)
+        report['unexpected'] = [key for key in records if key not in expected]
+
+    report['keys'] = len(records)
+    report['complete'] = not any(report[field] for field in
+                                 ('missing_shards', 'missing', 'unexpected', 'misplaced', 'duplicates'))
+
+    if output:
+        # 先写入临时清单再替换，避免与已有文件的记录混在一起
+        temp_path = output + PARTIAL_SUFFIX
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        with JobManifest(temp_path, sync_every=len(records) + 1, sync_interval=float('inf')) as merged:
+            for key, record in records.items():
+                merged.record(key, **{field: value for field, value in record.items() if field != 'key'})
+        os.replace(temp_path, output)
+
+    report['records'] = records
+    return report
+
+
+def merged_decode_results(report: Dict[str, Any],
+                          order: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    从合并报告中取出批量解码结果
+
+    Args:
+        report: merge_manifests的报告
+        order: 结果的排列顺序(图片路径)，默认按清单顺序
+
+    Returns:
+        List[Dict[str, Any]]: 解码结果列表，缺失的项被略过
+
+    Raises:
+        ValueError: 当清单不是批量解码清单时
+    """
+    records = report['records']
+    keys = order if order is not None else list(records)
+    results = []
+    for key in keys:
+        record = records.get(key)
+        if record is None:
+            continue
+        if 'result' not in record:
+            raise ValueError(f"不是批量解码的任务清单: 项 {key} 没有解码结果")
+        results.append(record['result'])
+    return results
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+帧序列解码模块
+支持从图片目录或多帧图片(GIF/TIFF)逐帧解码，并基于上一帧的位置进行ROI跟踪
+"""
+
+import os
+import time
+from typing import Iterable, Iterator, List, Dict, Any, Optional, Tuple, Union
+from PIL import Image
+
+from .qrcode_decoder import QRCodeDecoder, iter_image_pages
+
+
+# 帧目录中识别的图片扩展名
+FRAME_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff')
+
+
+def iter_frames(source: Union[str, Iterable[Image.Image]]) -> Iterator[Image.Image]:
+    """
+    惰性读取帧序列，每次只加载一帧
+
+    Args:
+        source: 图片目录(按文件名排序)、多帧图片路径或Image对象的可迭代序列
+
+    Returns:
+        Iterator[Image.Image]: 帧迭代器
+    """
+    if not isinstance(source, str):
+        yield from source
+        return
+
+    if os.path.isdir(source):
+        names = sorted(name for name in os.listdir(source)
+                       if name.lower().endswith(FRAME_EXTENSIONS))
+        for name in names:
+            with Image.open(os.path.join(source, name)) as img:
+                yield img
+    else:
+        for _, frame in iter_image_pages(source):
+            yield frame
+
+
+class StreamDecoder:
+    """
+    帧序列解码器类
+    优先在上一帧QR码附近的区域(ROI)内扫描，并定期进行全帧扫描
+    """
+
+    def __init__(self, decoder: Optional[QRCodeDecoder] = None,
+                 roi_margin: float = 0.5, full_scan_interval: int = 30):
+        """
+        初始化帧序列解码器
+
+        Args:
+            decoder: QR码解码器，默认新建QRCodeDecoder
+            roi_margin: ROI相对上一帧QR码边界框的外扩比例
+            full_scan_interval: 每隔多少帧强制进行一次全帧扫描
+        """
+        if roi_margin < 0:
+            raise ValueError(f"无效的ROI外扩比例: {roi_margin}")
+        if full_scan_interval < 1:
+            raise ValueError(f"无效的全帧扫描间隔: {full_scan_interval}")
+
+        self.decoder = decoder or QRCodeDecoder()
+        self.roi_margin = roi_margin
+        self.full_scan_interval = full_scan_interval
+        self.reset()
+
+    def reset(self) -> None:
+        """重置跟踪状态和统计信息"""
+        self._roi = None
+        self._frames_since_full_scan = 0
+        self._last_payloads = set()
+        self._seen_payloads = set()
+        self._frames = 0
+        self._elapsed = 0.0
+        self._full_scans = 0
+        self._roi_attempts = 0
+        self._roi_hits = 0
+
+    def decode_stream(self, source: Union[str, Iterable[Image.Image]],
+                      only_new: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        逐帧解码帧序列
+
+        Args:
+            source: 图片目录、多帧图片路径或Image对象的可迭代序列
+            only_new: 为True时跳过没有新内容的帧
+
+        Returns:
+            Iterator[Dict[str, Any]]: 每帧的解码结果，包含帧序号、结果和新出现的结果
+        """
+        self.reset()
+        for index, frame in enumerate(iter_frames(source)):
+            frame_result = self.decode_frame(frame, index)
+            if only_new and not frame_result['new']:
+                continue
+            yield frame_result
+
+    def decode_frame(self, frame: Image.Image, index: Optional[int] = None) -> Dict[str, Any]:
+        """
+        解码单帧，并更新ROI跟踪状态
+
+        Args:
+            frame: 帧图像
+            index: 帧序号，默认使用已处理的帧数
+
+        Returns:
+            Dict[str, Any]: 解码结果，包含frame、results、new和roi字段
+        """
+        if index is None:
+            index = self._frames
+
+        start = time.perf_counter()
+        results = []
+        roi_used = False
+
+        # 优先在ROI内扫描，未命中或到达全帧扫描间隔时扫描整帧
+        if self._roi is not None and self._frames_since_full_scan < self.full_scan_interval:
+            self._roi_attempts += 1
+            results = self.decoder.decode_region(frame, self._roi)
+            if results:
+                self._roi_hits += 1
+                roi_used = True
+                self._frames_since_full_scan += 1
+
+        if not roi_used:
+            results = self.decoder.decode_from_image(frame)
+            self._full_scans += 1
+            self._frames_since_full_scan = 0
+
+        self._roi = self._compute_roi(results, frame.size)
+
+        # 与上一帧相同的内容视为重复
+        payloads = {result['data'] for result in results}
+        new_results = [result for result in results if result['data'] not in self._last_payloads]
+        self._last_payloads = payloads
+        self._seen_payloads.update(payloads)
+
+        self._frames += 1
+        self._elapsed += time.perf_counter() - start
+
+        return {
+            'frame': index,
+            'results': results,
+            'new': new_results,
+            'roi': roi_used
+        }
+
+    def _compute_roi(self, results: List[Dict[str, Any]],
+                     frame_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        根据解码结果的多边形计算下一帧的ROI
+
+        Args:
+            results: 当前帧的解码结果
+            frame_size: 帧尺寸(width, height)
+
+        Returns:
+            Optional[Tuple[int, int, int, int]]: ROI坐标，没有结果时返回None
+        """
+        points = [point for result in results for point in result['polygon']]
+        if not points:
+            return None
+
+        left = min(point['x'] for point in points)
+        top = min(point['y'] for point in points)
+        right = max(point['x'] for point in points)
+        bottom = max(point['y'] for point in points)
+
+        # 按边界框尺寸外扩，并限制在帧范围内
+        margin = int(max(right - left, bottom - top) * self.roi_margin)
+        width, height = frame_size
+        roi = (max(0, left - margin), max(0, top - margin),
+               min(width, right + margin + 1), min(height, bottom + margin + 1))
+
+        # ROI覆盖整帧时没有意义
+        if roi == (0, 0, width, height):
+            return None
+        return roi
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取解码统计信息
+
+        Returns:
+            Dict[str, Any]: 帧数、耗时、帧率、ROI命中率等统计信息
+        """
+        return {
+            'frames': self._frames,
+            'elapsed': self._elapsed,
+            'fps': self._frames / self._elapsed if self._elapsed else 0.0,
+            'full_scans': self._full_scans,
+            'roi_attempts': self._roi_attempts,
+            'roi_hits': self._roi_hits,
+            'roi_hit_rate': self._roi_hits / self._roi_attempts if self._roi_attempts else 0.0,
+            'unique_payloads': len(self._seen_payloads)
+        }
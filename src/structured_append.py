@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结构化追加模块
+将超长内容分割为最多16个相互关联的QR码，并在解码时按校验值和序号重新拼接
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+
+import qrcode
+from qrcode import base, exceptions, util
+
+from .utils import logger
+
+
+# 结构化追加模式指示符及最大符号数
+MODE_STRUCTURED_APPEND = 3
+MAX_SYMBOLS = 16
+
+# 结构化追加头(模式4位 + 序号4位 + 总数4位 + 校验8位)的位数
+HEADER_BITS = 20
+
+
+def compute_parity(data: bytes) -> int:
+    """
+    计算完整内容的结构化追加校验值(所有字节按位异或)
+
+    Args:
+        data: 完整内容的字节
+
+    Returns:
+        int: 8位校验值
+    """
+    parity = 0
+    for byte in data:
+        parity ^= byte
+    return parity
+
+
+def symbol_capacity(version: int, error_correction: int) -> int:
+    """
+    计算指定版本的单个结构化追加符号可容纳的字节数(字节模式)
+
+    Args:
+        version: QR码版本
+        error_correction: 纠错级别常量
+
+    Returns:
+        int: 可容纳的字节数
+    """
+    bit_limit = sum(block.data_count * 8 for block in base.rs_blocks(version, error_correction))
+    count_bits = util.length_in_bits(util.MODE_8BIT_BYTE, version)
+    return (bit_limit - HEADER_BITS - 4 - count_bits) // 8
+
+
+def split_content(content: str, capacity: int) -> List[bytes]:
+    """
+    按字符边界将内容分割为不超过指定字节数的块，保证每块都是完整的UTF-8文本
+
+    Args:
+        content: 完整内容
+        capacity: 每块最多字节数
+
+    Returns:
+        List[bytes]: UTF-8编码的内容块列表
+
+    Raises:
+        ValueError: 当单个字符也无法放入一块时
+    """
+    chunks = []
+    current = bytearray()
+    for char in content:
+        encoded = char.encode('utf-8')
+        if len(encoded) > capacity:
+            raise ValueError(f"单个符号容量过小: {capacity}字节")
+        if len(current) + len(encoded) > capacity:
+            chunks.append(bytes(current))
+            current = bytearray()
+        current.extend(encoded)
+    if current or not chunks:
+        chunks.append(bytes(current))
+    return chunks
+
+
+class StructuredAppendQRCode(qrcode.QRCode):
+    """
+    带结构化追加头的QR码
+    在数据段前写入结构化追加头，其余编码流程与qrcode.QRCode一致
+    """
+
+    def __init__(self, index: int, total: int, parity: int, **kwargs):
+        """
+        初始化结构化追加QR码
+
+        Args:
+            index: 符号序号(从0开始)
+            total: 符号总数(1-16)
+            parity: 完整内容的校验值
+            **kwargs: 传递给qrcode.QRCode的参数
+        """
+        if not 0 < total <= MAX_SYMBOLS or not 0 <= index < total:
+            raise ValueError(f"无效的结构化追加序号: {index}/{total}")
+        self.sa_header = (index, total, parity)
+        super().__init__(**kwargs)
+
+    def makeImpl(self, test, mask_pattern):
+        if self.data_cache is None:
+            self.data_cache = self._create_data()
+        super().makeImpl(test, mask_pattern)
+
+    def _create_data(self) -> List[int]:
+        """
+        生成包含结构化追加头的码字序列，流程与qrcode.util.create_data相同
+
+        Returns:
+            List[int]: 交错后的码字序列
+        """
+        index, total, parity = self.sa_header
+        buffer = util.BitBuffer()
+        buffer.put(MODE_STRUCTURED_APPEND, 4)
+        buffer.put(index, 4)
+        buffer.put(total - 1, 4)
+        buffer.put(parity, 8)
+
+        for data in self.data_list:
+            buffer.put(data.mode, 4)
+            buffer.put(len(data), util.length_in_bits(data.mode, self.version))
+            data.write(buffer)
+
+        rs_blocks = base.rs_blocks(self.version, self.error_correction)
+        bit_limit = sum(block.data_count * 8 for block in rs_blocks)
+        if len(buffer) > bit_limit:
+            raise exceptions.DataOverflowError(
+                f"Code length overflow. Data size ({len(buffer)}) > size available ({bit_limit})")
+
+        # 终止符、字节对齐和填充字节
+        for _ in range(min(bit_limit - len(buffer), 4)):
+            buffer.put_bit(False)
+        if len(buffer) % 8:
+            for _ in range(8 - len(buffer) % 8):
+                buffer.put_bit(False)
+        for i in range((bit_limit - len(buffer)) // 8):
+            buffer.put(util.PAD0 if i % 2 == 0 else util.PAD1, 8)
+
+        return util.create_bytes(buffer, rs_blocks)
+
+
+def render_symbol(args: Tuple[bytes, int, int, int, int, int, int, int]):
+    """
+    渲染单个结构化追加符号，可在工作进程中执行
+
+    Args:
+        args: (内容块, 序号, 总数, 校验值, 版本, 纠错级别常量, 格子大小, 边框格子数)
+
+    Returns:
+        PIL.Image.Image: 生成的QR码图像
+    """
+    chunk, index, total, parity, version, error_correction, box_size, border = args
+    qr = StructuredAppendQRCode(
+        index, total, parity,
+        version=version,
+        error_correction=error_correction,
+        box_size=box_size,
+        border=border,
+    )
+    qr.add_data(util.QRData(chunk, mode=util.MODE_8BIT_BYTE))
+    qr.make(fit=False)
+    return qr.make_image(fill_color="black", back_color="white").get_image()
+
+
+class StructuredAppendAssembler:
+    """
+    结构化追加重组器类
+    按(校验值, 总数)分组缓存符号，集齐全部序号后拼接为完整内容
+    """
+
+    def __init__(self):
+        """初始化重组器"""
+        self._groups = {}
+
+    def add(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        加入一批解码结果，返回其中新集齐的完整内容
+
+        Args:
+            results: 解码结果列表，带structured_append字段的结果参与重组
+
+        Returns:
+            List[Dict[str, Any]]: 完整内容列表，每项包含data、parity、total和symbols字段
+        """
+        completed = []
+        for result in results:
+            header = result.get('structured_append')
+            if not header:
+                continue
+
+            key = (header['parity'], header['total'])
+            group = self._groups.setdefault(key, {})
+            if header['index'] in group and group[header['index']]['data'] != result['data']:
+                logger.warning(f"结构化追加序号重复且内容不同: {header}")
+            group[header['index']] = result
+
+            if len(group) == header['total']:
+                message = self._assemble(key, group)
+                if message is not None:
+                    completed.append(message)
+                    del self._groups[key]
+
+        return completed
+
+    def get_pending(self) -> List[Dict[str, Any]]:
+        """
+        获取尚未集齐的分组
+
+        Returns:
+            List[Dict[str, Any]]: 每组的校验值、总数、已收到和缺失的序号
+        """
+        return [{
+            'parity': parity,
+            'total': total,
+            'received': sorted(group),
+            'missing': [index for index in range(total) if index not in group]
+        } for (parity, total), group in self._groups.items()]
+
+    def clear(self) -> None:
+        """丢弃所有未完成的分组"""
+        self._groups.clear()
+
+    def _assemble(self, key: Tuple[int, int],
+                  group: Dict[int, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        按序号拼接一组符号并核对校验值
+
+        Args:
+            key: (校验值, 总数)
+            group: 序号到解码结果的映射
+
+        Returns:
+            Optional[Dict[str, Any]]: 完整内容，校验失败时返回None
+        """
+        parity, total = key
+        symbols = [group[index] for index in range(total)]
+        data = ''.join(symbol['data'] for symbol in symbols)
+        if compute_parity(data.encode('utf-8')) != parity:
+            logger.warning(f"结构化追加校验失败: parity={parity}, total={total}")
+            return None
+        return {'data': data, 'parity': parity, 'total': total, 'symbols': symbols}
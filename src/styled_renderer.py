@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+样式渲染模块
+支持自定义颜色、圆角或圆点模块以及居中logo，模块贴图和缩放后的logo按尺寸和样式缓存
+"""
+
+import os
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
+
+
+# 支持的模块形状
+MODULE_SHAPES = ('square', 'rounded', 'dot')
+
+# 绘制贴图时的超采样倍数，缩小后得到抗锯齿边缘
+SUPERSAMPLE = 4
+
+# 各纠错级别可恢复的码字比例
+ERROR_CORRECTION_CAPACITY = {'L': 0.07, 'M': 0.15, 'Q': 0.25, 'H': 0.30}
+
+# logo遮挡比例的安全系数，为印刷污损保留纠错余量
+LOGO_SAFETY_FACTOR = 2.0
+
+# 定位图案边长(模块数)
+FINDER_SIZE = 7
+
+
+def is_default_style(fill_color: str, back_color: str, module_shape: str,
+                     logo: Optional[str]) -> bool:
+    """
+    判断样式是否与普通黑白方块输出相同
+
+    Args:
+        fill_color: 前景色
+        back_color: 背景色
+        module_shape: 模块形状
+        logo: logo图片路径
+
+    Returns:
+        bool: 是否为默认样式
+    """
+    return (fill_color == 'black' and back_color == 'white' and
+            module_shape == 'square' and not logo)
+
+
+@lru_cache(maxsize=64)
+def parse_color(color: str) -> Tuple[int, int, int]:
+    """
+    解析颜色字符串
+
+    Args:
+        color: 颜色名称或十六进制值，如'navy'、'#1a73e8'
+
+    Returns:
+        Tuple[int, int, int]: RGB值
+
+    Raises:
+        ValueError: 当颜色无效时
+    """
+    try:
+        return ImageColor.getrgb(color)[:3]
+    except ValueError:
+        raise ValueError(f"无效的颜色: {color}")
+
+
+@lru_cache(maxsize=64)
+def module_sprite(module_shape: str, box_size: int) -> np.ndarray:
+    """
+    获取单个模块的覆盖度贴图
+
+    Args:
+        module_shape: 模块形状
+        box_size: 每个格子的像素大小
+
+    Returns:
+        np.ndarray: box_size x box_size的uint8数组，255表示完全覆盖
+    """
+    if module_shape == 'square':
+        return np.full((box_size, box_size), 255, dtype=np.uint8)
+
+    size = box_size * SUPERSAMPLE
+    sprite = Image.new('L', (size, size), 0)
+    draw = ImageDraw.Draw(sprite)
+    if module_shape == 'rounded':
+        draw.rounded_rectangle((0, 0, size - 1, size - 1), radius=size // 3, fill=255)
+    else:
+        # 圆点略小于格子，相邻圆点之间留出间隙
+        margin = size // 20
+        draw.ellipse((margin, margin, size - 1 - margin, size - 1 - margin), fill=255)
+    sprite = sprite.resize((box_size, box_size), Image.Resampling.LANCZOS)
+    return np.asarray(sprite, dtype=np.uint8)
+
+
+@lru_cache(maxsize=16)
+def _finder_mask(count: int) -> np.ndarray:
+    """
+    获取三个定位图案所在区域的掩码，定位图案始终绘制为方块以保证识别
+
+    Args:
+        count: 每边模块数
+
+    Returns:
+        np.ndarray: count x count的布尔数组
+    """
+    mask = np.zeros((count, count), dtype=bool)
+    mask[:FINDER_SIZE, :FINDER_SIZE] = True
+    mask[:FINDER_SIZE, -FINDER_SIZE:] = True
+    mask[-FINDER_SIZE:, :FINDER_SIZE] = True
+    return mask
+
+
+def logo_area(count: int, logo_ratio: float, logo_padding: int) -> Tuple[int, int]:
+    """
+    计算logo及其静区在模块矩阵中的位置
+
+    Args:
+        count: 每边模块数
+        logo_ratio: logo边长占符号边长的比例
+        logo_padding: logo四周清空的模块数
+
+    Returns:
+        Tuple[int, int]: (logo边长模块数, 清空区域起始模块序号)，清空区域边长为logo边长加两倍静区
+    """
+    logo_modules = max(1, int(np.ceil(count * logo_ratio)))
+    # 与符号同奇偶，保证居中
+    if (count - logo_modules) % 2:
+        logo_modules += 1
+    cleared = logo_modules + logo_padding * 2
+    return logo_modules, (count - cleared) // 2
+
+
+def logo_coverage(count: int, logo_ratio: float, logo_padding: int) -> float:
+    """
+    计算logo及其静区遮挡的模块比例
+
+    Args:
+        count: 每边模块数
+        logo_ratio: logo边长占符号边长的比例
+        logo_padding: logo四周清空的模块数
+
+    Returns:
+        float: 遮挡比例
+    """
+    logo_modules, _ = logo_area(count, logo_ratio, logo_padding)
+    cleared = logo_modules + logo_padding * 2
+    return cleared * cleared / (count * count)
+
+
+def required_error_correction(count: int, logo_ratio: float, logo_padding: int,
+                              minimum: str) -> Optional[str]:
+    """
+    选择能恢复logo遮挡的最低纠错级别
+
+    Args:
+        count: 每边模块数
+        logo_ratio: logo边长占符号边长的比例
+        logo_padding: logo四周清空的模块数
+        minimum: 最低纠错级别
+
+    Returns:
+        Optional[str]: 纠错级别，H级也不足时返回None
+    """
+    required = logo_coverage(count, logo_ratio, logo_padding) * LOGO_SAFETY_FACTOR
+    levels = list(ERROR_CORRECTION_CAPACITY)
+    for level in levels[levels.index(minimum):]:
+        if ERROR_CORRECTION_CAPACITY[level] >= required:
+            return level
+    return None
+
+
+@lru_cache(maxsize=32)
+def _load_logo(path: str, mtime_ns: int, size: int) -> Image.Image:
+    """
+    打开并缩放logo，按路径、修改时间和目标尺寸缓存
+
+    Args:
+        path: logo图片路径
+        mtime_ns: 文件修改时间，文件变化后缓存自动失效
+        size: 目标边长(像素)，保持宽高比缩放到该尺寸以内
+
+    Returns:
+        Image.Image: RGBA模式的logo
+    """
+    with Image.open(path) as img:
+        logo = img.convert('RGBA')
+    logo.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return logo
+
+
+def load_logo(path: str, size: int) -> Image.Image:
+    """
+    获取缩放后的logo
+
+    Args:
+        path: logo图片路径
+        size: 目标边长(像素)
+
+    Returns:
+        Image.Image: RGBA模式的logo，调用方不应修改
+
+    Raises:
+        ValueError: 当logo文件不存在时
+    """
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        raise ValueError(f"logo文件不存在: {path}")
+    return _load_logo(path, mtime_ns, size)
+
+
+def render_styled(modules: Sequence[Sequence[bool]], box_size: int = 10, border: int = 4,
+                  fill_color: str = 'black', back_color: str = 'white',
+                  module_shape: str = 'square', logo: Optional[str] = None,
+                  logo_ratio: float = 0.2, logo_padding: int = 1) -> Image.Image:
+    """
+    按样式渲染模块矩阵
+
+    Args:
+        modules: QR码模块矩阵(不含边框)
+        box_size: 每个格子的像素大小
+        border: 边框格子数
+        fill_color: 前景色
+        back_color: 背景色
+        module_shape: 模块形状，支持'square', 'rounded', 'dot'
+        logo: 居中logo图片路径
+        logo_ratio: logo边长占符号边长的比例
+        logo_padding: logo四周清空的模块数
+
+    Returns:
+        Image.Image: RGB模式的QR码图像
+
+    Raises:
+        ValueError: 当模块形状或颜色无效时
+    """
+    if module_shape not in MODULE_SHAPES:
+        raise ValueError(f"无效的模块形状: {module_shape}，支持{MODULE_SHAPES}")
+
+    count = len(modules)
+    dark = np.array(modules, dtype=bool)
+
+    if logo:
+        logo_modules, start = logo_area(count, logo_ratio, logo_padding)
+        end = count - start
+        dark[start:end, start:end] = False
+
+    # 用贴图的Kronecker积一次性生成整幅覆盖度掩码，定位图案保持方块
+    finder = _finder_mask(count)
+    mask = np.kron((dark & ~finder).astype(np.uint8), module_sprite(module_shape, box_size))
+    mask |= np.kron((dark & finder).astype(np.uint8), module_sprite('square', box_size))
+    mask = np.pad(mask, border * box_size)
+
+    img = Image.new('RGB', (mask.shape[1], mask.shape[0]), parse_color(back_color))
+    img.paste(parse_color(fill_color), mask=Image.fromarray(mask, 'L'))
+
+    if logo:
+        logo_img = load_logo(logo, logo_modules * box_size)
+        center = (border + count / 2) * box_size
+        position = (int(center - logo_img.width / 2), int(center - logo_img.height / 2))
+        img.paste(logo_img, position, logo_img)
+
+    return img
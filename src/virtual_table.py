@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+虚拟化表格模块
+基于ttk.Treeview的表格，只为可见行创建条目，适合显示数千行以上的结果
+"""
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Iterable, List, Sequence, Tuple
+
+
+# 无法从主题获取行高时使用的默认值
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTable(ttk.Frame):
+    """
+    虚拟化表格类
+    全部行数据保存在列表中，Treeview只保留与可见行数相同的条目，滚动时替换条目内容
+    """
+
+    def __init__(self, master: tk.Misc, columns: Sequence[Tuple[str, str, int]], **kwargs):
+        """
+        初始化虚拟化表格
+
+        Args:
+            master: 父组件
+            columns: 列定义序列，元素为(列名, 标题, 宽度)
+            **kwargs: 传递给ttk.Frame的参数
+        """
+        super().__init__(master, **kwargs)
+        self.rows: List[Tuple] = []
+        self._offset = 0
+        self._visible = 1
+        self._items: List[str] = []
+
+        self.tree = ttk.Treeview(self, columns=[column[0] for column in columns],
+                                 show="headings", selectmode="browse", height=1)
+        for name, heading, width in columns:
+            self.tree.heading(name, text=heading)
+            self.tree.column(name, width=width, anchor=tk.W, stretch=(name == columns[-1][0]))
+
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        row_height = ttk.Style().lookup("Treeview", "rowheight")
+        self._row_height = int(row_height) if row_height else DEFAULT_ROW_HEIGHT
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_units(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_units(3))
+        self.tree.bind("<Prior>", lambda e: self._scroll_units(-self._visible))
+        self.tree.bind("<Next>", lambda e: self._scroll_units(self._visible))
+
+    def append_rows(self, rows: Iterable[Tuple]) -> None:
+        """
+        追加多行数据
+
+        Args:
+            rows: 行数据序列，每行为与列定义对应的值元组
+        """
+        start = len(self.rows)
+        self.rows.extend(rows)
+        # 只有新行落在可见范围内时才需要更新条目
+        if start < self._offset + self._visible:
+            self._refresh()
+        else:
+            self._update_scrollbar()
+
+    def clear(self) -> None:
+        """清空所有行"""
+        self.rows = []
+        self._offset = 0
+        self._refresh()
+
+    def scroll_to(self, offset: int) -> None:
+        """
+        滚动到指定行
+
+        Args:
+            offset: 显示在第一行的数据行序号
+        """
+        offset = max(0, min(offset, len(self.rows) - self._visible))
+        if offset != self._offset:
+            self._offset = offset
+            self._refresh()
+
+    def _scroll_units(self, count: int) -> str:
+        """按行数滚动，返回'break'阻止Treeview的默认处理"""
+        self.scroll_to(self._offset + count)
+        return "break"
+
+    def _on_mousewheel(self, event: tk.Event) -> str:
+        """鼠标滚轮事件处理(Windows/macOS)"""
+        step = -event.delta // 120 if abs(event.delta) >= 120 else -event.delta
+        return self._scroll_units(step * 3)
+
+    def _on_scrollbar(self, action: str, value: str, unit: str = "units") -> None:
+        """滚动条事件处理"""
+        if action == "moveto":
+            self.scroll_to(int(float(value) * len(self.rows)))
+        elif unit == "pages":
+            self.scroll_to(self._offset + int(value) * self._visible)
+        else:
+            self.scroll_to(self._offset + int(value))
+
+    def _on_resize(self, event: tk.Event) -> None:
+        """根据表格高度计算可见行数(扣除标题行)"""
+        visible = max(1, event.height // self._row_height - 1)
+        if visible != self._visible:
+            self._visible = visible
+            self._offset = max(0, min(self._offset, len(self.rows) - visible))
+            self._refresh()
+
+    def _refresh(self) -> None:
+        """按当前偏移量更新可见条目"""
+        window = self.rows[self._offset:self._offset + self._visible]
+
+        # 条目数与可见行数保持一致，多余的删除，不足的补充
+        while len(self._items) > len(window):
+            self.tree.delete(self._items.pop())
+        while len(self._items) < len(window):
+            self._items.append(self.tree.insert("", tk.END))
+
+        for item, row in zip(self._items, window):
+            self.tree.item(item, values=row)
+        self._update_scrollbar()
+
+    def _update_scrollbar(self) -> None:
+        """更新滚动条位置"""
+        total = len(self.rows)
+        if total <= self._visible:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self._offset / total, (self._offset + self._visible) / total)
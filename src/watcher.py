@@ -0,0 +1,466 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+监视目录模块
+持续监视任务目录和图片目录，将新的CSV任务文件交给批量生成，将新的图片交给解码，
+结果和错误写入输出目录
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import select
+import signal
+import struct
+import ctypes
+import ctypes.util
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from .batch import BatchGenerator, IMAGE_EXTENSIONS, load_jobs_csv, _decode_item
+from .utils import logger
+
+
+# 任务文件扩展名
+JOB_EXTENSIONS = ('.csv',)
+
+# inotify事件：写入完成后关闭、移入目录、事件队列溢出
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# inotify_event结构体头部：wd、mask、cookie、len
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class _Inotify:
+    """
+    基于ctypes的Linux inotify封装
+    只监视写入完成和移入事件，不可用时构造函数抛出OSError
+    """
+
+    def __init__(self, directories: List[str]):
+        """
+        初始化inotify并监视目录
+
+        Args:
+            directories: 要监视的目录列表
+
+        Raises:
+            OSError: 当平台不支持inotify时
+        """
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, "当前平台不支持inotify")
+
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify初始化失败")
+
+        self._watches = {}
+        for directory in directories:
+            wd = libc.inotify_add_watch(self._fd, os.fsencode(directory), IN_CLOSE_WRITE | IN_MOVED_TO)
+            if wd < 0:
+                os.close(self._fd)
+                raise OSError(ctypes.get_errno(), f"无法监视目录: {directory}")
+            self._watches[wd] = directory
+
+    def read(self, timeout: float) -> Tuple[List[str], bool]:
+        """
+        等待并读取事件
+
+        Args:
+            timeout: 最长等待秒数
+
+        Returns:
+            Tuple[List[str], bool]: (写入完成的文件路径列表, 是否发生队列溢出)
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return [], False
+
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return [], False
+
+        paths = []
+        overflow = False
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+            elif wd in self._watches and name:
+                paths.append(os.path.join(self._watches[wd], os.fsdecode(name)))
+        return paths, overflow
+
+    def close(self) -> None:
+        """关闭inotify文件描述符"""
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def _init_worker() -> None:
+    """
+    工作进程初始化：忽略SIGINT
+
+    终端中按Ctrl+C时SIGINT会发给整个进程组，工作进程忽略它，
+    由主进程的信号处理函数停止监视并等待已提交的工作完成。
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _process_job_file(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    执行一个CSV任务文件的批量生成
+
+    在工作进程中执行。
+
+    Args:
+        task: 任务，包含path、output_dir和options字段
+
+    Returns:
+        Dict[str, Any]: 生成报告
+    """
+    generator = BatchGenerator(workers=0, **task['options'])
+    return generator.generate(load_jobs_csv(task['path']), task['output_dir'])
+
+
+class FolderWatcher:
+    """
+    监视目录守护类
+    使用stat索引轮询(Linux下优先使用inotify)发现新文件，通过有界工作池处理，
+    停止时等待已提交的工作完成
+    """
+
+    def __init__(self, output_dir: str, jobs_dir: Optional[str] = None,
+                 images_dir: Optional[str] = None, workers: Optional[int] = None,
+                 poll_interval: float = 1.0, use_inotify: Optional[bool] = None,
+                 backend: str = 'pyzbar', generator_options: Optional[Dict[str, Any]] = None):
+        """
+        初始化监视器
+
+        Args:
+            output_dir: 输出目录，生成结果写入jobs子目录，解码结果写入decoded子目录，
+                错误写入errors子目录
+            jobs_dir: CSV任务文件目录
+            images_dir: 待解码图片目录
+            workers: 工作进程数，默认使用CPU核心数，0表示在当前进程中处理
+            poll_interval: 轮询间隔秒数
+            use_inotify: 是否使用inotify，默认在可用时使用
+            backend: 解码后端名称
+            generator_options: 传递给BatchGenerator的生成选项
+
+        Raises:
+            ValueError: 当没有指定监视目录、目录不存在或任务目录与图片目录相同时
+        """
+        if not jobs_dir and not images_dir:
+            raise ValueError("至少需要指定任务目录或图片目录")
+        for directory in (jobs_dir, images_dir):
+            if directory and not os.path.isdir(directory):
+                raise ValueError(f"目录不存在: {directory}")
+        if jobs_dir and images_dir and os.path.samefile(jobs_dir, images_dir):
+            # 按所在目录区分任务文件和图片，两者为同一目录时无法区分
+            raise ValueError(f"任务目录和图片目录不能为同一目录: {jobs_dir}")
+
+        self.output_dir = output_dir
+        self.jobs_dir = os.path.abspath(jobs_dir) if jobs_dir else None
+        self.images_dir = os.path.abspath(images_dir) if images_dir else None
+        self.workers = os.cpu_count() if workers is None else workers
+        self.poll_interval = poll_interval
+        self.backend = backend
+        self.generator_options = generator_options or {}
+
+        # 在启动工作进程前检查生成选项和解码后端
+        BatchGenerator(workers=0, **self.generator_options)
+        if images_dir:
+            from .decoder_backends import create_backend
+            create_backend(backend)
+
+        self._inotify = None
+        if use_inotify is not False:
+            try:
+                self._inotify = _Inotify([d for d in (self.jobs_dir, self.images_dir) if d])
+            except (OSError, AttributeError) as e:
+                if use_inotify:
+                    raise
+                logger.info(f"inotify不可用，使用轮询: {e}")
+
+        self._stop_event = threading.Event()
+        self._executor = None
+        # stat索引：已处理文件和等待写入完成的候选文件
+        self._processed = {}
+        self._candidates = {}
+        self._queue = deque()
+        self._in_flight = {}
+        # 排队和处理中的(路径, 文件版本)，用于O(1)判断文件是否已提交
+        self._pending = set()
+        self._next_scan = 0.0
+        self._stats = {'jobs': 0, 'images': 0, 'errors': 0, 'scans': 0}
+
+    def run(self) -> Dict[str, Any]:
+        """
+        持续监视目录，直到调用stop
+
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        logger.info(f"开始监视目录: {[d for d in (self.jobs_dir, self.images_dir) if d]}")
+        try:
+            # inotify模式下启动时已存在的文件直接视为写入完成
+            self._scan(settled=self._inotify is not None)
+            while not self._stop_event.is_set():
+                self.poll()
+        finally:
+            self.drain()
+        return self.get_stats()
+
+    def poll(self) -> None:
+        """执行一轮发现、分发和结果处理"""
+        # 有处理中的文件时缩短等待，以便及时写出结果并分发排队的文件
+        timeout = min(self.poll_interval, 0.05) if self._in_flight else self.poll_interval
+
+        if self._inotify is not None:
+            paths, overflow = self._inotify.read(timeout)
+            if overflow:
+                self._scan(settled=True)
+            for path in paths:
+                self._mark_ready(path)
+        else:
+            if self._stats['scans']:
+                self._stop_event.wait(min(timeout, max(0.0, self._next_scan - time.monotonic())))
+            if time.monotonic() >= self._next_scan:
+                self._scan()
+
+        self._dispatch()
+        self._reap()
+
+    def stop(self) -> None:
+        """请求停止，可在信号处理函数或其他线程中调用"""
+        self._stop_event.set()
+
+    def drain(self) -> None:
+        """停止分发新文件，等待已提交的工作完成并写出结果"""
+        wait(list(self._in_flight))
+        self._reap()
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+        if self._queue:
+            logger.info(f"停止时有 {len(self._queue)} 个文件未处理，下次启动时继续")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取统计信息
+
+        Returns:
+            Dict[str, Any]: 已处理的任务文件数、图片数、错误数、扫描次数、处理中和排队的文件数
+        """
+        stats = dict(self._stats)
+        stats['in_flight'] = len(self._in_flight)
+        stats['queued'] = len(self._queue)
+        return stats
+
+    def _scan(self, settled: bool = False) -> None:
+        """
+        扫描监视目录，stat连续两次相同的新文件视为写入完成
+
+        inotify模式下只在启动和事件队列溢出时扫描，之后的写入完成由事件确定。
+
+        Args:
+            settled: 是否将新文件直接视为写入完成
+        """
+        self._stats['scans'] += 1
+        self._next_scan = time.monotonic() + self.poll_interval
+        seen = set()
+        for directory, extensions in ((self.jobs_dir, JOB_EXTENSIONS),
+                                      (self.images_dir, IMAGE_EXTENSIONS)):
+            if not directory:
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.') or not entry.name.lower().endswith(extensions):
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+
+                    key = (stat.st_size, stat.st_mtime_ns)
+                    seen.add(entry.path)
+                    if self._processed.get(entry.path) == key or self._is_queued(entry.path, key):
+                        continue
+                    if settled or self._candidates.get(entry.path) == key or self._has_result(entry.path, stat):
+                        self._enqueue(entry.path, key)
+                    else:
+                        self._candidates[entry.path] = key
+
+        # 清理已删除文件的索引
+        for index in (self._processed, self._candidates):
+            for path in [path for path in index if path not in seen]:
+                del index[path]
+
+    def _mark_ready(self, path: str) -> None:
+        """
+        处理inotify报告的写入完成文件
+
+        Args:
+            path: 文件路径
+        """
+        name = os.path.basename(path)
+        directory = os.path.dirname(path)
+        extensions = JOB_EXTENSIONS if directory == self.jobs_dir else IMAGE_EXTENSIONS
+        if name.startswith('.') or not name.lower().endswith(extensions):
+            return
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        key = (stat.st_size, stat.st_mtime_ns)
+        if self._processed.get(path) != key and not self._is_queued(path, key):
+            self._enqueue(path, key)
+
+    def _is_queued(self, path: str, key: Tuple[int, int]) -> bool:
+        """判断文件的当前版本是否已在排队或处理中"""
+        return (path, key) in self._pending
+
+    def _enqueue(self, path: str, key: Tuple[int, int]) -> None:
+        """
+        将写入完成的文件加入待处理队列，已有最新结果的文件直接记为已处理
+
+        Args:
+            path: 文件路径
+            key: (文件大小, 修改时间)
+        """
+        self._candidates.pop(path, None)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        if self._has_result(path, stat):
+            self._processed[path] = key
+            return
+        self._queue.append((path, key))
+        self._pending.add((path, key))
+
+    def _has_result(self, path: str, stat: os.stat_result) -> bool:
+        """
+        判断文件是否已有比它更新的结果(上次运行已处理)
+
+        Args:
+            path: 文件路径
+            stat: 文件的stat结果
+
+        Returns:
+            bool: 是否已有最新结果
+        """
+        try:
+            return os.stat(self._result_path(path)).st_mtime_ns >= stat.st_mtime_ns
+        except OSError:
+            return False
+
+    def _result_path(self, path: str) -> str:
+        """获取输入文件对应的结果文件路径"""
+        name = os.path.basename(path)
+        if os.path.dirname(path) == self.jobs_dir:
+            return os.path.join(self.output_dir, 'jobs', f"{name}.report.json")
+        return os.path.join(self.output_dir, 'decoded', f"{name}.json")
+
+    def _dispatch(self) -> None:
+        """在处理中的文件数未达到上限时提交排队的文件"""
+        limit = max(self.workers, 1) * 2
+        while self._queue and len(self._in_flight) < limit and not self._stop_event.is_set():
+            path, key = self._queue.popleft()
+            if os.path.dirname(path) == self.jobs_dir:
+                stem = os.path.splitext(os.path.basename(path))[0]
+                task = {
+                    'path': path,
+                    'output_dir': os.path.join(self.output_dir, 'jobs', stem),
+                    'options': self.generator_options
+                }
+                future = self._submit(_process_job_file, task)
+            else:
+                future = self._submit(_decode_item, {'path': path, 'backend': self.backend})
+            self._in_flight[future] = (path, key)
+
+    def _submit(self, func: Callable[[Dict[str, Any]], Dict[str, Any]],
+                task: Dict[str, Any]) -> Future:
+        """
+        提交任务，workers为0时在当前进程中执行
+
+        Args:
+            func: 模块级任务函数
+            task: 任务
+
+        Returns:
+            Future: 任务结果
+        """
+        if not self.workers:
+            future = Future()
+            try:
+                future.set_result(func(task))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker)
+        return self._executor.submit(func, task)
+
+    def _reap(self) -> None:
+        """写出已完成任务的结果或错误"""
+        for future in [future for future in self._in_flight if future.done()]:
+            path, key = self._in_flight.pop(future)
+            self._pending.discard((path, key))
+            self._processed[path] = key
+            is_job = os.path.dirname(path) == self.jobs_dir
+
+            error = future.exception()
+            if error is None:
+                result = future.result()
+                if is_job:
+                    self._stats['jobs'] += 1
+                    error = f"{len(result['errors'])}项生成失败" if result['errors'] else None
+                else:
+                    self._stats['images'] += 1
+                    error = result['error']
+                self._write_json(self._result_path(path), result)
+
+            if error:
+                self._stats['errors'] += 1
+                logger.error(f"处理文件失败 {path}: {error}")
+                name = os.path.basename(path)
+                self._write_json(os.path.join(self.output_dir, 'errors', f"{name}.error.json"),
+                                 {'path': path, 'error': str(error), 'time': time.time()})
+
+    def _write_json(self, file_path: str, data: Dict[str, Any]) -> None:
+        """
+        写出JSON文件，先写临时文件再替换，避免留下不完整的结果
+
+        Args:
+            file_path: 文件路径
+            data: 要写出的数据
+        """
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_path = f"{file_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, file_path)
@@ -7,7 +7,30 @@ QR码生成器测试脚本
 
 import os
 import sys
+import shutil
+import signal
+import zipfile
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import qrcode
+import numpy as np
 from src.qrcode_generator import QRCodeGenerator
+from PIL import Image, ImageOps
+from src import batch
+from src.batch import BatchGenerator, BatchDecoder, find_image_files
+from src.grid_decoder import GridDecoder, GridDecodeError
+from src.qrcode_decoder import QRCodeDecoder, _tile_boxes
+from src.decoder_backends import BackendSelector, DecoderBackend
+from src.stream_decoder import StreamDecoder
+from src.decode_cache import DecodeCache
+from src import watcher as watcher_module
+from src.watcher import FolderWatcher
+from src.manifest import JobManifest
+from src.archive_writer import ArchiveWriter
+from src.styled_renderer import required_error_correction
+from src.decode_pool import SharedMemoryDecodePool
+from src.sharding import select_shard, shard_file_name, merge_manifests, relative_key
+from src.corpus import build_corpus, benchmark_corpus, load_labels
 
 
 def test_qrcode_generation():
@@ -63,6 +86,39 @@ def test_qrcode_generation():
             print(f"   ✗ 尺寸 {size} 测试失败: {e}")
             return False
     
+    # 测试容量规划
+    print("6. 测试容量规划...")
+    for content, size in [("Test", 1), ("x" * 500, 1), ("0123456789" * 30, 10)]:
+        plan = generator.plan_capacity(content, size=size, box_size=2, border=4)
+        img = generator.generate_qr_code(content, size=size, box_size=2, border=4)
+        if plan['fits'] and plan['version'] >= size and img.size[0] == plan['pixel_size']:
+            print(f"   ✓ 版本 {plan['version']} 规划与生成结果一致")
+        else:
+            print(f"   ✗ 容量规划与生成结果不一致: {plan}, {img.size}")
+            return False
+    if generator.plan_capacity("x" * 3000, error_correction="L")['fits']:
+        print("   ✗ 超长内容未被识别")
+        return False
+    print("   ✓ 超长内容被识别")
+    
+    # 混合内容按分段编码，版本应与qrcode逐版本试编码(默认分段优化)的结果一致
+    mixed_payloads = [
+        "SKU:" + "0123456789" * 30 + "4242",
+        "ORDER-2024-000123|qty=5|" + "9" * 30 + "|note:abc",
+        "HELLO WORLD " * 20 + "x",
+        "订单" + "12345678901234567890" * 4,
+    ]
+    for content in mixed_payloads:
+        baseline = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M)
+        baseline.add_data(content)
+        expected_version = baseline.best_fit()
+        plan = generator.plan_capacity(content, size=1, box_size=1, border=0)
+        img = generator.generate_qr_code(content, size=1, box_size=1, border=0)
+        if plan['version'] != expected_version or img.size[0] != expected_version * 4 + 17:
+            print(f"   ✗ 混合内容版本 {plan['version']}/{img.size[0]}，试编码为版本 {expected_version}")
+            return False
+    print(f"   ✓ {len(mixed_payloads)} 个混合内容的版本与试编码一致")
+    
     return True
 
 
@@ -96,12 +152,885 @@ def test_qrcode_saving():
             print(f"   ✗ {fmt}格式保存失败: {e}")
             return False
     
+    # 测试流式写出与内存路径的像素一致
+    for fmt in ["PNG", "TIFF"]:
+        print(f"2. 测试流式写出{fmt}格式...")
+        try:
+            file_path = os.path.join(test_dir, f"stream.{fmt.lower()}")
+            generator.generate_to_file("Test Save", file_path, box_size=3, border=2)
+            expected = generator.generate_qr_code("Test Save", box_size=3, border=2).get_image()
+            with Image.open(file_path) as streamed:
+                same = streamed.mode == expected.mode and streamed.tobytes() == expected.tobytes()
+            os.remove(file_path)
+            if same:
+                print(f"   ✓ {fmt}格式流式写出成功")
+            else:
+                print(f"   ✗ {fmt}格式流式写出结果与内存路径不一致")
+                return False
+        except Exception as e:
+            print(f"   ✗ {fmt}格式流式写出失败: {e}")
+            return False
+    
     # 清理测试目录
     os.rmdir(test_dir)
     
     return True
 
 
+def test_batch_generation():
+    """测试批量生成功能"""
+    print("\n=== 测试批量生成功能 ===")
+    
+    test_dir = "test_batch_output"
+    items = [
+        {'key': 'text', 'content': 'Hello'},
+        {'key': 'url/1', 'content': 'www.example.com', 'content_type': 'url'},
+        "张三"
+    ]
+    
+    print("1. 测试批量生成...")
+    try:
+        report = BatchGenerator(workers=0).generate(items, test_dir)
+        expected_files = {"text.png", "url_1.png", "3.png"}
+        if report['generated'] == 3 and set(os.listdir(test_dir)) == expected_files:
+            print("   ✓ 批量生成成功")
+        else:
+            print(f"   ✗ 批量生成失败: {report}")
+            return False
+        
+        print("2. 测试批量解码...")
+        Image.new('RGB', (50, 50), 'white').save(os.path.join(test_dir, "blank.png"))
+        report = BatchDecoder(workers=0, backend='grid').decode(find_image_files(test_dir))
+        decoded = {os.path.basename(r['path']): [d['data'] for d in r['results']]
+                   for r in report['results']}
+        if report['decoded'] == 3 and report['empty'] == 1 and decoded["text.png"] == ["Hello"]:
+            print("   ✓ 批量解码成功")
+        else:
+            print(f"   ✗ 批量解码失败: {report}")
+            return False
+        
+        print("3. 测试任务清单续跑...")
+        manifest_path = os.path.join(test_dir, "manifest.jsonl")
+        with JobManifest(manifest_path) as manifest:
+            BatchGenerator(workers=0).generate(items, test_dir, manifest=manifest)
+        os.remove(os.path.join(test_dir, "text.png"))
+        with JobManifest(manifest_path) as manifest:
+            report = BatchGenerator(workers=0).generate(items, test_dir, manifest=manifest)
+        if report['skipped'] == 2 and report['generated'] == 1:
+            print("   ✓ 已完成项跳过，丢失的文件重新生成")
+        else:
+            print(f"   ✗ 任务清单续跑失败: {report}")
+            return False
+        
+        print("4. 测试直接写入ZIP归档...")
+        buffer = BytesIO()
+        with ArchiveWriter(buffer, 'zip') as archive:
+            BatchGenerator(workers=0).generate_archive(items, archive)
+        names = zipfile.ZipFile(BytesIO(buffer.getvalue())).namelist()
+        if names == ["text.png", "url_1.png", "3.png", "index.csv"]:
+            print("   ✓ 归档写入成功")
+        else:
+            print(f"   ✗ 归档成员不正确: {names}")
+            return False
+        
+        print("5. 测试分片生成与合并...")
+        manifest_path = os.path.join(test_dir, "shards.jsonl")
+        keys = [f"item{i}" for i in range(30)]
+        # 模拟其他分片正在写出的临时文件，不应被本分片删除
+        foreign_partial = os.path.join(test_dir, "other.png.part")
+        open(foreign_partial, 'wb').close()
+        for index in (1, 2, 3):
+            shard_items = select_shard(({'key': key, 'content': key} for key in keys),
+                                       (index, 3), lambda item: item['key'])
+            with JobManifest(shard_file_name(manifest_path, (index, 3))) as manifest:
+                BatchGenerator(workers=0, box_size=2).generate(shard_items, test_dir, manifest=manifest)
+        merged = merge_manifests(manifest_path, 3, keys)
+        os.remove(shard_file_name(manifest_path, (2, 3)))
+        incomplete = merge_manifests(manifest_path, 3, keys)
+        if merged['complete'] and merged['keys'] == 30 and sum(merged['per_shard']) == 30 and \
+                not incomplete['complete'] and incomplete['missing'] and os.path.exists(foreign_partial):
+            print(f"   ✓ 分片互不重叠且完整覆盖: {merged['per_shard']}")
+        else:
+            print(f"   ✗ 分片合并结果不正确: {merged['per_shard']}")
+            return False
+        
+        # 模拟仍在写记录的分片，合并时只读取，不应改动其清单文件
+        running_shard = shard_file_name(manifest_path, (3, 3))
+        with open(running_shard, 'a', encoding='utf-8') as f:
+            f.write('{"key": "item')
+        with open(running_shard, 'rb') as f:
+            running_content = f.read()
+        merge_manifests(manifest_path, 3, keys)
+        with open(running_shard, 'rb') as f:
+            if f.read() == running_content:
+                print("   ✓ 合并时未改动正在写入的分片清单")
+            else:
+                print("   ✗ 合并时改动了分片清单")
+                return False
+        
+        # 两个节点的输入目录挂载在不同路径，按相对路径分片后仍能完整合并
+        mounts = [os.path.join(test_dir, "mount_a"), os.path.join(test_dir, "mount_b")]
+        for mount in mounts:
+            os.makedirs(os.path.join(mount, "sub"))
+            for key in keys[:10]:
+                shutil.copy(os.path.join(test_dir, f"{key}.png"), os.path.join(mount, "sub", f"{key}.png"))
+        decode_manifest = os.path.join(test_dir, "decode.jsonl")
+        for index, mount in zip((1, 2), mounts):
+            paths = select_shard(find_image_files(mount), (index, 2),
+                                 lambda path: relative_key(path, mount))
+            with JobManifest(shard_file_name(decode_manifest, (index, 2))) as manifest:
+                BatchDecoder(workers=0, backend='grid').decode(paths, manifest, root=mount)
+        expected = [relative_key(path, mounts[0]) for path in find_image_files(mounts[0])]
+        decode_merged = merge_manifests(decode_manifest, 2, expected)
+        if decode_merged['complete'] and decode_merged['keys'] == 10:
+            print(f"   ✓ 不同挂载路径的解码分片完整合并: {decode_merged['per_shard']}")
+        else:
+            print(f"   ✗ 解码分片合并结果不正确: {decode_merged}")
+            return False
+        
+        # 以另一种写法的根目录续跑，跳过的结果使用本次输入的路径
+        resume_manifest = os.path.join(test_dir, "resume.jsonl")
+        with JobManifest(resume_manifest) as manifest:
+            BatchDecoder(workers=0, backend='grid').decode(find_image_files(mounts[0]), manifest,
+                                                           root=mounts[0])
+        resumed_root = os.path.abspath(mounts[0])
+        resumed_paths = find_image_files(resumed_root)
+        with JobManifest(resume_manifest) as manifest:
+            resumed = BatchDecoder(workers=0, backend='grid').decode(resumed_paths, manifest,
+                                                                     root=resumed_root)
+        if resumed['skipped'] == 10 and [r['path'] for r in resumed['results']] == resumed_paths:
+            print("   ✓ 换用不同写法的根目录后续跑，结果路径为本次输入的路径")
+        else:
+            print(f"   ✗ 续跑结果不正确: {resumed}")
+            return False
+        
+        print("6. 测试生成后抽样校验...")
+        verify_dir = os.path.join(test_dir, "verify")
+        report = BatchGenerator(workers=0).generate(items, verify_dir, verify_rate=1)
+        if report['verified'] == 3 and not report['mismatches'] and not report['verify_errors']:
+            print("   ✓ 网格采样校验全部一致")
+        else:
+            print(f"   ✗ 校验结果不正确: {report}")
+            return False
+        
+        # 校验解码出错或内容不一致时，图片照常写出，分别记录在报告中
+        verify_image = batch._verify_image
+        try:
+            batch._verify_image = lambda img, box_size, border: ["other"]
+            mismatch_report = BatchGenerator(workers=0).generate(items[:1], verify_dir, verify_rate=1)
+            def unavailable(img, box_size, border):
+                raise ImportError("pyzbar未安装")
+            batch._verify_image = unavailable
+            error_report = BatchGenerator(workers=0).generate(items[:1], verify_dir, verify_rate=1)
+        finally:
+            batch._verify_image = verify_image
+        mismatch = mismatch_report['mismatches'][0] if mismatch_report['mismatches'] else {}
+        if mismatch_report['generated'] == 1 and mismatch.get('decoded') == ["other"] and \
+                mismatch.get('expected') == "Hello" and not mismatch_report['verify_errors'] and \
+                error_report['generated'] == 1 and len(error_report['verify_errors']) == 1 and \
+                not error_report['mismatches'] and not error_report['errors'] and \
+                os.path.exists(error_report['verify_errors'][0]['path']):
+            print("   ✓ 不一致与校验出错分别报告，图片照常写出")
+        else:
+            print(f"   ✗ 校验报告不正确: {mismatch_report}, {error_report}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 批量生成失败: {e}")
+        return False
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+
+def test_folder_watcher():
+    """测试监视目录功能"""
+    print("\n=== 测试监视目录功能 ===")
+    
+    test_dir = "test_watch"
+    jobs_dir = os.path.join(test_dir, "jobs")
+    images_dir = os.path.join(test_dir, "images")
+    output_dir = os.path.join(test_dir, "output")
+    os.makedirs(jobs_dir)
+    os.makedirs(images_dir)
+    
+    print("1. 测试处理新文件...")
+    try:
+        with open(os.path.join(jobs_dir, "labels.csv"), "w", encoding="utf-8") as f:
+            f.write("key,content\nk1,Hello\n")
+        QRCodeGenerator().save_qr_code(QRCodeGenerator().generate_qr_code("Watch"),
+                                       os.path.join(images_dir, "scan.png"))
+        
+        options = {'box_size': 3}
+        watcher = FolderWatcher(output_dir, jobs_dir, images_dir, workers=0,
+                                poll_interval=0, use_inotify=False, backend='grid',
+                                generator_options=options)
+        # 轮询模式下连续两次扫描stat不变才视为写入完成
+        watcher.poll()
+        watcher.poll()
+        watcher.drain()
+        stats = watcher.get_stats()
+        if stats['jobs'] == 1 and stats['images'] == 1 and \
+                os.path.exists(os.path.join(output_dir, "jobs", "labels", "k1.png")) and \
+                os.path.exists(os.path.join(output_dir, "decoded", "scan.png.json")):
+            print("   ✓ 新文件处理成功")
+        else:
+            print(f"   ✗ 新文件处理失败: {stats}")
+            return False
+        
+        print("2. 测试重启后跳过已处理文件...")
+        watcher = FolderWatcher(output_dir, jobs_dir, images_dir, workers=0,
+                                poll_interval=0, use_inotify=False, backend='grid',
+                                generator_options=options)
+        watcher.poll()
+        watcher.poll()
+        watcher.drain()
+        stats = watcher.get_stats()
+        if stats['jobs'] == 0 and stats['images'] == 0:
+            print("   ✓ 已处理文件未重复处理")
+        else:
+            print(f"   ✗ 已处理文件被重复处理: {stats}")
+            return False
+        
+        # 任务目录和图片目录相同时无法按目录区分文件类型
+        try:
+            FolderWatcher(output_dir, jobs_dir, os.path.join(jobs_dir, "."), workers=0,
+                          poll_interval=0, use_inotify=False, backend='grid')
+            print("   ✗ 任务目录和图片目录相同时未报错")
+            return False
+        except ValueError:
+            print("   ✓ 拒绝相同的任务目录和图片目录")
+        
+        print("3. 测试工作进程忽略SIGINT...")
+        with ProcessPoolExecutor(max_workers=1, initializer=watcher_module._init_worker) as executor:
+            handler = executor.submit(signal.getsignal, signal.SIGINT).result()
+        if handler == signal.SIG_IGN:
+            print("   ✓ Ctrl+C只由主进程处理")
+        else:
+            print(f"   ✗ 工作进程的SIGINT处理函数为 {handler}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 监视目录测试失败: {e}")
+        return False
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+
+def test_grid_decoding():
+    """测试网格采样解码功能"""
+    print("\n=== 测试网格采样解码功能 ===")
+    
+    generator = QRCodeGenerator()
+    cases = [
+        ("Hello, QR Code!", "text"),
+        ("www.example.com", "url"),
+        ("张三", "contact"),
+        ("0123456789", "text"),
+        ("HELLO WORLD", "text"),
+        ("x" * 500, "text")
+    ]
+    
+    print("1. 测试生成后解码...")
+    for content, content_type in cases:
+        for ec in ["L", "H"]:
+            try:
+                img = generator.generate_qr_code(content, content_type=content_type,
+                                                 error_correction=ec, box_size=3, border=2)
+                expected = generator._format_content(content, content_type)
+                known = GridDecoder(box_size=3, border=2).decode(img)
+                inferred = GridDecoder().decode(img)
+                if known[0]['data'] == inferred[0]['data'] == expected:
+                    print(f"   ✓ {content_type} 纠错级别 {ec} 解码成功")
+                else:
+                    print(f"   ✗ {content_type} 纠错级别 {ec} 解码结果不一致")
+                    return False
+            except Exception as e:
+                print(f"   ✗ {content_type} 纠错级别 {ec} 解码失败: {e}")
+                return False
+    
+    print("2. 测试损坏图像...")
+    img = generator.generate_qr_code("Damaged", box_size=4).convert('L')
+    img.paste(0, (60, 60, 72, 72))
+    try:
+        GridDecoder(box_size=4, border=4).decode(img)
+        print("   ✗ 损坏图像未被检测")
+        return False
+    except GridDecodeError:
+        print("   ✓ 损坏图像被检测")
+    
+    # 校验通过但数据段取值越界(字母数字对、单个字母数字、汉字、数字)
+    for bits in ['0010' + '000000010' + '11111111111',
+                 '0010' + '000000001' + '111111',
+                 '1000' + '00000001' + '1111111111111',
+                 '0001' + '0000000011' + '1111111111']:
+        bits += '0' * (-len(bits) % 8)
+        try:
+            GridDecoder()._decode_segments(int(bits, 2).to_bytes(len(bits) // 8, 'big'), 1)
+            print(f"   ✗ 无效数据段未被检测: {bits}")
+            return False
+        except GridDecodeError:
+            pass
+    print("   ✓ 无效数据段被检测")
+    
+    print("3. 测试共享内存解码池...")
+    frames = [generator.generate_qr_code(f"frame {i}", box_size=3).convert('RGB') for i in range(5)]
+    try:
+        with SharedMemoryDecodePool(workers=1, slots=2, backend='grid') as pool:
+            data = [results[0]['data'] for results in pool.map(frames)]
+        if data == [f"frame {i}" for i in range(5)]:
+            print("   ✓ 解码池按顺序返回结果")
+        else:
+            print(f"   ✗ 解码池结果不正确: {data}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 解码池解码失败: {e}")
+        return False
+    
+    print("4. 测试二进制负载原始模式...")
+    payload = bytes(range(256))
+    try:
+        img = generator.generate_qr_code(payload, box_size=3)
+        decoder = QRCodeDecoder(backend='grid')
+        raw = decoder.decode_from_image(img, raw=True)
+        text = generator.generate_qr_code("Raw 模式", box_size=3)
+        if raw and raw[0].data.tobytes() == payload and \
+                decoder.decode_from_image(text, raw=True)[0].to_dict() == decoder.decode_from_image(text)[0]:
+            print("   ✓ 二进制负载按原样解码，字典格式保持不变")
+        else:
+            print("   ✗ 二进制负载解码结果不正确")
+            return False
+        
+        # 无效UTF-8字节经文件往返后保持不变
+        invalid_utf8 = b"\xff\xfe\x00\x80\xc3\x28" * 8
+        file_path = "test_raw_payload.png"
+        generator.save_qr_code(generator.generate_qr_code(invalid_utf8, box_size=3), file_path)
+        try:
+            raw = decoder.decode_from_file(file_path, raw=True)
+        finally:
+            os.remove(file_path)
+        if raw and raw[0].data.tobytes() == invalid_utf8:
+            print("   ✓ 无效UTF-8负载经文件往返后字节一致")
+        else:
+            print(f"   ✗ 无效UTF-8负载往返结果不正确: {raw}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 二进制负载解码失败: {e}")
+        return False
+    
+    class TextOnlyBackend(DecoderBackend):
+        # 模拟只能返回文本的后端
+        name = 'text-only'
+        
+        def _decode(self, img):
+            return []
+    
+    try:
+        QRCodeDecoder(backend=TextOnlyBackend()).decode_from_image(img, raw=True)
+        print("   ✗ 不能返回原始字节的后端未拒绝原始模式")
+        return False
+    except ValueError:
+        print("   ✓ 不能返回原始字节的后端拒绝原始模式")
+    
+    return True
+
+
+def test_styled_generation():
+    """测试样式渲染功能"""
+    print("\n=== 测试样式渲染功能 ===")
+    
+    generator = QRCodeGenerator()
+    
+    print("1. 测试颜色和模块形状...")
+    for shape in ["rounded", "dot"]:
+        try:
+            img = generator.generate_qr_code("Styled", fill_color="#1a237e", back_color="#fffde7",
+                                             module_shape=shape, box_size=6, border=2)
+            decoded = GridDecoder(box_size=6, border=2).decode(img)
+            if img.mode == 'RGB' and decoded[0]['data'] == "Styled":
+                print(f"   ✓ {shape}样式解码成功")
+            else:
+                print(f"   ✗ {shape}样式解码结果不一致")
+                return False
+        except Exception as e:
+            print(f"   ✗ {shape}样式生成失败: {e}")
+            return False
+    
+    print("2. 测试logo纠错级别...")
+    logo_path = "test_logo.png"
+    Image.new('RGB', (40, 30), 'red').save(logo_path)
+    try:
+        img = generator.generate_qr_code("Logo", logo=logo_path, logo_ratio=0.3, box_size=4)
+        if required_error_correction(57, 0.3, 1, 'M') == 'H' and img.size == (260, 260):
+            print("   ✓ logo自动提高纠错级别")
+        else:
+            print("   ✗ logo纠错级别不正确")
+            return False
+        
+        try:
+            generator.generate_qr_code("Logo", logo=logo_path, logo_ratio=0.4)
+            print("   ✗ 过大的logo未被拒绝")
+            return False
+        except ValueError:
+            print("   ✓ 过大的logo被拒绝")
+    except Exception as e:
+        print(f"   ✗ logo生成失败: {e}")
+        return False
+    finally:
+        os.remove(logo_path)
+    
+    return True
+
+
+def test_structured_append():
+    """测试结构化追加功能"""
+    print("\n=== 测试结构化追加功能 ===")
+    
+    generator = QRCodeGenerator()
+    decoder = QRCodeDecoder(backend="grid")
+    content = "结构化追加 Structured Append 0123456789 " * 20
+    
+    print("1. 测试分割生成...")
+    try:
+        images = generator.generate_structured_append(content, size=5, box_size=2, workers=0)
+        if 1 < len(images) <= 16:
+            print(f"   ✓ 分割为{len(images)}个QR码")
+        else:
+            print(f"   ✗ 分割数量异常: {len(images)}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 分割生成失败: {e}")
+        return False
+    
+    print("2. 测试乱序重组...")
+    try:
+        result = decoder.decode_structured_append(list(reversed(images)))
+        if len(result['messages']) == 1 and result['messages'][0]['data'] == content:
+            print("   ✓ 乱序重组成功")
+        else:
+            print(f"   ✗ 乱序重组失败: {result['pending']}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 乱序重组失败: {e}")
+        return False
+    
+    print("3. 测试不报告头信息的后端...")
+    
+    class HeaderlessBackend(DecoderBackend):
+        # 模拟pyzbar：能识别任何图片，但结果中没有结构化追加头
+        name = 'headerless'
+        
+        def _decode(self, img):
+            return [{'type': 'QRCODE', 'data': 'headerless', 'rect': {}, 'polygon': []}]
+    
+    try:
+        blank = Image.new('L', (60, 60), 255)
+        result = QRCodeDecoder(backend=HeaderlessBackend()).decode_structured_append(images + [blank])
+        if len(result['messages']) == 1 and result['messages'][0]['data'] == content and \
+                [r['data'] for r in result['standalone']] == ['headerless']:
+            print("   ✓ 改用grid读取头信息，其余结果作为独立内容返回")
+        else:
+            print(f"   ✗ 重组结果不正确: {result}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 重组失败: {e}")
+        return False
+    
+    return True
+
+
+def test_payload_compression():
+    """测试内容压缩功能"""
+    print("\n=== 测试内容压缩功能 ===")
+    
+    generator = QRCodeGenerator()
+    decoder = QRCodeDecoder(backend="grid")
+    items = ", ".join(f'{{"sku": "SKU-{i:04d}", "quantity": {i}, "price": "9.90"}}' for i in range(20))
+    payload = f'{{"id": "ORDER-1", "status": "shipped", "items": [{items}]}}'
+    
+    print("1. 测试压缩降低版本...")
+    info = generator.compress_content(payload)
+    if info['compressed'] and info['version_after'] < info['version_before']:
+        print(f"   ✓ 版本 {info['version_before']} -> {info['version_after']}")
+    else:
+        print(f"   ✗ 压缩未降低版本: {info}")
+        return False
+    
+    print("2. 测试解码自动解压...")
+    try:
+        img = generator.generate_qr_code(payload, compress=True, size=1, box_size=2)
+        results = decoder.decode_generated(img, box_size=2, border=4)
+        if results[0]['data'] == payload:
+            print("   ✓ 解压成功")
+        else:
+            print("   ✗ 解压结果不一致")
+            return False
+    except Exception as e:
+        print(f"   ✗ 解压失败: {e}")
+        return False
+    
+    print("3. 测试短内容不压缩...")
+    if not generator.compress_content("Hello")['compressed']:
+        print("   ✓ 短内容保持原样")
+    else:
+        print("   ✗ 短内容被压缩")
+        return False
+    
+    return True
+
+
+def test_decoder_corpus():
+    """测试合成测试集功能"""
+    print("\n=== 测试合成测试集功能 ===")
+    
+    test_dir = "test_corpus"
+    
+    print("1. 测试相同种子生成相同测试集...")
+    try:
+        first = build_corpus(os.path.join(test_dir, "a"), count=2, seed=5,
+                             distortions=["rotation", "scale"], workers=0)
+        build_corpus(os.path.join(test_dir, "b"), count=2, seed=5,
+                     distortions=["rotation", "scale"], workers=0)
+        labels = load_labels(os.path.join(test_dir, "a"))
+        if first['total'] == 14 and labels == load_labels(os.path.join(test_dir, "b")):
+            print(f"   ✓ 生成 {first['total']} 张图片，标注一致")
+        else:
+            print(f"   ✗ 测试集不一致: {first}")
+            return False
+        
+        print("2. 测试按分组评测...")
+        report = benchmark_corpus(os.path.join(test_dir, "a"), backend="grid")
+        if sorted(report['buckets']) == sorted(first['buckets']) and \
+                all(bucket['count'] == 2 for bucket in report['buckets'].values()):
+            print(f"   ✓ 评测 {len(report['buckets'])} 个分组")
+        else:
+            print(f"   ✗ 评测分组不正确: {list(report['buckets'])}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 合成测试集失败: {e}")
+        return False
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+
+def test_stream_decoder():
+    """测试帧序列解码功能"""
+    print("\n=== 测试帧序列解码功能 ===")
+    
+    class MarkerBackend(DecoderBackend):
+        # 以图像中的深色方块模拟QR码，灰度值决定内容
+        name = 'marker'
+        
+        def _decode(self, img):
+            box = ImageOps.invert(img.convert('L')).getbbox()
+            if box is None:
+                return []
+            left, top, right, bottom = box
+            data = "A" if img.convert('L').getpixel((left, top)) < 50 else "B"
+            corners = [(left, top), (right - 1, top), (right - 1, bottom - 1), (left, bottom - 1)]
+            return [{'type': 'QRCODE', 'data': data,
+                     'rect': {'left': left, 'top': top, 'width': right - left, 'height': bottom - top},
+                     'polygon': [{'x': x, 'y': y} for x, y in corners]}]
+    
+    def frame(data, x, y):
+        img = Image.new('L', (200, 200), 255)
+        img.paste(0 if data == "A" else 100, (x, y, x + 20, y + 20))
+        return img
+    
+    # A在左上角缓慢移动，第6帧跳到右下角，之后换成B
+    frames = [frame("A", 20 + 2 * i, 20) for i in range(6)] + [frame("A", 150, 150)] + \
+        [frame("B", 150 + i, 150) for i in range(4)]
+    
+    print("1. 测试ROI跟踪与定期全帧扫描...")
+    stream = StreamDecoder(QRCodeDecoder(backend=MarkerBackend()), full_scan_interval=3)
+    decoded = list(stream.decode_stream(frames))
+    stats = stream.get_stats()
+    # 第0帧全帧扫描；ROI连续命中3帧后第4、10帧强制全帧扫描；第6帧ROI未命中回退全帧扫描
+    full_scan_frames = [result['frame'] for result in decoded if not result['roi']]
+    if [r['results'][0]['data'] for r in decoded] == ["A"] * 7 + ["B"] * 4 and \
+            full_scan_frames == [0, 4, 6, 10] and stats['full_scans'] == 4 and \
+            stats['roi_attempts'] == 8 and stats['roi_hits'] == 7 and \
+            abs(stats['roi_hit_rate'] - 7 / 8) < 1e-9:
+        print(f"   ✓ ROI命中率 {stats['roi_hit_rate']:.0%}，全帧扫描 {full_scan_frames}")
+    else:
+        print(f"   ✗ ROI跟踪结果不正确: {full_scan_frames}, {stats}")
+        return False
+    
+    # ROI命中时结果坐标为整帧坐标
+    rect = decoded[1]['results'][0]['rect']
+    if (rect['left'], rect['top']) == (22, 20):
+        print("   ✓ ROI结果已映射回整帧坐标")
+    else:
+        print(f"   ✗ ROI结果坐标不正确: {rect}")
+        return False
+    
+    print("2. 测试重复内容过滤...")
+    new_frames = [(r['frame'], [n['data'] for n in r['new']])
+                  for r in stream.decode_stream(frames, only_new=True)]
+    if new_frames == [(0, ["A"]), (7, ["B"])] and stream.get_stats()['unique_payloads'] == 2:
+        print("   ✓ 只返回内容变化的帧")
+    else:
+        print(f"   ✗ 重复内容过滤不正确: {new_frames}")
+        return False
+    
+    return True
+
+
+def test_decode_cache():
+    """测试解码结果缓存功能"""
+    print("\n=== 测试解码结果缓存功能 ===")
+    
+    test_dir = "test_cache_output"
+    os.makedirs(test_dir, exist_ok=True)
+    generator = QRCodeGenerator()
+    paths = []
+    for name in ("a", "b", "c"):
+        path = os.path.join(test_dir, f"{name}.png")
+        generator.save_qr_code(generator.generate_qr_code(f"cache {name}", size=1, box_size=2), path)
+        paths.append(path)
+    
+    try:
+        print("1. 测试按文件状态和内容哈希命中...")
+        cache = DecodeCache()
+        decoder = QRCodeDecoder(cache=cache, backend='grid')
+        first = decoder.decode_from_file(paths[0])
+        decoder.decode_from_file(paths[0])
+        renamed = os.path.join(test_dir, "renamed.png")
+        os.rename(paths[0], renamed)
+        moved = decoder.decode_from_file(renamed)
+        stats = cache.get_stats()
+        if first[0]['data'] == "cache a" and moved == first and \
+                (stats['misses'], stats['stat_hits'], stats['hash_hits']) == (1, 1, 1):
+            print("   ✓ 未变化的文件按状态命中，重命名后按内容哈希命中")
+        else:
+            print(f"   ✗ 缓存命中不正确: {stats}")
+            return False
+        
+        print("2. 测试解码设置变化时失效...")
+        QRCodeDecoder(cache=cache, backend='grid', decompress=False).decode_from_file(renamed)
+        stats = cache.get_stats()
+        if stats['invalidations'] == 1 and stats['misses'] == 2:
+            print("   ✓ 设置变化后重新解码")
+        else:
+            print(f"   ✗ 缓存未失效: {stats}")
+            return False
+        
+        print("3. 测试LRU淘汰...")
+        decoded = []
+        
+        def decode_bytes(data):
+            decoded.append(data)
+            return [{'data': str(len(decoded))}]
+        
+        cache = DecodeCache(max_entries=2)
+        for path in (renamed, paths[1], renamed, paths[2], renamed, paths[1]):
+            cache.decode_file(path, "lru", decode_bytes)
+        # 访问a后再加入c，最久未使用的b被淘汰，a仍命中
+        if len(decoded) == 4 and cache.get_stats()['entries'] == 2:
+            print("   ✓ 超出容量时淘汰最久未使用的结果")
+        else:
+            print(f"   ✗ LRU淘汰不正确: 解码 {len(decoded)} 次")
+            return False
+        
+        print("4. 测试SQLite持久化...")
+        db_path = os.path.join(test_dir, "cache.db")
+        cache = DecodeCache(db_path)
+        cache.decode_file(paths[1], "sqlite", decode_bytes)
+        cache.close()
+        decoded.clear()
+        reopened = DecodeCache(db_path)
+        results = reopened.decode_file(paths[1], "sqlite", decode_bytes)
+        stats = reopened.get_stats()
+        reopened.close()
+        if not decoded and results == [{'data': '5'}] and stats['stat_hits'] == 1 and \
+                stats['persistent_entries'] == 1:
+            print("   ✓ 新实例直接使用持久化的结果")
+        else:
+            print(f"   ✗ 持久化缓存未命中: {results}, {stats}")
+            return False
+    except Exception as e:
+        print(f"   ✗ 解码缓存测试失败: {e}")
+        return False
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+
+def test_backend_selector():
+    """测试解码后端选择功能"""
+    print("\n=== 测试解码后端选择功能 ===")
+    
+    class FailingBackend(DecoderBackend):
+        # 模拟依赖损坏或总是出错的后端
+        name = 'failing'
+        
+        def _decode(self, img):
+            raise RuntimeError("后端出错")
+    
+    generator = QRCodeGenerator()
+    img = generator.generate_qr_code("selector", size=1, box_size=2)
+    
+    print("1. 测试fallback策略...")
+    selector = BackendSelector([FailingBackend(), "grid"], policy="fallback")
+    results = QRCodeDecoder(backend=selector).decode_from_image(img)
+    stats = selector.get_stats()
+    if [r['data'] for r in results] == ["selector"] and stats['backends']['failing']['calls'] == 1 and \
+            stats['backends']['grid']['successes'] == 1 and selector._executor is None:
+        print("   ✓ 出错的后端被跳过，回退到下一个后端")
+    else:
+        print(f"   ✗ 回退结果不正确: {results}, {stats}")
+        return False
+    
+    print("2. 测试race策略...")
+    selector = BackendSelector([FailingBackend(), "grid"], policy="race")
+    try:
+        # 多个线程同时首次竞速，只创建一个线程池
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            decoded = list(executor.map(lambda _: selector.decode(img)[0]['data'], range(8)))
+        if decoded == ["selector"] * 8 and selector.get_stats()['backends']['grid']['calls'] == 8:
+            print("   ✓ 并发竞速采用成功的结果")
+        else:
+            print(f"   ✗ 竞速结果不正确: {decoded}")
+            return False
+    finally:
+        selector.close()
+    
+    print("3. 测试校准排序...")
+    selector = BackendSelector([FailingBackend(), "grid"])
+    corpus = [(generator.generate_qr_code(f"sample {i}", size=1, box_size=2), f"sample {i}")
+              for i in range(3)]
+    measurements = selector.calibrate(corpus)
+    if [m['name'] for m in measurements] == ["grid", "failing"] and \
+            measurements[0]['success_rate'] == 1.0 and measurements[1]['success_rate'] == 0.0 and \
+            selector.name == "fallback(grid,failing)":
+        print("   ✓ 按成功率重新排序后端")
+    else:
+        print(f"   ✗ 校准结果不正确: {measurements}")
+        return False
+    
+    return True
+
+
+def test_page_decoding():
+    """测试多页图片解码功能"""
+    print("\n=== 测试多页图片解码功能 ===")
+    
+    test_dir = "test_pages_output"
+    os.makedirs(test_dir, exist_ok=True)
+    generator = QRCodeGenerator()
+    decoder = QRCodeDecoder(backend='grid')
+    pages = [generator.generate_qr_code(f"page {i}", size=1, box_size=2).convert('L') for i in range(5)]
+    expected = [(i, [f"page {i}"]) for i in range(5)]
+    
+    try:
+        print("1. 测试多页TIFF和动态GIF...")
+        for extension in ("tif", "gif"):
+            path = os.path.join(test_dir, f"pages.{extension}")
+            pages[0].save(path, save_all=True, append_images=pages[1:])
+            for workers in (0, 2):
+                decoded = [(page['page'], [r['data'] for r in page['results']])
+                           for page in decoder.iter_decode_pages(path, workers=workers)]
+                if decoded != expected:
+                    print(f"   ✗ {extension}(workers={workers})逐页结果不正确: {decoded}")
+                    return False
+        print("   ✓ 逐页和并行解码均按页序返回结果")
+        
+        print("2. 测试无效图片的错误...")
+        invalid = os.path.join(test_dir, "invalid.tif")
+        with open(invalid, 'wb') as f:
+            f.write(b"not an image")
+        truncated = os.path.join(test_dir, "truncated.tif")
+        with open(os.path.join(test_dir, "pages.tif"), 'rb') as source, open(truncated, 'wb') as f:
+            data = source.read()
+            f.write(data[:len(data) * 9 // 10])
+        for path in (invalid, truncated):
+            for workers in (0, 2):
+                try:
+                    list(decoder.iter_decode_pages(path, workers=workers))
+                    print(f"   ✗ {path}(workers={workers})未报错")
+                    return False
+                except ValueError:
+                    pass
+        print("   ✓ 逐页和并行解码均抛出ValueError")
+    except Exception as e:
+        print(f"   ✗ 多页图片解码失败: {type(e).__name__}: {e}")
+        return False
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+
+def test_tiled_decoding():
+    """测试大图分块解码功能"""
+    print("\n=== 测试大图分块解码功能 ===")
+    
+    marker_size = 60
+    
+    class SquareBackend(DecoderBackend):
+        # 以深色方块模拟QR码，只识别完整的方块(被分块边缘截断的读不出)，灰度值决定内容
+        name = 'square'
+        
+        def _decode(self, img):
+            pixels = np.asarray(img.convert('L'))
+            dark = pixels < 200
+            results = []
+            while dark.any():
+                ys, xs = np.nonzero(dark)
+                y, x = int(ys[0]), int(xs[0])
+                width = int(np.argmin(np.append(dark[y, x:], False)))
+                height = int(np.argmin(np.append(dark[y:, x], False)))
+                dark[y:y + height, x:x + width] = False
+                if width != marker_size or height != marker_size:
+                    continue
+                corners = [(x, y), (x + width - 1, y), (x + width - 1, y + height - 1), (x, y + height - 1)]
+                results.append({'type': 'QRCODE', 'data': f"code {pixels[y, x]}",
+                                'rect': {'left': x, 'top': y, 'width': width, 'height': height},
+                                'polygon': [{'x': px, 'y': py} for px, py in corners]})
+            return results
+    
+    # 1000x1000的合成图，分块400、重叠100时分块起点为0、300、600
+    markers = [
+        (320, 320, 0),   # 位于四个分块的重叠区域
+        (370, 50, 20),   # 跨越第一个分块的右边缘，只在第二列分块中完整
+        (900, 900, 40),  # 只在右下角分块中
+        (50, 650, 60),   # 位于上下两个分块的重叠区域
+        (100, 100, 80),  # 与下一个方块内容相同但位置不同
+        (800, 100, 80)
+    ]
+    img = Image.new('L', (1000, 1000), 255)
+    for left, top, value in markers:
+        img.paste(value, (left, top, left + marker_size, top + marker_size))
+    expected = sorted((f"code {value}", left, top) for left, top, value in markers)
+    
+    print("1. 测试分块坐标...")
+    boxes = _tile_boxes(img.size, 400, 100)
+    if len(boxes) == 9 and boxes[0] == (0, 0, 400, 400) and boxes[-1] == (600, 600, 1000, 1000):
+        print(f"   ✓ {len(boxes)}个重叠分块覆盖整张图片")
+    else:
+        print(f"   ✗ 分块坐标不正确: {boxes}")
+        return False
+    
+    print("2. 测试跨分块去重与坐标映射...")
+    decoder = QRCodeDecoder(backend=SquareBackend())
+    # 重叠区域中的方块会在多个分块中被识别
+    tile_count = sum(len(decoder.decode_region(img, box)) for box in boxes)
+    results = decoder.decode_tiled(img, tile_size=400, overlap=100, workers=2)
+    found = sorted((r['data'], r['rect']['left'], r['rect']['top']) for r in results)
+    polygon_ok = all(r['polygon'][0] == {'x': r['rect']['left'], 'y': r['rect']['top']} for r in results)
+    if tile_count > len(markers) and found == expected and polygon_ok:
+        print(f"   ✓ 分块结果 {tile_count} 个合并为 {len(results)} 个，坐标为原图坐标")
+    else:
+        print(f"   ✗ 分块解码结果不正确: {found}")
+        return False
+    
+    return True
+
+
 def main():
     """主测试函数"""
     print("开始测试QR码生成器...\n")
@@ -109,9 +1038,23 @@ def main():
     # 运行测试
     test1_passed = test_qrcode_generation()
     test2_passed = test_qrcode_saving()
+    test3_passed = test_batch_generation()
+    test4_passed = test_grid_decoding()
+    test5_passed = test_structured_append()
+    test6_passed = test_payload_compression()
+    test7_passed = test_folder_watcher()
+    test8_passed = test_styled_generation()
+    test9_passed = test_decoder_corpus()
+    test10_passed = test_stream_decoder()
+    test11_passed = test_decode_cache()
+    test12_passed = test_backend_selector()
+    test13_passed = test_page_decoding()
+    test14_passed = test_tiled_decoding()
     
     print("\n=== 测试结果 ===")
-    if test1_passed and test2_passed:
+    if all([test1_passed, test2_passed, test3_passed, test4_passed, test5_passed, test6_passed,
+            test7_passed, test8_passed, test9_passed, test10_passed, test11_passed,
+            test12_passed, test13_passed, test14_passed]):
         print("✓ 所有测试通过！QR码生成器功能正常。")
         return 0
     else: